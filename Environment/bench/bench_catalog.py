@@ -0,0 +1,97 @@
+"""Times scenecatalog crawls and queries against globbing every folder.
+
+Run with: python bench_catalog.py [--files 100000] [--root DIR]
+
+By default a temporary scenes tree is filled with empty dummy scenes,
+one folder per asset and task. "glob latest" is what answering "latest
+version of every task" takes without a catalog: listing and matching
+every folder again."""
+import argparse
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), os.pardir, "src"))
+
+import naming
+import scenecatalog
+
+TASKS = ("model", "rig", "anim", "lookdev")
+
+
+def make_tree(root, files, per_folder=25):
+    for i in range(files):
+        folder = i // per_folder
+        asset = folder // len(TASKS)
+        task = TASKS[folder % len(TASKS)]
+        path = os.path.join(root, "asset{}".format(asset), task)
+        if i % per_folder == 0:
+            os.makedirs(path)
+        name = naming.SCENE_TEMPLATE.format(
+            descriptor="asset{}".format(asset), task=task,
+            ver=i % per_folder + 1, ext=".ma")
+        open(os.path.join(path, name), "w").close()
+
+
+def glob_latest(root):
+    latest = {}
+    for folder, _, names in os.walk(root):
+        for name in names:
+            fields = naming.SCENE_TEMPLATE.parse(name)
+            if fields is None:
+                continue
+            key = (fields["descriptor"], fields["task"], fields["ext"])
+            if fields["ver"] > latest.get(key, (0,))[0]:
+                latest[key] = (fields["ver"], os.path.join(folder, name))
+    return latest
+
+
+def timed(func):
+    start = time.perf_counter()
+    result = func()
+    return result, time.perf_counter() - start
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--files", type=int, default=100000)
+    parser.add_argument("--root", default=None)
+    args = parser.parse_args(argv)
+    root = args.root or tempfile.mkdtemp()
+    db_dir = tempfile.mkdtemp()
+    try:
+        if not args.root:
+            make_tree(root, args.files)
+        catalog = scenecatalog.SceneCatalog(
+            root, os.path.join(db_dir, "catalog.sqlite"))
+        cold = catalog.crawl()
+        warm = catalog.crawl()
+        touched = os.path.join(root, "asset0", "model")
+        if os.path.isdir(touched):
+            open(os.path.join(touched, "asset0_model_v999.ma"), "w").close()
+        changed = catalog.crawl()
+        latest, query = timed(catalog.latest_versions)
+        _, one = timed(lambda: catalog.latest_version("asset1", "rig", ".ma"))
+        globbed, glob = timed(lambda: glob_latest(root))
+        assert len(latest) == len(globbed)
+        print("{} scenes, {} tasks".format(cold.scenes, len(latest)))
+        print("cold crawl      {:>10.3f} s ({} folders listed)".format(
+            cold.seconds, cold.scanned))
+        print("warm crawl      {:>10.3f} s ({} folders listed)".format(
+            warm.seconds, warm.scanned))
+        print("one changed     {:>10.3f} s ({} folders listed)".format(
+            changed.seconds, changed.scanned))
+        print("latest of all   {:>10.3f} ms".format(query * 1000))
+        print("latest of one   {:>10.3f} ms".format(one * 1000))
+        print("glob latest     {:>10.3f} ms".format(glob * 1000))
+        catalog.close()
+    finally:
+        if not args.root:
+            shutil.rmtree(root)
+        shutil.rmtree(db_dir)
+
+
+if __name__ == "__main__":
+    main()
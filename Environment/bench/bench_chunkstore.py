@@ -0,0 +1,113 @@
+"""Measures chunkstore throughput and dedup ratio on synthetic .ma
+versions.
+
+Run with: python bench_chunkstore.py [--nodes 20000] [--versions 10]
+
+A base scene of transform and mesh nodes is written, then every version
+edits a fraction of the nodes' attributes and adds and deletes a few
+nodes, the way successive saves of a working scene differ. Each version
+is stored with and without zlib, then rebuilt and compared."""
+import argparse
+import filecmp
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), os.pardir, "src"))
+
+import chunkstore
+
+
+def node_text(index, values):
+    return ('createNode transform -n "prop{0}";\n'
+            '\trename -uid "{1:08X}-0000-0000-0000-000000000000";\n'
+            '\tsetAttr ".t" -type "double3" {2:.6f} {3:.6f} {4:.6f} ;\n'
+            '\tsetAttr ".r" -type "double3" {5:.6f} {6:.6f} {7:.6f} ;\n'
+            'createNode mesh -n "prop{0}Shape" -p "prop{0}";\n'
+            '\tsetAttr -s 4 ".vt[0:3]" {8:.6f} {9:.6f} {10:.6f} '
+            '{8:.6f} {10:.6f} {9:.6f} {9:.6f} {8:.6f} {10:.6f} '
+            '{10:.6f} {9:.6f} {8:.6f};\n').format(index, index, *values)
+
+
+def make_versions(nodes, versions, edit_fraction, seed=0):
+    """yields the text of every version of the synthetic scene"""
+    rng = np.random.default_rng(seed)
+    header = ('//Maya ASCII 2020 scene\nrequires maya "2020";\n'
+              'currentUnit -l centimeter -a degree -t film;\n')
+    values = {index: rng.random(9) * 100 for index in range(nodes)}
+    next_index = nodes
+    for _ in range(versions):
+        yield header + "".join(node_text(index, values[index])
+                               for index in sorted(values))
+        keys = sorted(values)
+        edits = rng.choice(len(keys), int(len(keys) * edit_fraction),
+                           replace=False)
+        for edit in edits:
+            values[keys[edit]] = rng.random(9) * 100
+        for edit in rng.choice(len(keys), 5, replace=False):
+            values.pop(keys[edit], None)
+        for _ in range(5):
+            values[next_index] = rng.random(9) * 100
+            next_index += 1
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--nodes", type=int, default=20000)
+    parser.add_argument("--versions", type=int, default=10)
+    parser.add_argument("--edit-fraction", type=float, default=0.01,
+                        help="fraction of the nodes edited per version")
+    parser.add_argument("--average-bits", type=int,
+                        default=chunkstore.AVERAGE_BITS,
+                        help="log2 of the average chunk size")
+    args = parser.parse_args(argv)
+    folder = tempfile.mkdtemp()
+    try:
+        scenes = []
+        for ver, text in enumerate(make_versions(
+                args.nodes, args.versions, args.edit_fraction), 1):
+            path = os.path.join(folder, "set_layout_v{:03d}.ma".format(ver))
+            with open(path, "w") as out_file:
+                out_file.write(text)
+            scenes.append(path)
+        total = sum(os.path.getsize(path) for path in scenes)
+        print("{} versions, {:.1f} MB of scenes".format(len(scenes),
+                                                        total / 1e6))
+        for compress in (False, True):
+            store = chunkstore.ChunkStore(
+                os.path.join(folder, "store{}".format(int(compress))),
+                compress=compress, average_bits=args.average_bits)
+            start = time.perf_counter()
+            for path in scenes:
+                store.save(path, "{}.{}{}".format(path, int(compress),
+                                                  chunkstore.MANIFEST_EXT))
+            saved = time.perf_counter() - start
+            manifests = sum(os.path.getsize("{}.{}{}".format(
+                path, int(compress), chunkstore.MANIFEST_EXT))
+                for path in scenes)
+            start = time.perf_counter()
+            for path in scenes:
+                rebuilt = path + ".rebuilt"
+                store.restore("{}.{}{}".format(path, int(compress),
+                                               chunkstore.MANIFEST_EXT),
+                              rebuilt)
+                assert filecmp.cmp(path, rebuilt, shallow=False)
+                os.remove(rebuilt)
+            restored = time.perf_counter() - start
+            stored = store.bytes_written + manifests
+            chunks = sum(len(names) for _, _, names in os.walk(store.root))
+            print("{:<6} save {:>7.1f} MB/s  restore {:>7.1f} MB/s  "
+                  "stored {:>6.1f} MB in {} chunks  ratio {:>5.1f}x".format(
+                      "zlib" if compress else "raw", total / 1e6 / saved,
+                      total / 1e6 / restored, stored / 1e6, chunks,
+                      float(total) / stored))
+    finally:
+        shutil.rmtree(folder)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,100 @@
+"""Density-map scatters against uniform ones of the same size.
+
+Run with: python bench_density.py [--grid 1000] [--percentage 25]
+                                  [--image 1024] [--repeat 3]
+
+Scatters a flat grid of --grid squared vertices through ScatterCore.
+"uniform" picks --percentage of the vertices; every density map averages
+one half, so it runs at twice the percentage and keeps about as many
+instances. "color" is a vertex colour ramp, "map" a named vertex value
+map, "image" a --image pixel square noise texture read through the UVs.
+The same runs are repeated on the faces with --surface sampling. Times
+are the best of --repeat computes, transforms included. Needs only
+NumPy."""
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), os.pardir, "src"))
+
+import meshsource
+import scattercore
+import scatterdensity
+
+
+def grid_source(side, seed=0):
+    """returns an ArrayMeshSource holding a UV mapped grid with a colour
+    ramp and a random vertex map, both averaging 0.5"""
+    u, v = np.meshgrid(np.linspace(0, 1, side), np.linspace(0, 1, side))
+    positions = np.column_stack((u.ravel() * 100, np.zeros(side * side),
+                                 v.ravel() * 100))
+    normals = np.tile((0.0, 1.0, 0.0), (side * side, 1))
+    index = np.arange(side * side).reshape(side, side)
+    a, b = index[:-1, :-1].ravel(), index[1:, :-1].ravel()
+    c, d = index[:-1, 1:].ravel(), index[1:, 1:].ravel()
+    triangles = np.concatenate((np.stack((a, b, c), axis=1),
+                                np.stack((b, d, c), axis=1)))
+    rng = np.random.default_rng(seed)
+    vertex_data = {"colors": np.column_stack([u.ravel()] * 3),
+                   "uvs": np.column_stack((u.ravel(), v.ravel())),
+                   "density": rng.random(side * side)}
+    return meshsource.ArrayMeshSource({"grid": (positions, normals)},
+                                      {"grid": triangles},
+                                      {"grid": vertex_data})
+
+
+def density_maps(image_size, seed=0):
+    image = np.random.default_rng(seed).integers(
+        0, 256, (image_size, image_size), dtype=np.uint8)
+    return (("uniform", None),
+            ("color", scatterdensity.DensityMap("color")),
+            ("map", scatterdensity.DensityMap("map", "density")),
+            ("image", scatterdensity.DensityMap("image", image=image)))
+
+
+def run(source, density_map, percentage, surface, repeat):
+    """returns the best compute seconds and the instances made"""
+    core = scattercore.ScatterCore()
+    core.set_seed(1)
+    core.verts_to_scatter_on = meshsource.parse_components(["grid"], source)
+    core.set_surface_sampling(surface)
+    core.set_density_map(density_map)
+    # a density map averaging one half keeps half its candidates
+    core.set_percentage(percentage if density_map is None
+                        else min(percentage * 2, 100))
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        matrices = core.compute(source)
+        seconds = time.perf_counter() - start
+        best = seconds if best is None else min(best, seconds)
+    return best, len(matrices)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--grid", type=int, default=1000)
+    parser.add_argument("--percentage", type=float, default=25.0)
+    parser.add_argument("--image", type=int, default=1024)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args(argv)
+    source = grid_source(args.grid)
+    print("{} vertices".format(args.grid * args.grid))
+    print("{:<8} {:<9} {:>9} {:>10} {:>9}".format(
+        "mode", "density", "seconds", "instances", "vs uniform"))
+    for surface in (False, True):
+        uniform = None
+        for name, density_map in density_maps(args.image):
+            seconds, made = run(source, density_map, args.percentage,
+                                surface, args.repeat)
+            uniform = uniform or seconds
+            print("{:<8} {:<9} {:>9.3f} {:>10} {:>9.2f}x".format(
+                "surface" if surface else "vertex", name, seconds, made,
+                seconds / uniform))
+
+
+if __name__ == "__main__":
+    main()
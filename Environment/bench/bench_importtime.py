@@ -0,0 +1,72 @@
+"""Tracks how long the tool modules take to import and what they pull in.
+
+Run with: python bench_importtime.py [--repeat 5] [module ...]
+
+Each module is imported in a fresh interpreter under -X importtime and
+the best cumulative time of --repeat runs is reported. The run fails if
+a module goes over its budget or imports a heavy dependency it should
+only load on first use, so the cost can be watched as the tools grow.
+Run it with mayapy to include Maya's own modules in the picture."""
+import argparse
+import os
+import re
+import subprocess
+import sys
+
+SRC = os.path.abspath(os.path.join(os.path.dirname(__file__), os.pardir,
+                                   "src"))
+
+# module: (budget in ms, dependencies it must not import)
+BUDGETS = {
+    "smartsave": (100, ("maya", "pymel", "PySide2", "numpy")),
+    "scenefile": (100, ("maya", "pymel", "PySide2", "numpy")),
+    "versionindex": (60, ("maya", "pymel", "PySide2", "numpy")),
+    "scenecatalog": (100, ("maya", "pymel", "PySide2", "numpy")),
+    "scatter": (300, ("maya", "pymel", "PySide2")),
+    "scattercli": (300, ("maya", "pymel", "PySide2")),
+}
+
+LINE_RE = re.compile(r"^import time:\s+(\d+) \|\s+(\d+) \| ( *)(\S+)$")
+
+
+def measure(module):
+    """returns (cumulative ms of module, names of the modules loaded)"""
+    # -X importtime also lists imports that failed, so what actually got
+    # loaded is read back from sys.modules
+    code = "import sys, {}; print(' '.join(sys.modules))".format(module)
+    result = subprocess.run([sys.executable, "-X", "importtime", "-c", code],
+                            cwd=SRC, stdout=subprocess.PIPE,
+                            stderr=subprocess.PIPE, universal_newlines=True,
+                            check=True)
+    total = None
+    for line in result.stderr.splitlines():
+        match = LINE_RE.match(line)
+        if match and match.group(4) == module and not match.group(3):
+            total = int(match.group(2)) / 1000.0
+    return total, set(result.stdout.split())
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("modules", nargs="*", default=sorted(BUDGETS))
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args(argv)
+    failures = 0
+    print("{:<14} {:>9} {:>9}  {}".format("module", "ms", "budget",
+                                          "heavy imports"))
+    for module in args.modules:
+        budget, forbidden = BUDGETS.get(module, (None, ()))
+        runs = [measure(module) for _ in range(args.repeat)]
+        best = min(total for total, _ in runs)
+        heavy = sorted(name for name in runs[0][1]
+                       if name.split(".")[0] in forbidden)
+        over = budget is not None and best > budget
+        failures += bool(over or heavy)
+        print("{:<14} {:>9.1f} {:>9} {} {}".format(
+            module, best, budget or "-", ", ".join(heavy) or "none",
+            "FAIL" if over or heavy else ""))
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
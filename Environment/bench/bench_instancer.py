@@ -0,0 +1,88 @@
+"""Scene cost of per-transform output versus a single instancer node.
+
+Needs Maya. Run with mayapy:
+    mayapy bench_instancer.py [--counts 10000 50000 100000]
+
+For each count and output mode a fresh scene gets a plane scattered with
+cubes, is saved as .mb, then reopened. Reports scatter, save and open
+time, file size and the process's peak resident memory afterwards."""
+import argparse
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), os.pardir, "src"))
+
+import maya.standalone
+
+maya.standalone.initialize(name="python")
+
+import maya.cmds as cmds
+
+import meshsource
+import scatterbackend
+import scattercore
+
+
+def peak_memory_mb():
+    try:
+        import psutil
+        return psutil.Process().memory_info().rss / 1024.0 ** 2
+    except ImportError:
+        import resource
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024.0
+
+
+def run(count, backend, path):
+    cmds.file(new=True, force=True)
+    side = int(count ** 0.5) + 1
+    plane = cmds.polyPlane(width=100, height=100, subdivisionsX=side - 1,
+                           subdivisionsY=side - 1)[0]
+    source = cmds.polyCube()[0]
+    scat = scattercore.ScatterCore()
+    scat.set_seed(1)
+    scat.set_random_checks(True, True)
+    mesh_source = meshsource.MayaMeshSource()
+    scat.verts_to_scatter_on.add(plane, 0, count)
+    start = time.perf_counter()
+    backend.scatter(source, scat.compute(mesh_source))
+    scatter_time = time.perf_counter() - start
+    cmds.file(rename=path)
+    start = time.perf_counter()
+    cmds.file(save=True, type="mayaBinary", force=True)
+    save_time = time.perf_counter() - start
+    cmds.file(new=True, force=True)
+    start = time.perf_counter()
+    cmds.file(path, open=True, force=True)
+    open_time = time.perf_counter() - start
+    return (scatter_time, save_time, open_time,
+            os.path.getsize(path) / 1024.0 ** 2, peak_memory_mb())
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--counts", type=int, nargs="+",
+                        default=[10000, 50000, 100000])
+    args = parser.parse_args(argv)
+    tmp_dir = tempfile.mkdtemp()
+    print("{:>8} {:>10} {:>10} {:>9} {:>9} {:>10} {:>10}".format(
+        "count", "mode", "scatter s", "save s", "open s", "file MB",
+        "rss MB"))
+    try:
+        for count in args.counts:
+            for mode, backend in (("transform", scatterbackend.ApiBackend()),
+                                  ("instancer",
+                                   scatterbackend.InstancerBackend())):
+                path = os.path.join(tmp_dir, "{}_{}.mb".format(mode, count))
+                print("{:>8} {:>10} {:>10.2f} {:>9.2f} {:>9.2f} {:>10.1f} "
+                      "{:>10.0f}".format(count, mode,
+                                         *run(count, backend, path)))
+    finally:
+        shutil.rmtree(tmp_dir)
+        maya.standalone.uninitialize()
+
+
+if __name__ == "__main__":
+    main()
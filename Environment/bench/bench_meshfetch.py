@@ -0,0 +1,70 @@
+"""Compares per-vertex string lookups against meshsource bulk fetches.
+
+Run with: python bench_meshfetch.py [--sizes 10000 100000 1000000]
+
+A synthetic grid is written to a temporary .npz and read back through
+FileMeshSource. The legacy path mimics filterExpand + pointPosition: one
+component name per vertex, parsed and looked up one at a time."""
+import argparse
+import os
+import re
+import shutil
+import sys
+import tempfile
+import timeit
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), os.pardir, "src"))
+
+import meshsource
+
+VERT_RE = re.compile(r"^(.+)\.vtx\[(\d+)\]$")
+
+
+def grid_mesh(count):
+    side = int(np.ceil(np.sqrt(count)))
+    u, v = np.meshgrid(np.arange(side), np.arange(side))
+    positions = np.zeros((side * side, 3))
+    positions[:, 0] = u.ravel()
+    positions[:, 2] = v.ravel()
+    normals = np.tile((0.0, 1.0, 0.0), (side * side, 1))
+    return positions[:count], normals[:count]
+
+
+def legacy_fetch(names, meshes):
+    result = []
+    for name in names:
+        mesh, index = VERT_RE.match(name).groups()
+        result.append(tuple(meshes[mesh][0][int(index)]))
+    return result
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--sizes", type=int, nargs="+",
+                        default=[10000, 100000, 1000000])
+    args = parser.parse_args(argv)
+    tmp_dir = tempfile.mkdtemp()
+    try:
+        print("{:>10} {:>14} {:>14} {:>10}".format("verts", "legacy (s)",
+                                                  "bulk (s)", "speedup"))
+        for size in args.sizes:
+            path = os.path.join(tmp_dir, "pPlane1.npz")
+            meshsource.save_mesh_npz(path, *grid_mesh(size))
+            source = meshsource.FileMeshSource(path)
+            names = ["pPlane1.vtx[{}]".format(i) for i in range(size)]
+            legacy_time = min(timeit.repeat(
+                lambda: legacy_fetch(names, source.meshes), number=1,
+                repeat=3))
+            bulk_time = min(timeit.repeat(
+                lambda: source.fetch(meshsource.parse_components(
+                    ["pPlane1.vtx[*]"], source)), number=1, repeat=3))
+            print("{:>10} {:>14.4f} {:>14.4f} {:>9.0f}x".format(
+                size, legacy_time, bulk_time, legacy_time / bulk_time))
+    finally:
+        shutil.rmtree(tmp_dir)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,81 @@
+"""One multi-source scatter against one scatter run per source.
+
+Run with: python bench_multisource.py [--count 200000] [--sources 5]
+
+Runs headless on the fakemaya modules. "separate" scatters each source
+on its own at 1/--sources of the vertices, resampling and refetching
+the mesh every time, the way five rock variants had to be done before.
+"multi" selects all sources and scatters once with equal weights.
+Reports the total time, the part of it spent sampling and computing
+transforms rather than creating nodes, and the number of
+scatterInstances commands (undo entries) each way."""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), os.pardir, "src"))
+
+import fakemaya
+
+scene = fakemaya.install()
+
+import maya.cmds as cmds
+
+import scatter
+import scatterprofile
+
+
+def setup(count, sources):
+    cmds.file(new=True, force=True)
+    cmds.select(scene.add_grid("pPlane1", int(round(count ** 0.5))))
+    scat = scatter.Scatter()
+    scat.select_verts_to_scatter_to()
+    cmds.select(sources)
+    scat.select_obj_to_scatter()
+    scat.set_random_checks(True, True)
+    scat.set_profiler(scatterprofile.Profiler())
+    return scat
+
+
+def compute_seconds(scat):
+    report = scat.profiler.report()
+    return report.staged_seconds - report["write"].seconds
+
+
+def run_separate(count, sources):
+    scat = setup(count, sources)
+    scat.set_percentage(100.0 / len(sources))
+    made = 0
+    start = time.perf_counter()
+    for source in sources:
+        scat.obj_to_scatter = source
+        scat.objs_to_scatter = [source]
+        made += len(scat.scatter_func())
+    return (time.perf_counter() - start, compute_seconds(scat), made,
+            scene.undo_records)
+
+
+def run_multi(count, sources):
+    scat = setup(count, sources)
+    start = time.perf_counter()
+    made = len(scat.scatter_func())
+    return (time.perf_counter() - start, compute_seconds(scat), made,
+            scene.undo_records)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--count", type=int, default=200000)
+    parser.add_argument("--sources", type=int, default=5)
+    args = parser.parse_args(argv)
+    sources = ["rock{}".format(number + 1) for number in range(args.sources)]
+    print("{:<10} {:>9} {:>10} {:>10} {:>9}".format(
+        "mode", "seconds", "compute s", "instances", "commands"))
+    for mode, func in (("separate", run_separate), ("multi", run_multi)):
+        print("{:<10} {:>9.3f} {:>10.3f} {:>10} {:>9}".format(
+            mode, *func(args.count, sources)))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,64 @@
+"""Compares the old split-based scene name parsing against naming.
+
+Run with: python bench_naming.py [--paths 300000]
+
+The legacy parser mirrors the old SceneFile._init_from_path and filename
+property with os.path standing in for pymel's Path."""
+import argparse
+import os
+import sys
+import timeit
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), os.pardir, "src"))
+
+import naming
+
+
+def legacy_parse(path):
+    name, ext = os.path.splitext(os.path.basename(path))
+    descriptor, task, ver = name.split("_")
+    return {"descriptor": descriptor, "task": task,
+            "ver": int(ver.split("v")[-1]), "ext": ext}
+
+
+def legacy_format(fields):
+    pattern = "{descriptor}_{task}_v{ver:03d}{ext}"
+    return pattern.format(**fields)
+
+
+def make_paths(count):
+    return ["/proj/assets/asset{}/scenes/asset{}_{}_v{:03d}.ma".format(
+        i % 2000, i % 2000, ("model", "rig", "anim", "lookdev")[i % 4],
+        i // 8000 + 1) for i in range(count)]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--paths", type=int, default=300000)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args(argv)
+    paths = make_paths(args.paths)
+    template = naming.SCENE_TEMPLATE
+    fields = template.parse(paths[0])
+
+    def best(func):
+        return min(timeit.repeat(func, number=1, repeat=args.repeat))
+
+    legacy = best(lambda: [legacy_parse(path) for path in paths])
+    compiled = best(lambda: [template.parse(path) for path in paths])
+    bulk = best(lambda: template.parse_many(paths))
+    legacy_fmt = best(lambda: [legacy_format(fields) for _ in paths])
+    compiled_fmt = best(lambda: [template.format(**fields) for _ in paths])
+    table = template.parse_many(paths)
+    column_bytes = sum(column.nbytes for column in table.columns.values())
+    print("{} paths".format(args.paths))
+    print("legacy parse    {:>10.3f} s".format(legacy))
+    print("template parse  {:>10.3f} s".format(compiled))
+    print("parse_many      {:>10.3f} s ({:.1f} MB of columns)".format(
+        bulk, column_bytes / 1e6))
+    print("legacy format   {:>10.3f} s".format(legacy_fmt))
+    print("template format {:>10.3f} s".format(compiled_fmt))
+
+
+if __name__ == "__main__":
+    main()
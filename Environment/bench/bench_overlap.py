@@ -0,0 +1,69 @@
+"""Overlap culling of dense scatters.
+
+Run with: python bench_overlap.py [--counts 10000 100000 1000000]
+                                  [--radius 0.5] [--large 0.001]
+
+Scatters --counts instances with random scale uniformly over a square
+sized so the bounding spheres overlap heavily (about three neighbours
+each), then times ScatterCore.cull_overlaps and checks that no two kept
+spheres still overlap. The "mixed" rows scale every 1/--large-th
+instance up 50 times, as when one large source is scattered among small
+ones. Needs only NumPy."""
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), os.pardir, "src"))
+
+import scattercore
+import scattersurface
+
+
+def candidates(count, radius, large=0.0, seed=0):
+    """returns count scaled (N,4,4) transforms spread over a square, the
+    large fraction of them 50 times bigger"""
+    rng = np.random.default_rng(seed)
+    side = radius * np.sqrt(count) * 2
+    matrices = np.tile(np.eye(4), (count, 1, 1))
+    scale = rng.uniform(0.5, 1.5, count)
+    scale[rng.random(count) < large] *= 50
+    matrices[:, 0, 0] = matrices[:, 1, 1] = matrices[:, 2, 2] = scale
+    matrices[:, 3, 0] = rng.uniform(0, side, count)
+    matrices[:, 3, 2] = rng.uniform(0, side, count)
+    return matrices
+
+
+def residual_overlaps(matrices, radius):
+    radii = scattercore.instance_radii(matrices, radius)
+    pair_i, pair_j = scattersurface.overlap_pairs(matrices[:, 3, :3],
+                                                  radii)
+    return len(pair_i)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--counts", type=int, nargs="+",
+                        default=(10000, 100000, 1000000))
+    parser.add_argument("--radius", type=float, default=0.5)
+    parser.add_argument("--large", type=float, default=0.001)
+    args = parser.parse_args(argv)
+    print("{:>10} {:>6} {:>9} {:>10} {:>10} {:>9}".format(
+        "candidates", "sizes", "seconds", "culled", "kept", "overlaps"))
+    for count in args.counts:
+        for sizes, large in (("even", 0.0), ("mixed", args.large)):
+            core = scattercore.ScatterCore()
+            core.set_seed(1)
+            matrices = candidates(count, args.radius, large)
+            start = time.perf_counter()
+            kept = core.cull_overlaps(matrices, args.radius)
+            seconds = time.perf_counter() - start
+            print("{:>10} {:>6} {:>9.3f} {:>10} {:>10} {:>9}".format(
+                count, sizes, seconds, core.culled_count, len(kept),
+                residual_overlaps(kept, args.radius)))
+
+
+if __name__ == "__main__":
+    main()
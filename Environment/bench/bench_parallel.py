@@ -0,0 +1,66 @@
+"""Scaling of scatterparallel.parallel_transforms over worker counts.
+
+Run with: python bench_parallel.py [--counts 50000 2000000]
+                                   [--workers 1 2 4 8 16]
+                                   [--start-method spawn]
+
+Each run is checked against the serial scattercore.generate_transforms
+result for the same seed. The smallest count where a worker count beats
+serial is where ScatterCore.set_workers' min_count belongs on that
+machine; --start-method spawn measures what workers cost inside Maya,
+where they are spawned from mayapy."""
+import argparse
+import multiprocessing
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), os.pardir, "src"))
+
+import scattercore
+import scatterparallel
+
+OPTIONS = dict(scale_range=((.5, .5, .5), (2, 2, 2)),
+               rotate_range=((0, 0, 0), (180, 180, 180)),
+               align=True, push_in=0.5, seed=1)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--counts", type=int, nargs="+",
+                        default=[50000, 200000, 1000000, 2000000])
+    parser.add_argument("--workers", type=int, nargs="+",
+                        default=[1, 2, 4, 8, 16])
+    parser.add_argument("--start-method", default=None,
+                        choices=multiprocessing.get_all_start_methods())
+    args = parser.parse_args(argv)
+    context = multiprocessing.get_context(args.start_method)
+    print("{} cpus, {} workers".format(os.cpu_count(),
+                                        context.get_start_method()))
+    print("{:>10} {:>8} {:>10} {:>9} {:>10}".format(
+        "count", "workers", "time (s)", "speedup", "identical"))
+    rng = np.random.default_rng(0)
+    for count in args.counts:
+        positions = rng.random((count, 3)) * 100
+        normals = rng.normal(size=(count, 3))
+        start = time.perf_counter()
+        serial = scattercore.generate_transforms(positions, normals,
+                                                 **OPTIONS)
+        serial_time = time.perf_counter() - start
+        print("{:>10} {:>8} {:>10.3f} {:>9} {:>10}".format(
+            count, "serial", serial_time, "1.00x", "-"))
+        for workers in args.workers:
+            start = time.perf_counter()
+            result = scatterparallel.parallel_transforms(
+                positions, normals, workers=workers, context=context,
+                **OPTIONS)
+            elapsed = time.perf_counter() - start
+            print("{:>10} {:>8} {:>10.3f} {:>8.2f}x {:>10}".format(
+                count, workers, elapsed, serial_time / elapsed,
+                str(np.array_equal(result, serial))))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,71 @@
+"""Compares the old rejection loop against scattercore.sample_percentage.
+
+Run with: python bench_sampling.py [--percentage 90] [--legacy-max 10000]
+
+The old loop is quadratic, so sizes above --legacy-max are not run and an
+estimate scaled from the largest measured size is printed instead."""
+import argparse
+import os
+import random as rand
+import sys
+import timeit
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), os.pardir, "src"))
+
+import scattercore
+
+SIZES = (10000, 100000, 1000000)
+
+
+def legacy_pick(verts, fraction):
+    """copy of the pre-scattercore Scatter.choose_percentage_of_vertices"""
+    verts_picked = []
+    for i in range(int(len(verts) * fraction)):
+        chosen_new_number = False
+        while chosen_new_number is False:
+            chosen_new_number = True
+            num = rand.randint(0, len(verts) - 1)
+            for x in verts_picked:
+                if verts[num] == x:
+                    chosen_new_number = False
+        verts_picked.append(verts[num])
+    return verts_picked
+
+
+def best_of(func, repeat):
+    return min(timeit.repeat(func, number=1, repeat=repeat))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--percentage", type=float, default=90.0)
+    parser.add_argument("--legacy-max", type=int, default=10000)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args(argv)
+    fraction = args.percentage / 100
+    print("{:>10} {:>14} {:>16} {:>10}".format("verts", "legacy (s)",
+                                              "scattercore (s)", "speedup"))
+    legacy_base = None
+    for size in SIZES:
+        new_time = best_of(
+            lambda: scattercore.sample_percentage(size, fraction, seed=1),
+            args.repeat)
+        if size <= args.legacy_max:
+            verts = ["pPlane1.vtx[{}]".format(i) for i in range(size)]
+            legacy_time = best_of(lambda: legacy_pick(verts, fraction), 1)
+            legacy_base = (size, legacy_time)
+            legacy_label = "{:.4f}".format(legacy_time)
+        elif legacy_base:
+            legacy_time = legacy_base[1] * (size / float(legacy_base[0])) ** 2
+            legacy_label = "~{:.0f} (est)".format(legacy_time)
+        else:
+            legacy_time = None
+            legacy_label = "skipped"
+        speedup = "{:.0f}x".format(legacy_time / new_time) if legacy_time \
+            else "-"
+        print("{:>10} {:>14} {:>16.4f} {:>10}".format(size, legacy_label,
+                                                    new_time, speedup))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,67 @@
+"""Cost of writing a scatter in batches instead of in one call.
+
+Run with: python bench_scatterjob.py [--count 20000] [--node-cost 50]
+
+The backend is scatterbackend.FakeSceneBackend slowed down by
+--node-cost microseconds per instance, standing in for Maya's node
+creation. Reports the total time, the number of batches and the longest
+batch, which is how long the dialog goes without repainting, for a
+one-shot write and for ScatterJob at a few batch targets."""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), os.pardir, "src"))
+
+import numpy as np
+
+import scatterbackend
+import scatterjob
+
+
+class SlowBackend(scatterbackend.FakeSceneBackend):
+
+    def __init__(self, node_cost):
+        super(SlowBackend, self).__init__()
+        self.node_cost = node_cost
+
+    def create_instances(self, source, count):
+        end = time.perf_counter() + count * self.node_cost
+        while time.perf_counter() < end:
+            pass
+        return super(SlowBackend, self).create_instances(source, count)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--count", type=int, default=20000)
+    parser.add_argument("--node-cost", type=float, default=50.0)
+    args = parser.parse_args(argv)
+    matrices = np.tile(np.identity(4), (args.count, 1, 1))
+    node_cost = args.node_cost / 1e6
+    print("{:<14} {:>8} {:>8} {:>13}".format("mode", "total s", "batches",
+                                             "max batch ms"))
+    start = time.perf_counter()
+    SlowBackend(node_cost).scatter("cube", matrices)
+    total = time.perf_counter() - start
+    print("{:<14} {:>8.3f} {:>8} {:>13.1f}".format("one shot", total, 1,
+                                                   total * 1000.0))
+    for target in (0.02, 0.05, 0.1):
+        job = scatterjob.ScatterJob("cube", matrices, SlowBackend(node_cost),
+                                    scatterjob.BatchSizer(target=target))
+        longest = 0.0
+        start = time.perf_counter()
+        while not job.finished:
+            batch_start = time.perf_counter()
+            job.step()
+            longest = max(longest, time.perf_counter() - batch_start)
+        total = time.perf_counter() - start
+        assert len(job.instances) == args.count
+        print("{:<14} {:>8.3f} {:>8} {:>13.1f}".format(
+            "job {:.0f}ms".format(target * 1000), total, job.batches,
+            longest * 1000.0))
+
+
+if __name__ == "__main__":
+    main()
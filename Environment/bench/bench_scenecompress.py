@@ -0,0 +1,79 @@
+"""Compares write time, read time and size of plain and compressed .ma
+scenes.
+
+Run with: python bench_scenecompress.py [--nodes 100000]
+
+"write" is what SceneFile.save costs: the plain scene written to local
+scratch (Maya's part) and streamed through the compressor into place.
+"read" is what SceneFile.open costs before Maya parses the scene:
+streaming it back out to a plain temporary file. zstd levels are only
+run when the zstandard package is installed."""
+import argparse
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), os.pardir, "src"))
+
+import scenecompress
+from bench_chunkstore import make_versions
+
+
+def timed(func):
+    start = time.perf_counter()
+    func()
+    return time.perf_counter() - start
+
+
+def write_plain(text, path):
+    with open(path, "w") as out_file:
+        out_file.write(text)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--nodes", type=int, default=100000)
+    args = parser.parse_args(argv)
+    text = next(make_versions(args.nodes, 1, 0))
+    folder = tempfile.mkdtemp()
+    try:
+        plain = os.path.join(folder, "set_layout_v001.ma")
+        scratch = os.path.join(folder, "scratch.ma")
+        rebuilt = os.path.join(folder, "rebuilt.ma")
+        plain_write = timed(lambda: write_plain(text, plain))
+        plain_size = os.path.getsize(plain)
+        plain_read = timed(lambda: shutil.copyfile(plain, rebuilt))
+        print("{:>6.1f} MB plain scene".format(plain_size / 1e6))
+        print("{:<10} {:>8} {:>8} {:>9} {:>7}".format(
+            "format", "write s", "read s", "size MB", "ratio"))
+        print("{:<10} {:>8.3f} {:>8.3f} {:>9.1f} {:>7.1f}".format(
+            ".ma", plain_write, plain_read, plain_size / 1e6, 1.0))
+        runs = [(".gz", level) for level in (1, 6, 9)]
+        if ".zst" in scenecompress.available_compressions():
+            runs += [(".zst", level) for level in (1, 3, 9)]
+        for compression, level in runs:
+            packed = plain + compression
+
+            def save():
+                write_plain(text, scratch)
+                scenecompress.compress_file(scratch, packed, compression,
+                                            level)
+                os.remove(scratch)
+
+            write = timed(save)
+            read = timed(lambda: scenecompress.decompress_file(
+                packed, rebuilt, compression))
+            with open(rebuilt) as in_file:
+                assert in_file.read() == text
+            size = os.path.getsize(packed)
+            print("{:<10} {:>8.3f} {:>8.3f} {:>9.1f} {:>7.1f}".format(
+                "{} -{}".format(compression, level), write, read,
+                size / 1e6, float(plain_size) / size))
+    finally:
+        shutil.rmtree(folder)
+
+
+if __name__ == "__main__":
+    main()
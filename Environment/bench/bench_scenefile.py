@@ -0,0 +1,69 @@
+"""Times SceneFile's save and versioning logic without Maya.
+
+Run with: python bench_scenefile.py [--saves 500] [--existing 2000]
+
+SceneFile runs on a scenebackend.FakeSceneBackend in a temporary folder
+that already holds --existing versions of other descriptors, so what is
+measured is SceneFile's own path, naming and version index work plus a
+small file write per save, not Maya's."""
+import argparse
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), os.pardir, "src"))
+
+import scenebackend
+import versionindex
+from scenefile import SceneFile
+
+
+def timed(func, count):
+    """returns the per call times of count calls of func, in ms"""
+    times = []
+    for _ in range(count):
+        start = time.perf_counter()
+        func()
+        times.append((time.perf_counter() - start) * 1000.0)
+    return times
+
+
+def report(label, times):
+    times = sorted(times)
+    print("{:<16} {:>8.3f} {:>8.3f} {:>8.3f}".format(
+        label, sum(times) / len(times), times[len(times) // 2],
+        times[int(len(times) * 0.99)]))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--saves", type=int, default=500)
+    parser.add_argument("--existing", type=int, default=2000)
+    args = parser.parse_args(argv)
+    folder = tempfile.mkdtemp()
+    try:
+        for number in range(args.existing):
+            name = versionindex.scene_name("prop{}".format(number % 50),
+                                           "model", number // 50 + 1, ".ma")
+            open(os.path.join(folder, name), "w").close()
+        backend = scenebackend.FakeSceneBackend(workspace=folder)
+        scene_file = SceneFile(os.path.join(folder, "set_layout_v001.ma"),
+                               backend=backend)
+        print("{:<16} {:>8} {:>8} {:>8}".format("ms per call", "mean",
+                                                "median", "p99"))
+        report("increment_save",
+               timed(scene_file.increment_save, args.saves))
+        report("save", timed(scene_file.save, args.saves))
+        report("next_avail_ver",
+               timed(scene_file.next_avail_ver, args.saves))
+        assert scene_file.ver == args.saves
+        assert scene_file.next_avail_ver() == args.saves + 1
+        assert len(backend.saves) == args.saves * 2
+    finally:
+        shutil.rmtree(folder)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,77 @@
+"""Compares how long a save blocks when written straight to its
+destination against a local scratch write published by savepipeline.
+
+Run with: python bench_staged_save.py [--size-mb 500] [--dest DIR]
+
+A synthetic .ma file stands in for Maya's scene writer. Point --dest at
+a network share to see the difference that matters in production; by
+default a temporary local folder is used, where both paths cost about
+the same."""
+import argparse
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), os.pardir, "src"))
+
+import savepipeline
+
+LINE = (b'setAttr ".pt[0:3]" -type "float3" 0.5 -0.25 1.75 0.5 -0.25 1.75 '
+        b'0.5 -0.25 1.75 0.5 -0.25 1.75;\n')
+
+
+def write_scene(path, size):
+    """writes a size byte stand-in for a saved Maya ascii scene"""
+    block = LINE * (1024 * 1024 // len(LINE))
+    with open(path, "wb") as out_file:
+        written = 0
+        while written < size:
+            out_file.write(block)
+            written += len(block)
+        out_file.flush()
+        os.fsync(out_file.fileno())
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--size-mb", type=int, default=500)
+    parser.add_argument("--dest", default=None,
+                        help="destination folder, a temp folder by default")
+    args = parser.parse_args(argv)
+    size = args.size_mb * 1024 * 1024
+    dest = args.dest or tempfile.mkdtemp()
+    scratch = tempfile.mkdtemp()
+    try:
+        direct_path = os.path.join(dest, "bench_direct_v001.ma")
+        start = time.perf_counter()
+        write_scene(direct_path, size)
+        direct = time.perf_counter() - start
+
+        pipeline = savepipeline.SavePipeline(scratch_dir=scratch)
+        staged_path = os.path.join(dest, "bench_staged_v001.ma")
+        start = time.perf_counter()
+        scratch_path = pipeline.scratch_path_for(staged_path)
+        write_scene(scratch_path, size)
+        future = pipeline.submit(scratch_path, staged_path)
+        blocked = time.perf_counter() - start
+        future.result()
+        total = time.perf_counter() - start
+
+        print("{} MB scene".format(args.size_mb))
+        print("direct save     {:>10.3f} s blocking".format(direct))
+        print("staged save     {:>10.3f} s blocking".format(blocked))
+        print("staged publish  {:>10.3f} s until in place".format(total))
+    finally:
+        for name in ("bench_direct_v001.ma", "bench_staged_v001.ma"):
+            path = os.path.join(dest, name)
+            if os.path.exists(path):
+                os.remove(path)
+        if not args.dest:
+            shutil.rmtree(dest)
+        shutil.rmtree(scratch)
+
+
+if __name__ == "__main__":
+    main()
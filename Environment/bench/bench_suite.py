@@ -0,0 +1,221 @@
+"""Headless benchmark suite for the Scatter Tool and Smart Save.
+
+Run with: python bench_suite.py [--only scatter_func] [--sizes 1000 ...]
+                                [--repeat 5] [--threshold 0.25]
+
+Maya is replaced by the in-memory fakemaya modules, so Scatter and
+SceneFile run their default code paths anywhere. Each benchmark runs at
+a few sizes (vertices scattered onto, or scene files already in the
+folder) and keeps the best of --repeat runs.
+
+Results are appended to --history, one JSON line per run, and each is
+compared with the median of the last --window runs on this machine. The
+suite exits with 1 when any result is more than --threshold slower than
+that, and by more than --min-delta seconds, so it can guard a change
+before it is merged. --no-record checks without adding the run to the
+history."""
+import argparse
+import datetime
+import json
+import os
+import platform
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), os.pardir, "src"))
+
+import fakemaya
+
+scene = fakemaya.install()
+
+import maya.cmds as cmds
+
+import scatter
+import versionindex
+from smartsave import SceneFile
+
+HISTORY_PATH = os.path.join(os.path.expanduser("~"), ".sfa_scripts",
+                            "bench_history.jsonl")
+
+
+def timed(func):
+    start = time.perf_counter()
+    func()
+    return time.perf_counter() - start
+
+
+def setup_scatter(size):
+    """returns a Scatter with a size vertex grid picked, scaling and
+    rotating randomly"""
+    cmds.file(new=True, force=True)
+    side = max(int(round(size ** 0.5)), 2)
+    cmds.select(scene.add_grid("pPlane1", side))
+    scat = scatter.Scatter()
+    scat.select_verts_to_scatter_to()
+    cmds.select("pCube1")
+    scat.select_obj_to_scatter()
+    scat.set_random_checks(True, True)
+    return scat
+
+
+def bench_scatter_func(size):
+    """Scatter.scatter_func onto size vertices"""
+    scat = setup_scatter(size)
+    return timed(scat.scatter_func)
+
+
+def bench_scatter_cmds(size):
+    """the per-vertex cmds loop the Scatter Tool used to run, for
+    reference"""
+    scat = setup_scatter(size)
+    scat.set_checkbox_normals(True)
+    vertices = cmds.filterExpand(str(scat.verts_to_scatter_on).split(),
+                                 selectionMask=31, expand=True)
+
+    def loop():
+        for vertex in vertices:
+            instance = cmds.instance(scat.obj_to_scatter,
+                                     smartTransform=True)[0]
+            cmds.scale(1.5, 1.5, 1.5, instance)
+            position = cmds.pointPosition(vertex, world=True)
+            cmds.move(position[0], position[1], position[2], instance)
+            constraint = cmds.normalConstraint(vertex, instance,
+                                               aimVector=(0, 1, 0))
+            cmds.delete(constraint)
+            cmds.rotate(0, 45, 0, instance, relative=True)
+
+    return timed(loop)
+
+
+def make_folder(size):
+    """returns a temporary folder holding size saved versions spread over
+    fifty descriptors"""
+    folder = tempfile.mkdtemp()
+    for number in range(size):
+        name = versionindex.scene_name("prop{}".format(number % 50),
+                                       "model", number // 50 + 1, ".ma")
+        open(os.path.join(folder, name), "w").close()
+    return folder
+
+
+def bench_next_avail_ver(size):
+    """SceneFile.next_avail_ver, cold, in a folder of size scenes"""
+    folder = make_folder(size)
+    try:
+        scene_file = SceneFile(os.path.join(folder, "prop7_model_v001.ma"))
+        return timed(scene_file.next_avail_ver)
+    finally:
+        shutil.rmtree(folder)
+
+
+def bench_increment_save(size, saves=20):
+    """SceneFile.increment_save, per save, in a folder of size scenes"""
+    folder = make_folder(size)
+    try:
+        scene_file = SceneFile(os.path.join(folder, "prop7_model_v001.ma"))
+        return timed(lambda: [scene_file.increment_save()
+                              for _ in range(saves)]) / saves
+    finally:
+        shutil.rmtree(folder)
+
+
+# name: (function, default sizes)
+BENCHMARKS = {
+    "scatter_func": (bench_scatter_func, (1000, 10000, 100000)),
+    "scatter_cmds": (bench_scatter_cmds, (1000, 10000)),
+    "next_avail_ver": (bench_next_avail_ver, (100, 1000, 10000)),
+    "increment_save": (bench_increment_save, (100, 1000, 10000)),
+}
+
+
+def git_commit():
+    try:
+        return subprocess.check_output(
+            ["git", "rev-parse", "--short", "HEAD"],
+            cwd=os.path.dirname(os.path.abspath(__file__)),
+            stderr=subprocess.DEVNULL, universal_newlines=True).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def read_history(path):
+    if not os.path.exists(path):
+        return []
+    with open(path) as history_file:
+        return [json.loads(line) for line in history_file if line.strip()]
+
+
+def baselines(history, host, window):
+    """returns key -> median of the last window results on host"""
+    values = {}
+    for run in history:
+        if run.get("host") != host:
+            continue
+        for key, seconds in run["results"].items():
+            values.setdefault(key, []).append(seconds)
+    return dict((key, statistics.median(runs[-window:]))
+                for key, runs in values.items())
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--only", nargs="+", choices=sorted(BENCHMARKS),
+                        default=sorted(BENCHMARKS))
+    parser.add_argument("--sizes", type=int, nargs="+", default=None,
+                        help="sizes to run, instead of each default")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--threshold", type=float, default=0.25,
+                        help="allowed slowdown over the baseline, 0.25 is "
+                             "25%%")
+    parser.add_argument("--min-delta", type=float, default=0.002,
+                        help="slowdowns smaller than this many seconds "
+                             "are timer noise, not regressions")
+    parser.add_argument("--window", type=int, default=5,
+                        help="recent runs the baseline is the median of")
+    parser.add_argument("--history", default=HISTORY_PATH)
+    parser.add_argument("--no-record", action="store_true")
+    args = parser.parse_args(argv)
+    host = platform.node()
+    history = read_history(args.history)
+    previous = baselines(history, host, args.window)
+    results = {}
+    regressions = 0
+    print("{:<28} {:>10} {:>10} {:>8}".format("benchmark", "seconds",
+                                              "baseline", "change"))
+    for name in args.only:
+        func, sizes = BENCHMARKS[name]
+        for size in args.sizes or sizes:
+            key = "{}[{}]".format(name, size)
+            seconds = min(func(size) for _ in range(args.repeat))
+            results[key] = seconds
+            baseline = previous.get(key)
+            if baseline is None:
+                print("{:<28} {:>10.4f} {:>10} {:>8}".format(key, seconds,
+                                                            "-", "new"))
+                continue
+            change = seconds / baseline - 1
+            regressed = (change > args.threshold and
+                         seconds - baseline > args.min_delta)
+            regressions += regressed
+            print("{:<28} {:>10.4f} {:>10.4f} {:>+7.0%} {}".format(
+                key, seconds, baseline, change,
+                "REGRESSION" if regressed else ""))
+    if not args.no_record:
+        directory = os.path.dirname(args.history)
+        if directory and not os.path.isdir(directory):
+            os.makedirs(directory)
+        with open(args.history, "a") as history_file:
+            history_file.write(json.dumps({
+                "time": datetime.datetime.now().isoformat(),
+                "host": host, "commit": git_commit(),
+                "python": platform.python_version(),
+                "results": results}) + "\n")
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,58 @@
+"""Times area-weighted surface sampling and Poisson-disk thinning.
+
+Run with: python bench_surface.py [--grid 1000] [--samples 1000000]
+                                  [--min-distance 0.1]
+
+Samples a flat grid mesh of (grid-1)^2 * 2 triangles spanning 100 units."""
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), os.pardir, "src"))
+
+import scattersurface
+
+
+def grid_surface(side):
+    u, v = np.meshgrid(np.linspace(0, 100, side), np.linspace(0, 100, side))
+    positions = np.stack((u.ravel(), np.zeros(side * side), v.ravel()),
+                         axis=1)
+    normals = np.tile((0.0, 1.0, 0.0), (side * side, 1))
+    index = np.arange(side * side).reshape(side, side)
+    a, b = index[:-1, :-1].ravel(), index[1:, :-1].ravel()
+    c, d = index[:-1, 1:].ravel(), index[1:, 1:].ravel()
+    triangles = np.concatenate((np.stack((a, b, c), axis=1),
+                                np.stack((b, d, c), axis=1)))
+    return positions, normals, triangles
+
+
+def timed(label, func):
+    start = time.perf_counter()
+    result = func()
+    print("{:<22} {:>8.3f}s".format(label, time.perf_counter() - start))
+    return result
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--grid", type=int, default=1000)
+    parser.add_argument("--samples", type=int, default=1000000)
+    parser.add_argument("--min-distance", type=float, default=0.1)
+    args = parser.parse_args(argv)
+    positions, normals, triangles = grid_surface(args.grid)
+    print("{} triangles, {} samples".format(len(triangles), args.samples))
+    table = timed("area table", lambda: scattersurface.area_table(
+        positions, triangles))
+    points = timed("sample surface", lambda: scattersurface.sample_surface(
+        positions, normals, triangles, args.samples, seed=1,
+        table=table))[0]
+    keep = timed("poisson disk", lambda: scattersurface.poisson_disk_mask(
+        points, args.min_distance, seed=1))
+    print("kept {} of {} samples".format(int(keep.sum()), len(points)))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,113 @@
+"""Scatter, undo and redo cost of the scatter backends.
+
+Needs Maya. Run with mayapy:
+    mayapy bench_undo.py [--counts 5000 20000]
+
+Each count is scattered onto a plane in a fresh scene inside one undo
+chunk, then undone and redone. "cmds" is the per-instance
+cmds.instance/move/rotate/scale loop Scatter used to run, "api" the
+OpenMaya duplicate backend, whose nodes never reach the undo queue, and
+"command" the scatterInstances plug-in command. Reports the three times
+and how much the process's resident memory grew over the scatter."""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), os.pardir, "src"))
+
+import maya.standalone
+
+maya.standalone.initialize(name="python")
+
+import maya.cmds as cmds
+
+import meshsource
+import scatterbackend
+import scattercore
+
+
+def resident_mb():
+    try:
+        import psutil
+        return psutil.Process().memory_info().rss / 1024.0 ** 2
+    except ImportError:
+        with open("/proc/self/statm") as statm:
+            pages = int(statm.read().split()[1])
+        return pages * os.sysconf("SC_PAGE_SIZE") / 1024.0 ** 2
+
+
+class CmdsLoopBackend(scatterbackend.ScatterBackend):
+    """the old scatter_func: one cmds call per instance and channel"""
+
+    def scatter(self, source, matrices):
+        translations, rotations, scales = scattercore.decompose_matrices(
+            matrices)
+        instances = []
+        for position, rotation, scale in zip(translations.tolist(),
+                                             rotations.tolist(),
+                                             scales.tolist()):
+            instance = cmds.instance(source)[0]
+            cmds.scale(scale[0], scale[1], scale[2], instance)
+            cmds.move(position[0], position[1], position[2], instance)
+            cmds.rotate(rotation[0], rotation[1], rotation[2], instance)
+            instances.append(instance)
+        return instances
+
+
+def timed(func):
+    start = time.perf_counter()
+    func()
+    return time.perf_counter() - start
+
+
+def run(count, backend):
+    cmds.file(new=True, force=True)
+    cmds.undoInfo(state=True, infinity=True)
+    side = int(count ** 0.5) + 1
+    plane = cmds.polyPlane(width=100, height=100, subdivisionsX=side - 1,
+                           subdivisionsY=side - 1)[0]
+    source = cmds.polyCube()[0]
+    scat = scattercore.ScatterCore()
+    scat.set_seed(1)
+    scat.set_random_checks(True, True)
+    scat.verts_to_scatter_on.add(plane, 0, count)
+    matrices = scat.compute(meshsource.MayaMeshSource())
+    cmds.flushUndo()
+    before = resident_mb()
+
+    def scatter():
+        cmds.undoInfo(openChunk=True, chunkName="scatter")
+        try:
+            backend.scatter(source, matrices)
+        finally:
+            cmds.undoInfo(closeChunk=True)
+
+    scatter_time = timed(scatter)
+    grown = resident_mb() - before
+    undo_time = timed(cmds.undo)
+    redo_time = timed(cmds.redo)
+    return scatter_time, undo_time, redo_time, grown
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--counts", type=int, nargs="+",
+                        default=[5000, 20000])
+    args = parser.parse_args(argv)
+    backends = (("cmds", CmdsLoopBackend()),
+                ("api", scatterbackend.ApiBackend()),
+                ("command", scatterbackend.CommandBackend()))
+    print("{:>8} {:>8} {:>10} {:>8} {:>8} {:>9}".format(
+        "count", "mode", "scatter s", "undo s", "redo s", "+rss MB"))
+    try:
+        for count in args.counts:
+            for mode, backend in backends:
+                print("{:>8} {:>8} {:>10.2f} {:>8.2f} {:>8.2f} "
+                      "{:>9.1f}".format(count, mode, *run(count, backend)))
+    finally:
+        maya.standalone.uninitialize()
+
+
+if __name__ == "__main__":
+    main()
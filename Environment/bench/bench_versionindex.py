@@ -0,0 +1,65 @@
+"""Compares a full folder scan per next_avail_ver against versionindex.
+
+Run with: python bench_versionindex.py [--files 5000] [--folder DIR]
+
+The legacy path mirrors the old SceneFile.next_avail_ver: list the
+folder, fnmatch every name and sort the matches. Point --folder at a
+network share to see the difference that matters in production; by
+default a temporary local folder is filled with dummy scenes."""
+import argparse
+import fnmatch
+import os
+import shutil
+import sys
+import tempfile
+import timeit
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), os.pardir, "src"))
+
+import versionindex
+
+
+def legacy_next_avail_ver(folder, descriptor, task, ext):
+    pattern = "{}_{}_v*{}".format(descriptor, task, ext)
+    matching = [name for name in os.listdir(folder)
+                if os.path.isfile(os.path.join(folder, name)) and
+                fnmatch.fnmatch(name, pattern)]
+    if not matching:
+        return 1
+    matching.sort(reverse=True)
+    return int(os.path.splitext(matching[0])[0].split("_v")[-1]) + 1
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--files", type=int, default=5000)
+    parser.add_argument("--folder", default=None)
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args(argv)
+    folder = args.folder or tempfile.mkdtemp()
+    index_dir = tempfile.mkdtemp()
+    try:
+        if not args.folder:
+            for i in range(args.files):
+                name = "asset{}_model_v{:03d}.ma".format(i % 50, i // 50 + 1)
+                open(os.path.join(folder, name), "w").close()
+        legacy = min(timeit.repeat(
+            lambda: legacy_next_avail_ver(folder, "asset1", "model", ".ma"),
+            number=1, repeat=args.repeat))
+        index = versionindex.VersionIndex(folder, index_dir=index_dir)
+        cold = timeit.timeit(lambda: index.rescan(), number=1)
+        warm = min(timeit.repeat(
+            lambda: index.latest("asset1", "model", ".ma") + 1, number=1,
+            repeat=args.repeat))
+        print("{} files".format(len(os.listdir(folder))))
+        print("legacy scan     {:>10.3f} ms".format(legacy * 1000))
+        print("index rescan    {:>10.3f} ms".format(cold * 1000))
+        print("index warm      {:>10.3f} ms".format(warm * 1000))
+    finally:
+        if not args.folder:
+            shutil.rmtree(folder)
+        shutil.rmtree(index_dir)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,391 @@
+"""In-memory stand-ins for maya.cmds, maya.api.OpenMaya and pymel.core.
+
+install() puts fake modules into sys.modules before the tools are
+imported, so Scatter and SceneFile run their default Maya code paths
+without a Maya licence. Everything lives in a FakeScene: meshes made
+with add_grid, the nodes the tools create, the selection, the open
+scene's name and a count of the undo records a real Maya would keep.
+
+Only the calls the tools make are covered: ls, select,
+polyListComponentConversion, filterExpand, pointPosition, instance,
+scale, move, rotate, xform (bounding box queries, a unit cube unless a
+node has a "bounding_box"), normalConstraint, delete, objExists,
+undoInfo, undo, redo, flushUndo, file, workspace, pluginInfo,
+loadPlugin and the scatterInstances plug-in command from maya.cmds;
+MSelectionList, MFnMesh (points, normals, triangles, vertex colours and
+UVs) and MSpace from maya.api.OpenMaya; sceneName,
+saveAs, renameFile, openFile and Path from pymel.core. The old
+OpenMaya modules are empty, so ApiBackend and InstancerBackend still
+need a real Maya.
+
+Timings measure the tools' own Python and NumPy work around these
+calls, not Maya's."""
+import itertools
+import os
+import pathlib
+import re
+import sys
+import types
+
+import numpy as np
+
+COMPONENT_RE = re.compile(r"^(?P<mesh>[^.]+)\.vtx\[(?P<start>\d+|\*)"
+                          r"(?::(?P<end>\d+))?\]$")
+
+
+class FakeScene(object):
+    """The state behind the fake modules."""
+
+    def __init__(self, workspace=None):
+        self.workspace = workspace or os.getcwd()
+        self.meshes = {}
+        self.uvs = {}
+        self.color_sets = {}
+        self.nodes = {}
+        self.selection = []
+        self.scene_name = ""
+        self.undo_records = 0
+        self.undo_steps = 0
+        self.recording = True
+        self.chunk_depth = 0
+        self._chunk_recorded = False
+        self._names = itertools.count(1)
+
+    def add_grid(self, name, side, size=100.0):
+        """adds a flat side x side vertex grid facing +Y, UV mapped 0-1
+        across, returns name"""
+        axis = np.linspace(-size / 2, size / 2, side)
+        grid_x, grid_z = np.meshgrid(axis, axis)
+        positions = np.column_stack((grid_x.ravel(),
+                                     np.zeros(side * side),
+                                     grid_z.ravel()))
+        normals = np.tile((0.0, 1.0, 0.0), (side * side, 1))
+        corners = np.arange(side * side).reshape(side, side)[:-1, :-1]
+        corners = corners.ravel()
+        triangles = np.concatenate((
+            np.column_stack((corners, corners + side, corners + 1)),
+            np.column_stack((corners + 1, corners + side,
+                             corners + side + 1))))
+        self.meshes[name] = (positions, normals, triangles)
+        self.uvs[name] = (positions[:, [0, 2]] + size / 2) / size
+        self.uvs[name][:, 1] = 1 - self.uvs[name][:, 1]
+        return name
+
+    def paint(self, mesh, colors, color_set="colorSet1"):
+        """sets the (N,3) or (N,4) vertex colours of color_set; the first
+        set painted is the current one"""
+        colors = np.asarray(colors, dtype=np.float64)
+        if colors.shape[1] == 3:
+            colors = np.column_stack((colors, np.ones(len(colors))))
+        self.color_sets.setdefault(mesh, {})[color_set] = colors
+        self.color_sets[mesh].setdefault(None, color_set)
+
+    def add_node(self, base, **attrs):
+        name = "{}{}".format(base, next(self._names))
+        attrs.setdefault("translate", [0.0, 0.0, 0.0])
+        attrs.setdefault("rotate", [0.0, 0.0, 0.0])
+        attrs.setdefault("scale", [1.0, 1.0, 1.0])
+        self.nodes[name] = attrs
+        return name
+
+    def record_undo(self, count=1):
+        """notes count undo records; each outside a chunk, or each chunk
+        holding some, is one undo step"""
+        if not self.recording:
+            return
+        self.undo_records += count
+        if self.chunk_depth:
+            self._chunk_recorded = True
+        else:
+            self.undo_steps += 1
+
+    def close_chunk(self):
+        self.chunk_depth -= 1
+        if not self.chunk_depth and self._chunk_recorded:
+            self.undo_steps += 1
+            self._chunk_recorded = False
+
+    def vertex_count(self, mesh):
+        return len(self.meshes[mesh][0])
+
+
+scene = FakeScene()
+
+
+def _as_list(items):
+    if items is None:
+        return []
+    if isinstance(items, str):
+        return items.split()
+    return list(items)
+
+
+def _components(items):
+    """yields (mesh, start, stop) for component or mesh names"""
+    for item in _as_list(items):
+        match = COMPONENT_RE.match(item)
+        if match is None:
+            if item in scene.meshes:
+                yield item, 0, scene.vertex_count(item)
+            continue
+        mesh = match.group("mesh")
+        if match.group("start") == "*":
+            yield mesh, 0, scene.vertex_count(mesh)
+        else:
+            start = int(match.group("start"))
+            yield mesh, start, int(match.group("end") or start) + 1
+
+
+class _Cmds(object):
+    """the maya.cmds functions, as methods so they share the scene"""
+
+    def ls(self, *items, **flags):
+        if flags.get("sl") or flags.get("selection"):
+            return list(scene.selection)
+        return [name for name in _as_list(items)
+                if name in scene.nodes or name in scene.meshes]
+
+    def select(self, *items, **flags):
+        names = []
+        for item in items:
+            names.extend(_as_list(item))
+        scene.selection = names
+
+    def polyListComponentConversion(self, items, **flags):
+        return ["{}.vtx[{}:{}]".format(mesh, start, stop - 1)
+                for mesh, start, stop in _components(items)]
+
+    def filterExpand(self, items, **flags):
+        return ["{}.vtx[{}]".format(mesh, vert)
+                for mesh, start, stop in _components(items)
+                for vert in range(start, stop)] or None
+
+    def pointPosition(self, component, **flags):
+        mesh, start, stop = next(_components([component]))
+        return [float(value) for value in scene.meshes[mesh][0][start]]
+
+    def instance(self, source, **flags):
+        scene.record_undo()
+        return [scene.add_node(source, source=source)]
+
+    def _set_channel(self, channel, values, flags):
+        node = values[3] if len(values) > 3 else scene.selection[0]
+        if flags.get("relative"):
+            current = scene.nodes[node][channel]
+            values = [a + b for a, b in zip(current, values[:3])]
+        scene.nodes[node][channel] = list(values[:3])
+        scene.record_undo()
+
+    def scale(self, *values, **flags):
+        self._set_channel("scale", values, flags)
+
+    def move(self, *values, **flags):
+        self._set_channel("translate", values, flags)
+
+    def rotate(self, *values, **flags):
+        self._set_channel("rotate", values, flags)
+
+    def xform(self, node, **flags):
+        if flags.get("query") and flags.get("boundingBox"):
+            attrs = scene.nodes.get(node, {})
+            return list(attrs.get("bounding_box",
+                                  (-0.5, -0.5, -0.5, 0.5, 0.5, 0.5)))
+        raise NotImplementedError("fake xform only queries bounding boxes")
+
+    def normalConstraint(self, target, node, **flags):
+        scene.record_undo()
+        return [scene.add_node(node + "_normalConstraint",
+                               target=target, constrained=node)]
+
+    def delete(self, *items, **flags):
+        for item in items:
+            for name in _as_list(item):
+                scene.nodes.pop(name, None)
+        scene.record_undo()
+
+    def objExists(self, name):
+        return name in scene.nodes or name in scene.meshes
+
+    def undoInfo(self, **flags):
+        if flags.get("query"):
+            return scene.recording
+        if "stateWithoutFlush" in flags:
+            scene.recording = bool(flags["stateWithoutFlush"])
+        if flags.get("openChunk"):
+            scene.chunk_depth += 1
+        if flags.get("closeChunk"):
+            scene.close_chunk()
+
+    def undo(self):
+        pass
+
+    def redo(self):
+        pass
+
+    def flushUndo(self):
+        scene.undo_records = scene.undo_steps = 0
+
+    def file(self, *paths, **flags):
+        if flags.get("query") and flags.get("sceneName"):
+            return scene.scene_name
+        if "rename" in flags:
+            scene.scene_name = str(flags["rename"])
+            return scene.scene_name
+        if flags.get("save"):
+            if not os.path.isdir(os.path.dirname(scene.scene_name)):
+                raise RuntimeError("folder of {} does not exist".format(
+                    scene.scene_name))
+            with open(scene.scene_name, "w") as out_file:
+                out_file.write("//Maya ASCII fake scene\n")
+            return scene.scene_name
+        if flags.get("open"):
+            if not os.path.isfile(paths[0]):
+                raise RuntimeError("{} does not exist".format(paths[0]))
+            scene.scene_name = str(paths[0])
+            return scene.scene_name
+        if flags.get("new"):
+            scene.__init__(scene.workspace)
+
+    def workspace(self, **flags):
+        return scene.workspace
+
+    def pluginInfo(self, name, **flags):
+        return True
+
+    def loadPlugin(self, path, **flags):
+        return [os.path.splitext(os.path.basename(path))[0]]
+
+    def scatterInstances(self, source, key, adopt=False):
+        import scatterbackend
+        matrices = scatterbackend.take_matrices(key)
+        names = scatterbackend.take_names(key)
+        scene.record_undo()
+        if adopt:
+            return names
+        return [scene.add_node(source, source=source, matrix=matrix)
+                for matrix in matrices]
+
+
+class MSpace(object):
+    kWorld = 4
+
+
+class MDagPath(object):
+
+    def __init__(self, name):
+        self.name = name
+
+    def partialPathName(self):
+        return self.name
+
+
+class MSelectionList(object):
+
+    def __init__(self):
+        self.names = []
+
+    def add(self, name):
+        self.names.append(name)
+        return self
+
+    def getDagPath(self, index):
+        return MDagPath(self.names[index])
+
+
+class MFnMesh(object):
+
+    def __init__(self, dag_path):
+        self.name = dag_path.name
+        self.positions, self.normals, self.triangles = \
+            scene.meshes[dag_path.name]
+
+    @property
+    def numVertices(self):
+        return len(self.positions)
+
+    def getPoints(self, space):
+        return np.column_stack((self.positions,
+                                np.ones(len(self.positions))))
+
+    def getVertexNormals(self, angle_weighted, space):
+        return self.normals
+
+    def getTriangles(self):
+        return (np.full(len(self.triangles), 1), self.triangles.ravel())
+
+    def getVertices(self):
+        return (np.full(len(self.triangles), 3), self.triangles.ravel())
+
+    def getVertexColors(self, colorSet=""):
+        sets = scene.color_sets.get(self.name, {})
+        colors = sets.get(colorSet or sets.get(None))
+        if colors is None:
+            return np.full((self.numVertices, 4), -1.0)
+        return colors
+
+    def getUVs(self, uvSet=""):
+        uvs = scene.uvs[self.name]
+        return uvs[:, 0], uvs[:, 1]
+
+    def getAssignedUVs(self, uvSet=""):
+        return self.getVertices()
+
+
+class Path(type(pathlib.Path())):
+    """pymel's Path, as far as the tools use it"""
+
+    def makedirs_p(self):
+        self.mkdir(parents=True, exist_ok=True)
+
+
+_commands = _Cmds()
+
+
+def _scene_name():
+    return Path(_commands.file(query=True, sceneName=True))
+
+
+def _save_as(path, **flags):
+    _commands.file(rename=str(path))
+    return Path(_commands.file(save=True))
+
+
+def _rename_file(path):
+    return _commands.file(rename=str(path))
+
+
+def _open_file(path, **flags):
+    return _commands.file(str(path), open=True)
+
+
+def _module(name, **attrs):
+    module = types.ModuleType(name)
+    module.__dict__.update(attrs)
+    return module
+
+
+def install(workspace=None):
+    """Puts the fake modules into sys.modules and resets the scene.
+    Call it before importing scatter or smartsave. Returns the scene."""
+    scene.__init__(workspace)
+    cmds = _module("maya.cmds", **dict(
+        (name, getattr(_commands, name)) for name in dir(_commands)
+        if not name.startswith("_")))
+    om2 = _module("maya.api.OpenMaya", MSpace=MSpace,
+                  MSelectionList=MSelectionList, MFnMesh=MFnMesh,
+                  MDagPath=MDagPath)
+    api = _module("maya.api", OpenMaya=om2)
+    om1 = _module("maya.OpenMaya")
+    omfx = _module("maya.OpenMayaFX")
+    maya = _module("maya", cmds=cmds, api=api, OpenMaya=om1,
+                   OpenMayaFX=omfx)
+    system = _module("pymel.core.system", Path=Path, sceneName=_scene_name,
+                     saveAs=_save_as, renameFile=_rename_file,
+                     openFile=_open_file)
+    core = _module("pymel.core", system=system)
+    pymel = _module("pymel", core=core)
+    sys.modules.update({"maya": maya, "maya.cmds": cmds, "maya.api": api,
+                        "maya.api.OpenMaya": om2, "maya.OpenMaya": om1,
+                        "maya.OpenMayaFX": omfx, "pymel": pymel,
+                        "pymel.core": core, "pymel.core.system": system})
+    return scene
@@ -0,0 +1,129 @@
+"""Hammers one scenes folder with concurrent increment saves and checks
+that no two savers ever got the same version.
+
+Run with: python stress_version_reservation.py [--procs 200] [--saves 5]
+                                              [--stale 10]
+
+Every process reserves a version, writes its own token into that scene
+file and releases the reservation, the way SceneFile.increment_save
+does. Afterwards every claimed version must exist exactly once and hold
+the token of the process that claimed it. --stale leaves that many
+markers of a dead process on the first versions beforehand, so every
+saver races the others to take them over. --legacy runs the old
+next_avail_ver-then-save sequence instead, to show the collisions the
+reservations prevent."""
+import argparse
+import collections
+import multiprocessing
+import os
+import shutil
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), os.pardir, "src"))
+
+import versionindex
+
+DESCRIPTOR = "shot010"
+TASK = "anim"
+EXT = ".ma"
+
+
+def saver(folder, worker, saves, legacy, start_event, results):
+    index = versionindex.VersionIndex(folder, index_dir=None)
+    claimed = []
+    start_event.wait()
+    for save in range(saves):
+        if legacy:
+            index.rescan()
+            ver = index.latest(DESCRIPTOR, TASK, EXT) + 1
+        else:
+            ver = index.reserve(DESCRIPTOR, TASK, EXT)
+        token = "{}:{}".format(worker, save)
+        name = versionindex.scene_name(DESCRIPTOR, TASK, ver, EXT)
+        with open(os.path.join(folder, name), "w") as scene:
+            scene.write(token)
+        if not legacy:
+            index.release(DESCRIPTOR, TASK, EXT, ver)
+        claimed.append((ver, token))
+    results.put(claimed)
+
+
+def plant_stale_markers(folder, count):
+    """leaves count markers of a process that has exited on v001 up"""
+    process = subprocess.Popen([sys.executable, "-c", "pass"])
+    process.wait()
+    owner = "{} {} crashed".format(socket.gethostname(), process.pid)
+    for ver in range(1, count + 1):
+        name = versionindex.scene_name(DESCRIPTOR, TASK, ver, EXT)
+        with open(versionindex.reservation_path(folder, name), "w") as out:
+            out.write(owner)
+
+
+def check(folder, claims):
+    """returns a list of problems found in folder for the given claims"""
+    problems = []
+    by_ver = collections.defaultdict(list)
+    for ver, token in claims:
+        by_ver[ver].append(token)
+    for ver, tokens in sorted(by_ver.items()):
+        if len(tokens) > 1:
+            problems.append("v{:03d} claimed by {}".format(ver, tokens))
+        name = versionindex.scene_name(DESCRIPTOR, TASK, ver, EXT)
+        with open(os.path.join(folder, name)) as scene:
+            content = scene.read()
+        if content not in tokens:
+            problems.append("v{:03d} holds {!r}".format(ver, content))
+    leftovers = [name for name in os.listdir(folder)
+                 if versionindex.RESERVED_RE.match(name)]
+    if leftovers:
+        problems.append("{} reservation markers left".format(len(leftovers)))
+    return problems
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--procs", type=int, default=200)
+    parser.add_argument("--saves", type=int, default=5,
+                        help="increment saves per process")
+    parser.add_argument("--stale", type=int, default=0,
+                        help="stale markers to take over")
+    parser.add_argument("--legacy", action="store_true",
+                        help="look up the version without reserving it")
+    args = parser.parse_args(argv)
+    folder = tempfile.mkdtemp()
+    try:
+        plant_stale_markers(folder, args.stale)
+        start_event = multiprocessing.Event()
+        results = multiprocessing.Queue()
+        procs = [multiprocessing.Process(
+            target=saver, args=(folder, worker, args.saves, args.legacy,
+                                start_event, results))
+            for worker in range(args.procs)]
+        for proc in procs:
+            proc.start()
+        start = time.perf_counter()
+        start_event.set()
+        claims = []
+        for _ in procs:
+            claims.extend(results.get())
+        elapsed = time.perf_counter() - start
+        for proc in procs:
+            proc.join()
+        problems = check(folder, claims)
+        print("{} processes x {} saves in {:.2f} s, highest version "
+              "v{:03d}".format(args.procs, args.saves, elapsed,
+                               max(ver for ver, _ in claims)))
+        for problem in problems[:20]:
+            print("  " + problem)
+        print("{} problems".format(len(problems)))
+        return 1 if problems else 0
+    finally:
+        shutil.rmtree(folder)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,244 @@
+"""Deduplicating, content-addressed storage for scene versions.
+
+A saved scene is cut into content-defined chunks: a gear rolling hash
+over the last 32 bytes marks a cut wherever its top bits are zero, so
+an edit only moves the cuts next to it and successive versions share
+almost all their chunks. Chunks are stored once under their sha1 in a
+store folder, zlib compressed, and each version is reduced to a small
+JSON manifest, "<scene name>.chunks", listing its chunks in order.
+Any version can be rebuilt from its manifest.
+
+The rolling hash is computed with NumPy over whole blocks; only the
+cut candidates, about one per average chunk, are walked in Python."""
+import argparse
+import hashlib
+import json
+import logging
+import os
+import sys
+import uuid
+import zlib
+
+import lazyimport
+
+np = lazyimport.LazyModule("numpy")
+
+log = logging.getLogger(__name__)
+
+MANIFEST_EXT = ".chunks"
+STORE_DIRNAME = ".chunkstore"
+
+WINDOW = 32
+AVERAGE_BITS = 12
+MIN_CHUNK = 1024
+MAX_CHUNK = 32 * 1024
+BLOCK_SIZE = 8 * 1024 * 1024
+
+GEAR_SEED = 0x5fa
+
+_gear = None
+
+
+class ChunkStoreError(IOError):
+    """A chunk is missing or a rebuilt scene does not match its
+    manifest."""
+
+
+def manifest_path(scene_path):
+    """returns the manifest path that stands in for scene_path"""
+    return str(scene_path) + MANIFEST_EXT
+
+
+def gear_table():
+    """returns the fixed random byte table of the gear hash; changing it
+    changes every cut"""
+    global _gear
+    if _gear is None:
+        _gear = np.random.default_rng(GEAR_SEED).integers(
+            0, 2 ** 32, 256, dtype=np.uint32)
+    return _gear
+
+
+def gear_hashes(data):
+    """returns the (N,) uint32 gear hash of the WINDOW bytes ending at
+    every byte of data"""
+    hashes = gear_table()[np.frombuffer(data, dtype=np.uint8)]
+    # hashes over windows of 1, 2, 4, ... bytes: a window of 2w is the
+    # one of w ending here plus the one of w before it shifted up by w
+    width = 1
+    while width < WINDOW:
+        hashes[width:] += hashes[:-width] << np.uint32(width)
+        width *= 2
+    return hashes
+
+
+def cut_points(candidates, start, end, min_size=MIN_CHUNK,
+               max_size=MAX_CHUNK):
+    """Picks chunk ends from sorted candidate cuts between start and end,
+    skipping cuts closer than min_size and forcing one every max_size.
+    Returns the cuts; end is not included."""
+    cuts = []
+    last = start
+    for cut in candidates:
+        if cut - last < min_size:
+            continue
+        while cut - last > max_size:
+            last += max_size
+            cuts.append(last)
+        cuts.append(cut)
+        last = cut
+    while end - last > max_size:
+        last += max_size
+        cuts.append(last)
+    return cuts
+
+
+def iter_chunks(in_file, average_bits=AVERAGE_BITS, min_size=MIN_CHUNK,
+                max_size=MAX_CHUNK, block_size=BLOCK_SIZE):
+    """yields the content-defined chunks of a binary file object"""
+    # the top bits of a gear hash depend on all WINDOW bytes, the low
+    # ones only on the last few
+    limit = np.uint32(1 << (32 - average_bits))
+    context = b""
+    pending = b""
+    while True:
+        block = in_file.read(block_size)
+        data = pending + block
+        if not data:
+            return
+        hashes = gear_hashes(context + data)[len(context):]
+        candidates = np.flatnonzero(hashes < limit) + 1
+        cuts = cut_points(candidates.tolist(), 0, len(data), min_size,
+                          max_size)
+        last = 0
+        for cut in cuts:
+            yield data[last:cut]
+            last = cut
+        if not block:
+            if last < len(data):
+                yield data[last:]
+            return
+        context = data[max(0, last - WINDOW):last]
+        pending = data[last:]
+
+
+class ChunkStore(object):
+    """Chunks stored once by sha1, plus manifests that list them.
+
+    Chunks average 2 ** average_bits bytes, at least a quarter and at most
+    eight times that. Smaller chunks dedup scattered edits better but
+    mean more files in the store."""
+
+    def __init__(self, root, compress=True, average_bits=AVERAGE_BITS):
+        self.root = str(root)
+        self.compress = compress
+        self.average_bits = average_bits
+        self.bytes_in = 0
+        self.bytes_written = 0
+
+    def chunk_path(self, digest):
+        return os.path.join(self.root, "chunks", digest[:2], digest[2:])
+
+    def has_chunk(self, digest):
+        return os.path.exists(self.chunk_path(digest))
+
+    def put_chunk(self, chunk):
+        """stores a chunk unless it is there already, returns its sha1"""
+        digest = hashlib.sha1(chunk).hexdigest()
+        self.bytes_in += len(chunk)
+        path = self.chunk_path(digest)
+        if os.path.exists(path):
+            return digest
+        if not os.path.isdir(os.path.dirname(path)):
+            os.makedirs(os.path.dirname(path))
+        payload = zlib.compress(chunk, 1) if self.compress else chunk
+        tmp_path = "{}.{}.tmp".format(path, uuid.uuid4().hex)
+        with open(tmp_path, "wb") as out_file:
+            out_file.write(payload)
+        os.replace(tmp_path, path)
+        self.bytes_written += len(payload)
+        return digest
+
+    def get_chunk(self, digest):
+        try:
+            with open(self.chunk_path(digest), "rb") as in_file:
+                payload = in_file.read()
+        except (IOError, OSError):
+            raise ChunkStoreError("chunk {} is missing from {}".format(
+                digest, self.root))
+        if self.compress:
+            return zlib.decompress(payload)
+        return payload
+
+    def save(self, path, manifest_file):
+        """chunks the file at path into the store and writes its manifest
+        to manifest_file. Returns the manifest."""
+        sha = hashlib.sha1()
+        chunks = []
+        size = 0
+        with open(path, "rb") as in_file:
+            for chunk in iter_chunks(in_file, self.average_bits,
+                                     1 << (self.average_bits - 2),
+                                     1 << (self.average_bits + 3)):
+                sha.update(chunk)
+                size += len(chunk)
+                chunks.append([self.put_chunk(chunk), len(chunk)])
+        manifest = {"size": size, "sha1": sha.hexdigest(), "chunks": chunks}
+        tmp_path = "{}.{}.tmp".format(manifest_file, uuid.uuid4().hex)
+        with open(tmp_path, "w") as out_file:
+            json.dump(manifest, out_file, separators=(",", ":"))
+        os.replace(tmp_path, manifest_file)
+        return manifest
+
+    def restore(self, manifest_file, path):
+        """rebuilds the file a manifest describes at path"""
+        with open(manifest_file) as in_file:
+            manifest = json.load(in_file)
+        sha = hashlib.sha1()
+        tmp_path = "{}.{}.tmp".format(path, uuid.uuid4().hex)
+        try:
+            with open(tmp_path, "wb") as out_file:
+                for digest, _ in manifest["chunks"]:
+                    chunk = self.get_chunk(digest)
+                    sha.update(chunk)
+                    out_file.write(chunk)
+            if sha.hexdigest() != manifest["sha1"]:
+                raise ChunkStoreError("{} rebuilt from {} is corrupt".format(
+                    path, manifest_file))
+            os.replace(tmp_path, path)
+        finally:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+        return path
+
+
+def store_for(folder):
+    """returns the chunk store kept in a scenes folder"""
+    return ChunkStore(os.path.join(str(folder), STORE_DIRNAME))
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(
+        description="Store scenes as deduplicated chunks or rebuild them.")
+    parser.add_argument("action", choices=("save", "restore"))
+    parser.add_argument("scene", help="scene file to save or rebuild; "
+                                      "its manifest sits next to it")
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    logging.basicConfig(level=logging.INFO)
+    store = store_for(os.path.dirname(os.path.abspath(args.scene)))
+    if args.action == "save":
+        store.save(args.scene, manifest_path(args.scene))
+        log.info("stored %d bytes, %d new", store.bytes_in,
+                 store.bytes_written)
+    else:
+        store.restore(manifest_path(args.scene), args.scene)
+        log.info("rebuilt %s", args.scene)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
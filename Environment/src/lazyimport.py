@@ -0,0 +1,49 @@
+"""A module proxy that imports its module on first use.
+
+Tool modules bind their heavy dependencies at the top as usual, through
+LazyModule, so importing the tool costs nothing until Maya, Qt, NumPy
+or an optional package is actually needed:
+
+    cmds = lazyimport.LazyModule("maya.cmds")
+
+A module that isn't installed only raises ImportError when it is first
+used; loadable() checks up front."""
+import importlib
+
+
+class LazyModule(object):
+    """Imports the named module on first attribute access."""
+
+    def __init__(self, name):
+        self.__dict__["_name"] = name
+        self.__dict__["_module"] = None
+
+    def _load(self):
+        module = self.__dict__["_module"]
+        if module is None:
+            module = importlib.import_module(self.__dict__["_name"])
+            self.__dict__["_module"] = module
+        return module
+
+    def __getattr__(self, attr):
+        return getattr(self._load(), attr)
+
+    def __setattr__(self, attr, value):
+        setattr(self._load(), attr, value)
+
+    def __dir__(self):
+        return dir(self._load())
+
+    def __repr__(self):
+        state = "loaded" if self.__dict__["_module"] else "not loaded"
+        return "<lazy module {!r}, {}>".format(self.__dict__["_name"],
+                                                state)
+
+
+def loadable(lazy_module):
+    """whether a LazyModule can be imported, importing it if so"""
+    try:
+        lazy_module._load()
+    except ImportError:
+        return False
+    return True
@@ -0,0 +1,543 @@
+import logging
+import os
+import re
+
+import numpy as np
+
+import lazyimport
+
+om2 = lazyimport.LazyModule("maya.api.OpenMaya")
+
+log = logging.getLogger(__name__)
+
+COMPONENT_RE = re.compile(
+    r"^(?P<mesh>[^.]+)(?:\.vtx\[(?P<start>\d+|\*)(?::(?P<end>\d+))?\])?$")
+
+
+class VertexSelection(object):
+    """Selected vertices kept as integer index ranges per mesh.
+
+    Every mesh holds an (M,2) array of half-open [start, stop) ranges.
+    Vertices are addressed by a flat index running over all meshes in
+    order, which is what the sampler picks from."""
+
+    def __init__(self):
+        self.meshes = []
+        self.ranges = []
+
+    def add(self, mesh, start, stop):
+        """adds the vertices start to stop-1 of mesh"""
+        if mesh in self.meshes:
+            mesh_i = self.meshes.index(mesh)
+            self.ranges[mesh_i] = np.vstack((self.ranges[mesh_i],
+                                             (start, stop)))
+        else:
+            self.meshes.append(mesh)
+            self.ranges.append(np.array([(start, stop)], dtype=np.int64))
+
+    def __len__(self):
+        return int(sum((r[:, 1] - r[:, 0]).sum() for r in self.ranges))
+
+    def __str__(self):
+        names = []
+        for mesh, ranges in zip(self.meshes, self.ranges):
+            for start, stop in ranges:
+                if stop - start == 1:
+                    names.append("{}.vtx[{}]".format(mesh, start))
+                else:
+                    names.append("{}.vtx[{}:{}]".format(mesh, start,
+                                                        stop - 1))
+        return " ".join(names)
+
+    def mesh_offsets(self):
+        """returns where each mesh starts in the flat index space"""
+        counts = [int((r[:, 1] - r[:, 0]).sum()) for r in self.ranges]
+        return np.concatenate(([0], np.cumsum(counts)))
+
+    def split(self, flat=None):
+        """Maps flat indices, or every selected vertex when flat is None,
+        to per-mesh vertex indices.
+
+        Returns a list of (mesh, vertex indices, rows) where rows are the
+        positions of those vertices in flat."""
+        offsets = self.mesh_offsets()
+        if flat is None:
+            flat = np.arange(offsets[-1])
+        flat = np.asarray(flat, dtype=np.int64)
+        mesh_of = np.searchsorted(offsets, flat, side="right") - 1
+        result = []
+        for mesh_i, (mesh, ranges) in enumerate(zip(self.meshes,
+                                                    self.ranges)):
+            rows = np.flatnonzero(mesh_of == mesh_i)
+            if not rows.size:
+                continue
+            local = flat[rows] - offsets[mesh_i]
+            lengths = ranges[:, 1] - ranges[:, 0]
+            range_ends = np.cumsum(lengths)
+            range_of = np.searchsorted(range_ends, local, side="right")
+            verts = ranges[range_of, 0] + local - (range_ends - lengths)[
+                range_of]
+            result.append((mesh, verts, rows))
+        return result
+
+
+def parse_components(names, source):
+    """Builds a VertexSelection from compact component names such as
+    pCube1.vtx[0:99], pCube1.vtx[*] or plain mesh names. Maya's ranges
+    are inclusive, so vtx[0:99] is stored as [0, 100)."""
+    selection = VertexSelection()
+    for name in names:
+        match = COMPONENT_RE.match(name)
+        if not match:
+            raise ValueError("{} is not a vertex component".format(name))
+        mesh = match.group("mesh")
+        start = match.group("start")
+        if start is None or start == "*":
+            selection.add(mesh, 0, source.vertex_count(mesh))
+        else:
+            end = match.group("end") or start
+            selection.add(mesh, int(start), int(end) + 1)
+    return selection
+
+
+class MeshSource(object):
+    """Reads vertex positions and normals for whole meshes at once.
+
+    Subclasses implement vertex_count and mesh_points; fetch then serves
+    any selection with one bulk read per mesh."""
+
+    def vertex_count(self, mesh):
+        raise NotImplementedError
+
+    def mesh_points(self, mesh):
+        """returns (N,3) world positions and normals of every vertex"""
+        raise NotImplementedError
+
+    def mesh_triangles(self, mesh):
+        """returns the (T,3) vertex indices of the mesh's triangulation"""
+        raise NotImplementedError
+
+    def mesh_colors(self, mesh, color_set=None):
+        """returns (N,3) or (N,4) 0-1 vertex colours of color_set, or of
+        the current set"""
+        raise NotImplementedError
+
+    def mesh_uvs(self, mesh, uv_set=None):
+        """returns (N,2) UVs of every vertex from uv_set, or the current
+        set; a vertex on a seam gets one of its UVs"""
+        raise NotImplementedError
+
+    def mesh_vertex_map(self, mesh, name):
+        """returns the (N,) per-vertex values of the map called name"""
+        raise NotImplementedError
+
+    def fetch(self, selection, flat=None):
+        """Returns contiguous (K,3) float64 positions and normals for the
+        flat indices of selection, or for all of it when flat is None."""
+        count = len(selection) if flat is None else len(flat)
+        positions = np.empty((count, 3))
+        normals = np.empty((count, 3))
+        for mesh, verts, rows in selection.split(flat):
+            mesh_positions, mesh_normals = self.mesh_points(mesh)
+            positions[rows] = mesh_positions[verts]
+            normals[rows] = mesh_normals[verts]
+        return positions, normals
+
+    def fetch_values(self, selection, read, flat=None):
+        """Returns the rows of read(mesh), a (V,K) per-vertex array, for
+        the flat indices of selection, or for all of it, as (count,K),
+        with one read per mesh like fetch."""
+        count = len(selection) if flat is None else len(flat)
+        values = np.empty((count, 1))
+        for mesh, verts, rows in selection.split(flat):
+            mesh_values = read(mesh)
+            if values.shape[1:] != mesh_values.shape[1:]:
+                values = np.empty((count,) + mesh_values.shape[1:])
+            values[rows] = mesh_values[verts]
+        return values
+
+    def fetch_surface_values(self, selection, read):
+        """Returns read(mesh) of every selected mesh merged in the vertex
+        order of fetch_surface, so its triangles index them too."""
+        values = [read(mesh) for mesh in selection.meshes]
+        if not values:
+            return np.empty((0, 1))
+        return np.concatenate(values)
+
+    def fetch_surface(self, selection):
+        """Returns positions, normals and triangles of the selected part of
+        every mesh, merged into one indexed triangle soup. A triangle is
+        kept when all three of its vertices are selected."""
+        all_positions = []
+        all_normals = []
+        all_triangles = []
+        offset = 0
+        for mesh, ranges in zip(selection.meshes, selection.ranges):
+            positions, normals = self.mesh_points(mesh)
+            triangles = self.mesh_triangles(mesh)
+            selected = np.zeros(len(positions), dtype=bool)
+            for start, stop in ranges:
+                selected[start:stop] = True
+            triangles = triangles[selected[triangles].all(axis=1)]
+            all_positions.append(positions)
+            all_normals.append(normals)
+            all_triangles.append(triangles + offset)
+            offset += len(positions)
+        if not all_positions:
+            return np.empty((0, 3)), np.empty((0, 3)), np.empty(
+                (0, 3), dtype=np.int64)
+        return (np.concatenate(all_positions), np.concatenate(all_normals),
+                np.concatenate(all_triangles))
+
+
+class MayaMeshSource(MeshSource):
+    """Reads meshes with MFnMesh.getPoints/getVertexNormals."""
+
+    def __init__(self):
+        if not lazyimport.loadable(om2):
+            raise RuntimeError("MayaMeshSource needs maya.api.OpenMaya")
+
+    @staticmethod
+    def _mesh_fn(mesh):
+        sel = om2.MSelectionList()
+        sel.add(mesh)
+        return om2.MFnMesh(sel.getDagPath(0))
+
+    def vertex_count(self, mesh):
+        return self._mesh_fn(mesh).numVertices
+
+    def mesh_points(self, mesh):
+        mesh_fn = self._mesh_fn(mesh)
+        positions = np.array(mesh_fn.getPoints(om2.MSpace.kWorld))[:, :3]
+        normals = np.array(mesh_fn.getVertexNormals(False,
+                                                    om2.MSpace.kWorld))
+        return (np.ascontiguousarray(positions, dtype=np.float64),
+                np.ascontiguousarray(normals, dtype=np.float64))
+
+    def mesh_triangles(self, mesh):
+        counts, vertices = self._mesh_fn(mesh).getTriangles()
+        return np.array(vertices, dtype=np.int64).reshape(-1, 3)
+
+    def mesh_colors(self, mesh, color_set=None):
+        """unpainted vertices come back as -1, which reads as black"""
+        mesh_fn = self._mesh_fn(mesh)
+        if color_set:
+            colors = mesh_fn.getVertexColors(color_set)
+        else:
+            colors = mesh_fn.getVertexColors()
+        return np.array(colors, dtype=np.float64).reshape(-1, 4)
+
+    def mesh_uvs(self, mesh, uv_set=None):
+        mesh_fn = self._mesh_fn(mesh)
+        args = (uv_set,) if uv_set else ()
+        u, v = mesh_fn.getUVs(*args)
+        uv_counts, uv_ids = mesh_fn.getAssignedUVs(*args)
+        vert_counts, vert_ids = mesh_fn.getVertices()
+        # faces without UVs list no UV ids, so line the rest up with the
+        # face vertices they belong to
+        has_uvs = np.repeat(np.array(uv_counts) > 0, np.array(vert_counts))
+        uvs = np.zeros((mesh_fn.numVertices, 2))
+        uvs[np.array(vert_ids, dtype=np.int64)[has_uvs]] = np.column_stack(
+            (np.array(u), np.array(v)))[np.array(uv_ids, dtype=np.int64)]
+        return uvs
+
+    def mesh_vertex_map(self, mesh, name):
+        """Maya keeps painted per-vertex values in colour sets, so a map
+        is the red channel of the colour set called name"""
+        return self.mesh_colors(mesh, name)[:, 0]
+
+
+class ArrayMeshSource(MeshSource):
+    """Serves meshes held in memory as name -> (positions, normals), with
+    optional name -> (T,3) triangles for surface sampling.
+
+    vertex_data maps a name to a dict of per-vertex arrays: "colors",
+    "uvs" and any other named colour sets, UV sets or value maps."""
+
+    def __init__(self, meshes=None, triangles=None, vertex_data=None):
+        self.meshes = dict(meshes or {})
+        self.triangles = dict(triangles or {})
+        self.vertex_data = dict(vertex_data or {})
+
+    def vertex_count(self, mesh):
+        return len(self.meshes[mesh][0])
+
+    def mesh_points(self, mesh):
+        return self.meshes[mesh]
+
+    def mesh_triangles(self, mesh):
+        return self.triangles.get(mesh, np.empty((0, 3), dtype=np.int64))
+
+    def _vertex_data(self, mesh, name):
+        data = self.vertex_data.get(mesh, {})
+        if name not in data:
+            raise ValueError("{} has no vertex data {!r}".format(mesh, name))
+        return np.asarray(data[name], dtype=np.float64)
+
+    def mesh_colors(self, mesh, color_set=None):
+        return self._vertex_data(mesh, color_set or "colors")
+
+    def mesh_uvs(self, mesh, uv_set=None):
+        return self._vertex_data(mesh, uv_set or "uvs")
+
+    def mesh_vertex_map(self, mesh, name):
+        return self._vertex_data(mesh, name)
+
+
+class FileMeshSource(ArrayMeshSource):
+    """Stand-in for a Maya mesh read from disk, named after the file.
+
+    Reads .npz dumps holding positions and normals arrays, .npy dumps of
+    (N,3) positions or (N,6) positions and normals, and OBJ or PLY
+    meshes, with whatever vertex colours, UVs and value maps they
+    carry."""
+
+    def __init__(self, path):
+        super(FileMeshSource, self).__init__()
+        self.path = path
+        self.name = os.path.splitext(os.path.basename(path))[0]
+        positions, normals, triangles, vertex_data = read_mesh_file(path)
+        self.meshes[self.name] = (
+            np.ascontiguousarray(positions, dtype=np.float64),
+            np.ascontiguousarray(normals, dtype=np.float64))
+        self.triangles[self.name] = triangles
+        self.vertex_data[self.name] = vertex_data
+
+
+def save_mesh_npz(path, positions, normals, triangles=None,
+                  vertex_data=None):
+    """writes a mesh that FileMeshSource can read, plus vertex_data, a
+    dict of named per-vertex arrays such as colors and uvs"""
+    if triangles is None:
+        triangles = no_triangles()
+    np.savez(path, positions=np.asarray(positions, dtype=np.float64),
+             normals=np.asarray(normals, dtype=np.float64),
+             triangles=np.asarray(triangles, dtype=np.int64),
+             **dict(vertex_data or {}))
+
+
+def read_mesh_file(path):
+    """returns (positions, normals, triangles, vertex_data) from any file
+    FileMeshSource reads"""
+    ext = os.path.splitext(path)[1].lower()
+    if ext == ".npz":
+        with np.load(path) as data:
+            triangles = no_triangles()
+            if "triangles" in data:
+                triangles = data["triangles"]
+            vertex_data = dict(
+                (name, data[name]) for name in data.files
+                if name not in ("positions", "normals", "triangles"))
+            return data["positions"], data["normals"], triangles, \
+                vertex_data
+    if ext == ".npy":
+        data = np.load(path)
+        if data.shape[1] == 6:
+            return data[:, :3], data[:, 3:], no_triangles(), {}
+        return data, up_normals(len(data)), no_triangles(), {}
+    if ext == ".obj":
+        return read_obj(path)
+    if ext == ".ply":
+        return read_ply(path)
+    raise ValueError("unsupported mesh file {}".format(path))
+
+
+def no_triangles():
+    return np.empty((0, 3), dtype=np.int64)
+
+
+def up_normals(count):
+    """returns count +Y normals for meshes that carry none"""
+    return np.tile((0.0, 1.0, 0.0), (count, 1))
+
+
+def fan_triangles(faces):
+    """splits polygons given as index lists into an (T,3) triangle array"""
+    triangles = [(face[0], face[i], face[i + 1])
+                 for face in faces for i in range(1, len(face) - 1)]
+    return np.array(triangles, dtype=np.int64).reshape(-1, 3)
+
+
+def vertex_normals(positions, triangles):
+    """Averages area-weighted face normals onto the vertices, falling
+    back to +Y for vertices no triangle touches."""
+    corners = positions[triangles]
+    face_normals = np.cross(corners[:, 1] - corners[:, 0],
+                            corners[:, 2] - corners[:, 0])
+    normals = np.zeros_like(positions)
+    for corner in range(3):
+        np.add.at(normals, triangles[:, corner], face_normals)
+    lengths = np.linalg.norm(normals, axis=1)
+    unused = lengths == 0
+    normals[unused] = (0.0, 1.0, 0.0)
+    lengths[unused] = 1.0
+    return normals / lengths[:, np.newaxis]
+
+
+def read_obj(path):
+    """Reads positions, per-vertex normals, triangles and vertex data
+    from a Wavefront OBJ.
+
+    Normals referenced by faces are averaged per vertex. Without any, they
+    are computed from the faces. Colours written after a vertex position
+    become "colors" and texture coordinates referenced by faces "uvs"."""
+    positions = []
+    colors = []
+    file_normals = []
+    file_uvs = []
+    faces = []
+    face_normals = []
+    face_uvs = []
+    with open(path) as obj_file:
+        for line in obj_file:
+            fields = line.split()
+            if not fields:
+                continue
+            if fields[0] == "v":
+                positions.append([float(x) for x in fields[1:4]])
+                colors.append([float(x) for x in fields[4:7]])
+            elif fields[0] == "vn":
+                file_normals.append([float(x) for x in fields[1:4]])
+            elif fields[0] == "vt":
+                file_uvs.append([float(x) for x in fields[1:3]])
+            elif fields[0] == "f":
+                corners = [corner.split("/") for corner in fields[1:]]
+                faces.append([int(c[0]) for c in corners])
+                face_uvs.append([int(c[1]) if len(c) > 1 and c[1]
+                                 else 0 for c in corners])
+                face_normals.append([int(c[2]) if len(c) > 2 and c[2]
+                                     else 0 for c in corners])
+    positions = np.array(positions, dtype=np.float64).reshape(-1, 3)
+    faces = [[i - 1 if i > 0 else len(positions) + i for i in face]
+             for face in faces]
+    triangles = fan_triangles(faces)
+    vertex_data = {}
+    if colors and all(len(color) == 3 for color in colors):
+        vertex_data["colors"] = np.array(colors, dtype=np.float64)
+    if file_uvs and all(all(face) for face in face_uvs):
+        file_uvs = np.array(file_uvs, dtype=np.float64)
+        uvs = np.zeros((len(positions), 2))
+        uvs[[i for face in faces for i in face]] = file_uvs[
+            [i - 1 if i > 0 else len(file_uvs) + i
+             for face in face_uvs for i in face]]
+        vertex_data["uvs"] = uvs
+    if file_normals and all(all(face) for face in face_normals):
+        file_normals = np.array(file_normals, dtype=np.float64)
+        vert_ids = np.array([i for face in faces for i in face])
+        normal_ids = np.array([i - 1 if i > 0 else len(file_normals) + i
+                               for face in face_normals for i in face])
+        normals = np.zeros_like(positions)
+        np.add.at(normals, vert_ids, file_normals[normal_ids])
+        lengths = np.linalg.norm(normals, axis=1)
+        lengths[lengths == 0] = 1.0
+        normals = normals / lengths[:, np.newaxis]
+    elif faces:
+        normals = vertex_normals(positions, triangles)
+    else:
+        normals = up_normals(len(positions))
+    return positions, normals, triangles, vertex_data
+
+
+PLY_TYPES = {"char": "i1", "int8": "i1", "uchar": "u1", "uint8": "u1",
+             "short": "i2", "int16": "i2", "ushort": "u2", "uint16": "u2",
+             "int": "i4", "int32": "i4", "uint": "u4", "uint32": "u4",
+             "float": "f4", "float32": "f4", "double": "f8",
+             "float64": "f8"}
+
+
+def read_ply(path):
+    """Reads positions, normals, triangles and vertex data from an ASCII
+    or binary PLY.
+
+    Normals come from nx/ny/nz vertex properties, or are computed from
+    the faces when those are missing. red/green/blue(/alpha) become
+    0-1 "colors", u/v or s/t "uvs", and every other vertex property a
+    value map of its own name."""
+    with open(path, "rb") as ply_file:
+        if ply_file.readline().strip() != b"ply":
+            raise ValueError("{} is not a PLY file".format(path))
+        fmt = None
+        elements = []
+        while True:
+            fields = ply_file.readline().decode("ascii").split()
+            if not fields or fields[0] == "end_header":
+                break
+            if fields[0] == "format":
+                fmt = fields[1]
+            elif fields[0] == "element":
+                elements.append((fields[1], int(fields[2]), []))
+            elif fields[0] == "property":
+                elements[-1][2].append(fields[1:])
+        body = ply_file.read()
+    order = {"binary_little_endian": "<", "binary_big_endian": ">"}
+    data = {}
+    offset = 0
+    lines = body.decode("ascii").splitlines() if fmt == "ascii" else None
+    for name, count, props in elements:
+        is_list = any(prop[0] == "list" for prop in props)
+        if fmt == "ascii":
+            rows = [line.split() for line in lines[offset:offset + count]]
+            offset += count
+            if is_list:
+                data[name] = [[int(x) for x in row[1:]] for row in rows]
+            else:
+                data[name] = np.array(rows, dtype=np.float64).reshape(
+                    count, len(props))
+        elif is_list:
+            count_type, index_type = (order[fmt] + PLY_TYPES[props[0][1]],
+                                      order[fmt] + PLY_TYPES[props[0][2]])
+            count_size = np.dtype(count_type).itemsize
+            index_size = np.dtype(index_type).itemsize
+            faces = []
+            for i in range(count):
+                corners = int(np.frombuffer(body, count_type, 1, offset)[0])
+                offset += count_size
+                faces.append(np.frombuffer(body, index_type, corners,
+                                           offset).tolist())
+                offset += corners * index_size
+            data[name] = faces
+        else:
+            dtype = np.dtype([(prop[1], order[fmt] + PLY_TYPES[prop[0]])
+                              for prop in props])
+            rows = np.frombuffer(body, dtype, count, offset)
+            offset += count * dtype.itemsize
+            data[name] = np.stack([rows[prop[1]].astype(np.float64)
+                                   for prop in props], axis=1)
+        if name == "vertex":
+            data["vertex_props"] = [prop[-1] for prop in props]
+            data["vertex_types"] = [prop[0] for prop in props]
+    columns = data["vertex_props"]
+    vertices = data["vertex"]
+    positions = vertices[:, [columns.index(axis) for axis in "xyz"]]
+    triangles = fan_triangles(data.get("face", []))
+    used = set("xyz")
+    if all(axis in columns for axis in ("nx", "ny", "nz")):
+        normals = vertices[:, [columns.index(axis)
+                               for axis in ("nx", "ny", "nz")]]
+        used.update(("nx", "ny", "nz"))
+    elif len(triangles):
+        normals = vertex_normals(positions, triangles)
+    else:
+        normals = up_normals(len(positions))
+    vertex_data = {}
+    channels = [channel for channel in ("red", "green", "blue", "alpha")
+                if channel in columns]
+    if channels[:3] == ["red", "green", "blue"]:
+        ply_type = PLY_TYPES[data["vertex_types"][columns.index("red")]]
+        scale = 1.0
+        if np.dtype(ply_type).kind in "iu":
+            scale = float(np.iinfo(ply_type).max)
+        vertex_data["colors"] = vertices[:, [columns.index(channel)
+                                             for channel in channels]] / scale
+        used.update(channels)
+    for u_name, v_name in (("u", "v"), ("s", "t"),
+                           ("texture_u", "texture_v")):
+        if u_name in columns and v_name in columns:
+            vertex_data["uvs"] = vertices[:, [columns.index(u_name),
+                                              columns.index(v_name)]]
+            used.update((u_name, v_name))
+            break
+    for column, name in enumerate(columns):
+        if name not in used:
+            vertex_data[name] = vertices[:, column]
+    return positions, normals, triangles, vertex_data
@@ -0,0 +1,175 @@
+"""Compiled naming templates for scene file names.
+
+A template such as "{descriptor}_{task}_v{ver:03d}{ext}" is compiled once
+into an anchored regex for parsing and a printf-style string for
+formatting, instead of splitting on "_" and rebuilding a str.format
+pattern on every call. Fields are matched by FIELD_PATTERNS; the
+descriptor takes whatever the fields after it leave, so it may contain
+underscores as long as they can't. Fields whose pattern matches an empty
+string, like the compression suffix, are optional and format as "" when
+left out.
+
+parse_many parses a whole library of names in one regex pass over the
+joined names and returns a NameTable: one NumPy column per field, with
+text stored as integer codes into a list of distinct values."""
+import logging
+import os
+import re
+import string
+
+import lazyimport
+
+np = lazyimport.LazyModule("numpy")
+
+log = logging.getLogger(__name__)
+
+COMPRESSION_EXTS = (".gz", ".zst")
+
+FIELD_PATTERNS = {
+    "descriptor": r".+?",
+    "task": r"[^_]+",
+    "ver": r"\d+",
+    "ext": r"\.\w+",
+    "compression": r"(?:{})?".format(
+        "|".join(re.escape(ext) for ext in COMPRESSION_EXTS)),
+}
+DEFAULT_FIELD_PATTERN = r"[^_]+"
+
+INT_SPEC_RE = re.compile(r"^0?\d*d$")
+
+
+class NamingTemplate(object):
+    """A file name pattern compiled for fast parsing and formatting."""
+
+    def __init__(self, pattern, field_patterns=None):
+        self.pattern = pattern
+        self.fields = []
+        self.int_fields = set()
+        self.defaults = {}
+        patterns = dict(FIELD_PATTERNS, **(field_patterns or {}))
+        regex = []
+        printf = []
+        printf_ok = True
+        for literal, field, spec, conversion in \
+                string.Formatter().parse(pattern):
+            regex.append(re.escape(literal))
+            printf.append(literal.replace("%", "%%"))
+            if field is None:
+                continue
+            if not field or field in self.fields or conversion:
+                raise ValueError("unsupported field {!r} in {}".format(
+                    field, pattern))
+            self.fields.append(field)
+            if spec and spec.endswith("d"):
+                self.int_fields.add(field)
+            field_pattern = patterns.get(field, DEFAULT_FIELD_PATTERN)
+            if re.match("^(?:{})$".format(field_pattern), ""):
+                self.defaults[field] = ""
+            regex.append("(?P<{}>{})".format(field, field_pattern))
+            if not spec:
+                printf.append("%({})s".format(field))
+            elif INT_SPEC_RE.match(spec):
+                printf.append("%({}){}".format(field, spec))
+            else:
+                printf_ok = False
+        self.body = "".join(regex)
+        self.regex = re.compile("^{}$".format(self.body))
+        self._printf = "".join(printf) if printf_ok else None
+
+    def __repr__(self):
+        return "NamingTemplate({!r})".format(self.pattern)
+
+    def format(self, **fields):
+        """returns the name for the given field values"""
+        if self.defaults:
+            fields = dict(self.defaults, **fields)
+        if self._printf is not None:
+            return self._printf % fields
+        return self.pattern.format(**fields)
+
+    def parse(self, name):
+        """returns a dict of field values for name, or None if it doesn't
+        match. Only the base name of a path is looked at."""
+        match = self.regex.match(os.path.basename(str(name)))
+        if not match:
+            return None
+        fields = match.groupdict()
+        for field in self.int_fields:
+            fields[field] = int(fields[field])
+        return fields
+
+    def parse_many(self, paths):
+        """parses many paths at once into a NameTable"""
+        joined = "\n".join(str(path) for path in paths).replace("\\", "/")
+        # every line either matches the template or falls through to .*,
+        # which leaves all the fields empty; fields never match empty
+        lines = re.compile("^([^\n]*/)?(?:{}|.*)$".format(self.body),
+                           re.MULTILINE)
+        rows = lines.findall(joined) if joined else []
+        columns = list(zip(*rows)) or [()] * (len(self.fields) + 1)
+        # str to bool casts parse the text as a number before NumPy 2
+        valid = np.array([bool(value) for value in columns[1]], dtype=bool)
+        table = NameTable(len(rows), valid)
+        table.add_text("folder", [folder[:-1] for folder in columns[0]])
+        for field, values in zip(self.fields, columns[1:]):
+            if field in self.int_fields:
+                numbers = np.full(len(rows), -1, dtype=np.int64)
+                numbers[valid] = [int(value) for value, matched
+                                  in zip(values, valid) if matched]
+                table.columns[field] = numbers
+            else:
+                table.add_text(field, values)
+        return table
+
+
+class NameTable(object):
+    """Columns of parsed names. Text columns hold int32 codes into
+    categories[field]; int columns hold the numbers, -1 where a name
+    didn't match (see valid)."""
+
+    def __init__(self, length, valid):
+        self.length = length
+        self.valid = valid
+        self.columns = {}
+        self.categories = {}
+
+    def __len__(self):
+        return self.length
+
+    def add_text(self, field, values):
+        lookup = {}
+        codes = [lookup.setdefault(value, len(lookup)) for value in values]
+        self.categories[field] = list(lookup)
+        self.columns[field] = np.array(codes, dtype=np.int32)
+
+    def values(self, field):
+        """returns a column decoded back to its values"""
+        if field not in self.categories:
+            return self.columns[field]
+        return np.array(self.categories[field],
+                        dtype=object)[self.columns[field]]
+
+    def code(self, field, value):
+        """returns the code of a text value, -1 if no name has it"""
+        try:
+            return self.categories[field].index(value)
+        except ValueError:
+            return -1
+
+    def row(self, index):
+        """returns the fields of one name as a dict, None if it didn't
+        match"""
+        if not self.valid[index]:
+            return None
+        fields = {}
+        for field, column in self.columns.items():
+            value = column[index]
+            if field in self.categories:
+                fields[field] = self.categories[field][value]
+            else:
+                fields[field] = int(value)
+        return fields
+
+
+SCENE_TEMPLATE = NamingTemplate(
+    "{descriptor}_{task}_v{ver:03d}{ext}{compression}")
@@ -0,0 +1,164 @@
+"""Staged scene saves: write to fast local scratch, publish in the
+background.
+
+Maya only blocks for as long as it takes to write the scene to local
+disk. A worker thread then copies it to its real destination under a
+temporary name, checks the copy against the checksum of the scratch
+file and renames it into place, so a half-written scene never shows up
+under its final name."""
+import hashlib
+import logging
+import os
+import tempfile
+import threading
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+log = logging.getLogger(__name__)
+
+CHUNK_SIZE = 8 * 1024 * 1024
+
+SCRATCH_DIR = os.path.join(tempfile.gettempdir(), "sfa_scripts_scratch")
+
+
+class ChecksumError(IOError):
+    """The published copy does not match the scratch file."""
+
+
+def file_checksum(path, chunk_size=CHUNK_SIZE):
+    """returns the sha1 hex digest of a file, read in chunks"""
+    sha = hashlib.sha1()
+    with open(path, "rb") as in_file:
+        for chunk in iter(lambda: in_file.read(chunk_size), b""):
+            sha.update(chunk)
+    return sha.hexdigest()
+
+
+class StagedSave(object):
+    """One scene on its way from scratch to its destination."""
+
+    PENDING = "pending"
+    COPYING = "copying"
+    VERIFYING = "verifying"
+    DONE = "done"
+    FAILED = "failed"
+
+    def __init__(self, scratch_path, dest_path):
+        self.scratch_path = str(scratch_path)
+        self.dest_path = str(dest_path)
+        self.state = self.PENDING
+        self.total_bytes = 0
+        self.copied_bytes = 0
+        self.checksum = None
+        self.error = None
+
+    @property
+    def progress(self):
+        """returns how far the copy is, from 0 to 1"""
+        if self.state == self.DONE:
+            return 1.0
+        if not self.total_bytes:
+            return 0.0
+        return float(self.copied_bytes) / self.total_bytes
+
+    def run(self, chunk_size=CHUNK_SIZE):
+        """copies, verifies and renames into place, then drops scratch"""
+        dest_dir = os.path.dirname(self.dest_path)
+        tmp_path = os.path.join(dest_dir, ".{}.{}.tmp".format(
+            os.path.basename(self.dest_path), uuid.uuid4().hex))
+        try:
+            if not os.path.isdir(dest_dir):
+                log.warning("missing directories in path. Creating "
+                            "folders...")
+                os.makedirs(dest_dir)
+            self.total_bytes = os.path.getsize(self.scratch_path)
+            self.state = self.COPYING
+            sha = hashlib.sha1()
+            with open(self.scratch_path, "rb") as in_file, \
+                    open(tmp_path, "wb") as out_file:
+                for chunk in iter(lambda: in_file.read(chunk_size), b""):
+                    sha.update(chunk)
+                    out_file.write(chunk)
+                    self.copied_bytes += len(chunk)
+                out_file.flush()
+                os.fsync(out_file.fileno())
+            self.checksum = sha.hexdigest()
+            self.state = self.VERIFYING
+            if file_checksum(tmp_path, chunk_size) != self.checksum:
+                raise ChecksumError("copy of {} to {} is corrupt".format(
+                    self.scratch_path, self.dest_path))
+            os.replace(tmp_path, self.dest_path)
+            os.remove(self.scratch_path)
+            self.state = self.DONE
+        except Exception as err:
+            self.state = self.FAILED
+            self.error = err
+            log.error("publishing %s failed, the scene is still in %s: %s",
+                      self.dest_path, self.scratch_path, err)
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+        return self.dest_path
+
+
+class SavePipeline(object):
+    """Publishes staged saves on one worker thread, in submission order."""
+
+    def __init__(self, scratch_dir=SCRATCH_DIR):
+        self.scratch_dir = scratch_dir
+        self.saves = []
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=1)
+
+    def scratch_path_for(self, dest_path):
+        """returns a unique local path to write dest_path's scene to"""
+        if not os.path.isdir(self.scratch_dir):
+            os.makedirs(self.scratch_dir)
+        return os.path.join(self.scratch_dir, "{}_{}".format(
+            uuid.uuid4().hex[:8], os.path.basename(str(dest_path))))
+
+    def submit(self, scratch_path, dest_path, on_done=None):
+        """Queues scratch_path for publishing to dest_path. on_done is
+        called on the worker thread with the StagedSave once it is in
+        place or has failed, its state says which. Returns a future
+        resolving to the destination path."""
+        staged = StagedSave(scratch_path, dest_path)
+        with self._lock:
+            self.saves.append(staged)
+
+        def publish():
+            try:
+                return staged.run()
+            finally:
+                if on_done is not None:
+                    on_done(staged)
+
+        return self._executor.submit(publish)
+
+    def pending(self):
+        """returns the saves that are not finished yet"""
+        with self._lock:
+            return [staged for staged in self.saves
+                    if staged.state not in (StagedSave.DONE,
+                                            StagedSave.FAILED)]
+
+    def progress(self):
+        """returns (bytes copied, bytes total) over the pending saves"""
+        pending = self.pending()
+        return (sum(staged.copied_bytes for staged in pending),
+                sum(staged.total_bytes for staged in pending))
+
+    def forget_finished(self):
+        """drops finished saves, returning the ones that failed"""
+        with self._lock:
+            failed = [staged for staged in self.saves
+                      if staged.state == StagedSave.FAILED]
+            self.saves = [staged for staged in self.saves
+                          if staged.state not in (StagedSave.DONE,
+                                                  StagedSave.FAILED)]
+        return failed
+
+    def wait(self):
+        """blocks until everything queued so far is published"""
+        self._executor.submit(lambda: None).result()
+
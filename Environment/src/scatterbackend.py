@@ -0,0 +1,263 @@
+import itertools
+import logging
+import os
+
+import numpy as np
+
+import lazyimport
+import scattercore
+
+oM = lazyimport.LazyModule("maya.OpenMaya")
+oFX = lazyimport.LazyModule("maya.OpenMayaFX")
+cmds = lazyimport.LazyModule("maya.cmds")
+
+log = logging.getLogger(__name__)
+
+# matrices, and the nodes to adopt, waiting for a scatterInstances
+# call, by key; a command can only take strings and numbers, so the
+# arrays are handed over here
+_pending_matrices = {}
+_pending_names = {}
+_pending_keys = itertools.count(1)
+
+
+def stash_matrices(matrices, names=None):
+    """keeps an (N,4,4) matrix array, and the names of the nodes it
+    places when they exist already, for scatterInstances, returns its
+    key"""
+    key = "scatter{}".format(next(_pending_keys))
+    _pending_matrices[key] = np.ascontiguousarray(matrices,
+                                                  dtype=np.float64)
+    if names is not None:
+        _pending_names[key] = list(names)
+    return key
+
+
+def take_matrices(key):
+    """returns and forgets the matrices stashed under key"""
+    return _pending_matrices.pop(key)
+
+
+def take_names(key):
+    """returns and forgets the node names stashed under key, None when
+    there are none"""
+    return _pending_names.pop(key, None)
+
+
+class ScatterBackend(object):
+    """Writes scatter instances into a scene.
+
+    Scatter computes every transform up front and then hands them to a
+    backend, so the compute half never talks to Maya. BATCHED backends
+    can be handed the matrices a slice at a time. ADOPTS backends can
+    put nodes they wrote with the undo queue paused on it afterwards as
+    one undoable step, with adopt()."""
+
+    BATCHED = True
+    ADOPTS = False
+
+    def scatter(self, source, matrices):
+        """Writes one instance of source per (4,4) matrix and returns the
+        names of the nodes created."""
+        instances = self.create_instances(source, len(matrices))
+        self.apply_transforms(instances, matrices)
+        return instances
+
+    def create_instances(self, source, count):
+        """creates count instances of source and returns their names"""
+        raise NotImplementedError
+
+    def apply_transforms(self, instances, matrices):
+        """sets each instance's transform from an (N,4,4) matrix array"""
+        raise NotImplementedError
+
+    def adopt(self, source, instances, matrices):
+        """records instances of source already in the scene, placed by
+        matrices, as one undoable step"""
+        raise NotImplementedError
+
+
+class ApiBackend(ScatterBackend):
+    """Maya backend that goes through OpenMaya instead of maya.cmds.
+    Its nodes don't go on the undo queue; CommandBackend's do."""
+
+    def __init__(self):
+        if not lazyimport.loadable(oM):
+            raise RuntimeError("ApiBackend needs maya.OpenMaya")
+
+    @staticmethod
+    def _dag_path(name):
+        sel = oM.MSelectionList()
+        sel.add(name)
+        dag_path = oM.MDagPath()
+        sel.getDagPath(0, dag_path)
+        return dag_path
+
+    def create_instances(self, source, count):
+        source_fn = oM.MFnDagNode(self._dag_path(source))
+        instances = []
+        for i in range(count):
+            new_obj = source_fn.duplicate(True)
+            instances.append(oM.MFnDagNode(new_obj).partialPathName())
+        return instances
+
+    def apply_transforms(self, instances, matrices):
+        for name, matrix in zip(instances, matrices):
+            mmatrix = oM.MMatrix()
+            oM.MScriptUtil.createMatrixFromList(matrix.ravel().tolist(),
+                                                mmatrix)
+            transform_fn = oM.MFnTransform(self._dag_path(name))
+            transform_fn.set(oM.MTransformationMatrix(mmatrix))
+
+
+class CommandBackend(ScatterBackend):
+    """Maya backend on the scatterInstances plug-in command.
+
+    Each scatter call is one undoable command holding its matrices as a
+    compact array, so undo and redo of a scatter take about as long as
+    the scatter, instead of walking a handful of undo records per
+    instance."""
+
+    PLUGIN = os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                          "scattercmd.py")
+    ADOPTS = True
+
+    def __init__(self):
+        if not lazyimport.loadable(cmds):
+            raise RuntimeError("CommandBackend needs maya.cmds")
+        if not cmds.pluginInfo("scattercmd", query=True, loaded=True):
+            cmds.loadPlugin(self.PLUGIN, quiet=True)
+
+    def scatter(self, source, matrices):
+        key = stash_matrices(matrices)
+        try:
+            return list(cmds.scatterInstances(source, key) or [])
+        finally:
+            _pending_matrices.pop(key, None)
+
+    def adopt(self, source, instances, matrices):
+        key = stash_matrices(matrices, instances)
+        try:
+            cmds.scatterInstances(source, key, adopt=True)
+        finally:
+            _pending_matrices.pop(key, None)
+            _pending_names.pop(key, None)
+
+
+class FakeSceneBackend(ScatterBackend):
+    """In-memory scene for exercising the scatter without Maya.
+
+    Created instances and their matrices are kept on the object for
+    inspection."""
+
+    def __init__(self):
+        self.instances = []
+        self.matrices = {}
+
+    def create_instances(self, source, count):
+        start = len(self.instances)
+        names = ["{}_instance{}".format(source, start + i + 1)
+                 for i in range(count)]
+        self.instances.extend(names)
+        return names
+
+    def apply_transforms(self, instances, matrices):
+        for name, matrix in zip(instances, matrices):
+            self.matrices[name] = np.array(matrix)
+
+
+def _vector_array(rows):
+    array = oM.MVectorArray()
+    array.setLength(len(rows))
+    for i, (x, y, z) in enumerate(rows.tolist()):
+        array.set(oM.MVector(x, y, z), i)
+    return array
+
+
+def _numpy_vectors(array):
+    return np.array([(array[i].x, array[i].y, array[i].z)
+                     for i in range(array.length())]).reshape(-1, 3)
+
+
+class InstancerBackend(ScatterBackend):
+    """Puts the whole scatter on one particle system driving a single
+    instancer node, instead of one transform per instance.
+
+    Positions, xyz Euler rotations and scales are stored as per-particle
+    arrays in the particle initial state, so the scene holds a handful of
+    nodes whatever the instance count. bake turns it back into real
+    instances."""
+
+    BATCHED = False
+    ROTATION_ATTR = "rotationPP"
+    SCALE_ATTR = "scalePP"
+    SOURCE_ATTR = "scatterSource"
+
+    def __init__(self):
+        if not lazyimport.loadable(oFX):
+            raise RuntimeError("InstancerBackend needs maya.OpenMayaFX")
+
+    @staticmethod
+    def _particle_fn(shape):
+        sel = oM.MSelectionList()
+        sel.add(shape)
+        dag_path = oM.MDagPath()
+        sel.getDagPath(0, dag_path)
+        return oFX.MFnParticleSystem(dag_path)
+
+    def scatter(self, source, matrices):
+        """returns [particle transform, instancer] for the new nodes"""
+        translations, rotations, scales = scattercore.decompose_matrices(
+            matrices)
+        particle, shape = cmds.particle(name=source + "_scatter")
+        cmds.setAttr(shape + ".isDynamic", False)
+        cmds.addAttr(shape, longName=self.SOURCE_ATTR, dataType="string")
+        cmds.setAttr(shape + "." + self.SOURCE_ATTR, source, type="string")
+        for attr in (self.ROTATION_ATTR, self.SCALE_ATTR):
+            cmds.addAttr(shape, longName=attr, dataType="vectorArray")
+            cmds.addAttr(shape, longName=attr + "0", dataType="vectorArray")
+        particle_fn = self._particle_fn(shape)
+        points = oM.MPointArray()
+        points.setLength(len(translations))
+        for i, (x, y, z) in enumerate(translations.tolist()):
+            points.set(i, x, y, z)
+        particle_fn.emit(points)
+        particle_fn.setPerParticleAttribute(self.ROTATION_ATTR,
+                                            _vector_array(rotations))
+        particle_fn.setPerParticleAttribute(self.SCALE_ATTR,
+                                            _vector_array(scales))
+        particle_fn.saveInitialState()
+        instancer = cmds.particleInstancer(
+            shape, addObject=True, object=source,
+            rotation=self.ROTATION_ATTR, scale=self.SCALE_ATTR,
+            rotationUnits="degrees", rotationOrder="XYZ")
+        return [particle, instancer]
+
+    def read_matrices(self, particle):
+        """rebuilds the (N,4,4) matrices stored on a scatter particle"""
+        shape = cmds.listRelatives(particle, shapes=True)[0]
+        particle_fn = self._particle_fn(shape)
+        positions = oM.MVectorArray()
+        particle_fn.position(positions)
+        rotations = oM.MVectorArray()
+        particle_fn.getPerParticleAttribute(self.ROTATION_ATTR, rotations)
+        scales = oM.MVectorArray()
+        particle_fn.getPerParticleAttribute(self.SCALE_ATTR, scales)
+        rotations = scattercore.random_rotations(
+            np.tile(np.identity(3), (rotations.length(), 1, 1)),
+            _numpy_vectors(scales), _numpy_vectors(rotations))
+        return scattercore.assemble_matrices(rotations,
+                                             _numpy_vectors(positions))
+
+    def bake(self, particle, backend=None):
+        """Replaces a scatter particle and its instancer with one real
+        instance per particle. Returns the new instance names."""
+        if backend is None:
+            backend = CommandBackend()
+        shape = cmds.listRelatives(particle, shapes=True)[0]
+        source = cmds.getAttr(shape + "." + self.SOURCE_ATTR)
+        instancers = cmds.listConnections(shape, type="instancer") or []
+        instances = backend.scatter(source, self.read_matrices(particle))
+        cmds.delete([particle] + list(set(instancers)))
+        return instances
+
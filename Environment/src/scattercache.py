@@ -0,0 +1,105 @@
+"""Memoizes scatter pipeline stages so a re-scatter only redoes what
+changed.
+
+Every stage is keyed by a hash of its own parameters chained onto the key
+of the stage before it, starting from a content hash of the target mesh.
+Changing the push-in length therefore reuses the sampled points, the
+base alignment and the random channels, and only rebuilds the push-in
+offsets. Entries are evicted least recently used first once the arrays
+held exceed a memory budget."""
+import collections
+import hashlib
+import logging
+
+import numpy as np
+
+log = logging.getLogger(__name__)
+
+DEFAULT_MAX_BYTES = 512 * 1024 * 1024
+
+
+def digest(*parts):
+    """Hashes arrays by content and everything else by repr, returning a
+    hex key."""
+    sha = hashlib.sha1()
+    for part in parts:
+        if isinstance(part, np.ndarray):
+            sha.update(str((part.dtype.str, part.shape)).encode("utf-8"))
+            sha.update(np.ascontiguousarray(part).data)
+        else:
+            sha.update(repr(part).encode("utf-8"))
+        sha.update(b"\0")
+    return sha.hexdigest()
+
+
+def mesh_key(mesh_source, selection):
+    """content hash of the selected meshes' points, normals and topology
+    plus the selected index ranges"""
+    parts = []
+    for mesh, ranges in zip(selection.meshes, selection.ranges):
+        positions, normals = mesh_source.mesh_points(mesh)
+        parts.extend((mesh, positions, normals,
+                      mesh_source.mesh_triangles(mesh), ranges))
+    return digest(*parts)
+
+
+def entry_nbytes(value):
+    """bytes held by the arrays in a cache entry"""
+    if isinstance(value, np.ndarray):
+        return value.nbytes
+    if isinstance(value, (tuple, list)):
+        return sum(entry_nbytes(item) for item in value)
+    return 0
+
+
+class ScatterCache(object):
+    """LRU cache of stage results bounded by the bytes of their arrays."""
+
+    def __init__(self, max_bytes=DEFAULT_MAX_BYTES):
+        self.max_bytes = max_bytes
+        self.nbytes = 0
+        self.hits = 0
+        self.misses = 0
+        self._entries = collections.OrderedDict()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __contains__(self, key):
+        return key in self._entries
+
+    def get(self, key, default=None):
+        if key not in self._entries:
+            return default
+        self._entries.move_to_end(key)
+        return self._entries[key][0]
+
+    def put(self, key, value):
+        """stores value, evicting old entries to stay under max_bytes"""
+        if key in self._entries:
+            self.nbytes -= self._entries.pop(key)[1]
+        size = entry_nbytes(value)
+        if size > self.max_bytes:
+            log.debug("not caching %s, %d bytes is over the budget", key,
+                      size)
+            return
+        self._entries[key] = (value, size)
+        self.nbytes += size
+        while self.nbytes > self.max_bytes:
+            old_key, (old_value, old_size) = self._entries.popitem(
+                last=False)
+            self.nbytes -= old_size
+
+    def get_or_compute(self, key, func):
+        """returns the cached value for key, computing it on a miss"""
+        if key in self._entries:
+            self.hits += 1
+            return self.get(key)
+        self.misses += 1
+        value = func()
+        self.put(key, value)
+        return value
+
+    def clear(self):
+        self._entries.clear()
+        self.nbytes = 0
@@ -0,0 +1,196 @@
+"""Headless scatter: reads a mesh, scatters onto it and writes the instance
+transforms to disk, without Maya or Qt.
+
+Example:
+    python scattercli.py terrain.obj rocks.npy --percentage 25 \
+        --random-scale --scale-min .5 .5 .5 --scale-max 2 2 2 --seed 7
+
+The output holds one row-vector 4x4 matrix per instance, as .npy (N,4,4),
+.npz (matrices plus the picked vertex indices) or .json. With --weights
+the instances are shared out between that many sources, and .npz and
+.json also hold each instance's source index. --cull-overlaps drops
+instances until their bounding spheres, the given source radius times
+each instance's scale, no longer overlap.
+
+--density-colors, --density-map and --density-image scale the
+percentage point by point by the mesh's vertex colours, a named vertex
+property, or a greyscale image looked up through the mesh's UVs.
+
+--workers builds the transforms of large scatters in that many
+processes."""
+import argparse
+import json
+import logging
+import os
+import sys
+
+import numpy as np
+
+import meshsource
+import scattercore
+import scatterdensity
+import scatterprofile
+
+log = logging.getLogger(__name__)
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(
+        description="Scatter instance transforms onto a mesh file.")
+    parser.add_argument("mesh", help="OBJ, PLY, .npy or .npz mesh to "
+                                     "scatter onto")
+    parser.add_argument("output", help=".npy, .npz or .json file to write")
+    parser.add_argument("--percentage", type=float, default=100.0,
+                        help="percentage of vertices to scatter to")
+    parser.add_argument("--surface", action="store_true",
+                        help="sample the faces by area instead of the "
+                             "vertices")
+    parser.add_argument("--count", type=int, default=None,
+                        help="surface samples to draw, defaults to the "
+                             "percentage of vertices")
+    parser.add_argument("--min-distance", type=float, default=0.0,
+                        help="Poisson-disk spacing between instances")
+    density = parser.add_mutually_exclusive_group()
+    density.add_argument("--density-colors", nargs="?", const="",
+                         default=None, metavar="SET",
+                         help="keep points by the luminance of the "
+                              "vertex colours, or of colour set SET")
+    density.add_argument("--density-map", default=None, metavar="NAME",
+                         help="keep points by the per-vertex values "
+                              "called NAME")
+    density.add_argument("--density-image", default=None, metavar="IMAGE",
+                         help="keep points by the greys of IMAGE at "
+                              "their UVs")
+    parser.add_argument("--random-scale", action="store_true")
+    parser.add_argument("--scale-min", type=float, nargs=3,
+                        default=(.5, .5, .5), metavar=("X", "Y", "Z"))
+    parser.add_argument("--scale-max", type=float, nargs=3,
+                        default=(2, 2, 2), metavar=("X", "Y", "Z"))
+    parser.add_argument("--random-rotate", action="store_true")
+    parser.add_argument("--rot-min", type=float, nargs=3,
+                        default=(0, 0, 0), metavar=("X", "Y", "Z"))
+    parser.add_argument("--rot-max", type=float, nargs=3,
+                        default=(180, 180, 180), metavar=("X", "Y", "Z"))
+    parser.add_argument("--align-normals", action="store_true")
+    parser.add_argument("--push-in", type=float, default=None,
+                        metavar="LENGTH",
+                        help="push instances this far into the surface")
+    parser.add_argument("--seed", type=int, default=None)
+    parser.add_argument("--weights", type=float, nargs="+", default=None,
+                        help="share the instances between several "
+                             "sources by these weights")
+    parser.add_argument("--cull-overlaps", type=float, nargs="+",
+                        default=None, metavar="RADIUS",
+                        help="remove overlapping instances, given the "
+                             "source's bounding radius, or one per "
+                             "--weights source")
+    parser.add_argument("--workers", type=int, default=1,
+                        help="processes building the transforms of "
+                             "large scatters, 1 for serial")
+    parser.add_argument("--profile", default=None, metavar="JSON",
+                        help="time each stage and write the report here")
+    parser.add_argument("--cprofile", default=None, metavar="PROF",
+                        help="also write a cProfile capture here")
+    parser.add_argument("--profile-memory", action="store_true",
+                        help="also measure each stage's memory, which "
+                             "slows the scatter down")
+    return parser
+
+
+def configure(scat, args):
+    """applies parsed arguments with the same setters ScatterUI uses"""
+    for axis in range(3):
+        setter = (scat.set_scale_and_rot_x, scat.set_scale_and_rot_y,
+                  scat.set_scale_and_rot_z)[axis]
+        setter(args.scale_max[axis], args.scale_min[axis],
+               args.rot_max[axis], args.rot_min[axis])
+    scat.set_percentage(args.percentage)
+    scat.set_surface_sampling(args.surface, args.count)
+    scat.set_min_distance(args.min_distance)
+    scat.set_checkbox_normals(args.align_normals)
+    scat.set_pushin(args.push_in is not None, args.push_in or 0)
+    scat.set_random_checks(args.random_rotate, args.random_scale)
+    scat.set_seed(args.seed)
+    scat.set_source_weights(args.weights)
+    scat.set_density_map(density_map(args))
+    scat.set_workers(args.workers)
+
+
+def density_map(args):
+    """returns the DensityMap the --density options ask for, or None"""
+    if args.density_colors is not None:
+        return scatterdensity.DensityMap("color", args.density_colors)
+    if args.density_map:
+        return scatterdensity.DensityMap("map", args.density_map)
+    if args.density_image:
+        return scatterdensity.DensityMap("image", image=args.density_image)
+    return None
+
+
+def write_transforms(path, matrices, indices, sources=None):
+    """writes matrices and the vertex indices they were placed on, or the
+    triangle indices in surface mode, plus each one's source index when
+    there are several sources"""
+    ext = os.path.splitext(path)[1].lower()
+    if ext == ".npy":
+        np.save(path, matrices)
+    elif ext == ".npz" and sources is not None:
+        np.savez(path, matrices=matrices, indices=indices, sources=sources)
+    elif ext == ".npz":
+        np.savez(path, matrices=matrices, indices=indices)
+    elif ext == ".json":
+        data = {"indices": np.asarray(indices).tolist(),
+                "matrices": matrices.reshape(-1, 16).tolist()}
+        if sources is not None:
+            data["sources"] = np.asarray(sources).tolist()
+        with open(path, "w") as out_file:
+            json.dump(data, out_file)
+    else:
+        raise ValueError("unsupported output file {}".format(path))
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    logging.basicConfig(level=logging.INFO)
+    source = meshsource.FileMeshSource(args.mesh)
+    scat = scattercore.ScatterCore()
+    configure(scat, args)
+    scat.verts_to_scatter_on = meshsource.parse_components([source.name],
+                                                           source)
+    profiler = None
+    if args.profile or args.cprofile:
+        profiler = scatterprofile.Profiler(cprofile=bool(args.cprofile),
+                                           memory=args.profile_memory)
+        scat.set_profiler(profiler)
+        profiler.start()
+    matrices = scat.compute(source)
+    sources = None
+    if args.weights:
+        sources = scat.choose_sources(len(matrices), len(args.weights))
+    if args.cull_overlaps:
+        radii = np.array(args.cull_overlaps)
+        if len(radii) == 1:
+            radii = radii[0]
+        elif sources is not None and len(radii) == len(args.weights):
+            radii = radii[sources]
+        else:
+            raise SystemExit("--cull-overlaps takes one radius, or one "
+                             "per --weights source")
+        matrices = scat.cull_overlaps(matrices, radii)
+        sources = scat.source_ids
+    write_transforms(args.output, matrices, scat.picked_indices, sources)
+    log.info("wrote %d instance transforms to %s", len(matrices),
+             args.output)
+    if profiler is not None:
+        profiler.stop()
+        report = profiler.report()
+        log.info("scatter profile:\n%s", report.format())
+        if args.profile:
+            report.dump(args.profile)
+        if args.cprofile:
+            report.dump_stats(args.cprofile)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
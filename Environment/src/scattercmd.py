@@ -0,0 +1,128 @@
+"""scatterInstances: a Maya command writing a scatter as one undo entry.
+
+A Maya plug-in; CommandBackend loads it with cmds.loadPlugin. Called as
+
+    cmds.scatterInstances(source, key)
+
+where key names an (N,4,4) matrix array handed over with
+scatterbackend.stash_matrices. One instance of source's shape is made
+per matrix and the new transform names are returned.
+
+    cmds.scatterInstances(source, key, adopt=True)
+
+makes nothing: the instances named with the matrices already exist,
+written in batches with the undo queue paused, and the command only
+puts them on the queue as one entry.
+
+The command keeps the matrices as one float64 array and the transforms
+it made as object handles, 128 bytes and a handle per instance, instead
+of the five or six undo records per instance a cmds.instance/move/
+rotate/scale loop leaves behind. undoIt deletes the transforms, redoIt
+rebuilds them from the array, so undo and redo cost about what the
+scatter did."""
+import maya.api.OpenMaya as om2
+
+import scatterbackend
+
+COMMAND_NAME = "scatterInstances"
+
+
+def maya_useNewAPI():
+    """tells Maya this plug-in uses the Python API 2.0"""
+
+
+def _dag_path(name):
+    sel = om2.MSelectionList()
+    sel.add(name)
+    return sel.getDagPath(0)
+
+
+class ScatterInstancesCmd(om2.MPxCommand):
+    """Creates instances of a source shape under new transforms."""
+
+    def __init__(self):
+        super(ScatterInstancesCmd, self).__init__()
+        self.source = None
+        self.matrices = None
+        self.handles = []
+
+    @staticmethod
+    def creator():
+        return ScatterInstancesCmd()
+
+    @staticmethod
+    def syntax():
+        syntax = om2.MSyntax()
+        syntax.addArg(om2.MSyntax.kString)
+        syntax.addArg(om2.MSyntax.kString)
+        syntax.addFlag("-a", "-adopt")
+        return syntax
+
+    def isUndoable(self):
+        return True
+
+    def doIt(self, args):
+        arg_data = om2.MArgDatabase(self.syntax(), args)
+        self.source = arg_data.commandArgumentString(0)
+        key = arg_data.commandArgumentString(1)
+        self.matrices = scatterbackend.take_matrices(key)
+        names = scatterbackend.take_names(key)
+        if arg_data.isFlagSet("-a"):
+            self.handles = [om2.MObjectHandle(_dag_path(name).node())
+                            for name in names]
+            self.clearResult()
+            self.setResult(names)
+            return
+        self.redoIt()
+
+    def redoIt(self):
+        source_path = _dag_path(self.source)
+        shape = om2.MDagPath(source_path).extendToShape().node()
+        base_name = source_path.partialPathName().split("|")[-1]
+        modifier = om2.MDagModifier()
+        transforms = []
+        for _ in range(len(self.matrices)):
+            transform = modifier.createNode("transform")
+            modifier.renameNode(transform, base_name)
+            transforms.append(transform)
+        modifier.doIt()
+        dag_fn = om2.MFnDagNode()
+        transform_fn = om2.MFnTransform()
+        names = []
+        rows = self.matrices.reshape(-1, 16).tolist()
+        for transform, row in zip(transforms, rows):
+            dag_fn.setObject(transform)
+            dag_fn.addChild(shape, om2.MFnDagNode.kNextPos, True)
+            transform_fn.setObject(transform)
+            transform_fn.setTransformation(
+                om2.MTransformationMatrix(om2.MMatrix(row)))
+            names.append(dag_fn.partialPathName())
+        self.handles = [om2.MObjectHandle(transform)
+                        for transform in transforms]
+        self.clearResult()
+        self.setResult(names)
+
+    def undoIt(self):
+        shape = _dag_path(self.source).extendToShape().node()
+        dag_fn = om2.MFnDagNode()
+        modifier = om2.MDagModifier()
+        for handle in self.handles:
+            if not handle.isValid():
+                continue
+            transform = handle.object()
+            # drop the shared shape first so deleting the transform only
+            # removes this instance of it
+            dag_fn.setObject(transform)
+            dag_fn.removeChild(shape)
+            modifier.deleteNode(transform)
+        modifier.doIt()
+        self.handles = []
+
+
+def initializePlugin(plugin):
+    om2.MFnPlugin(plugin).registerCommand(
+        COMMAND_NAME, ScatterInstancesCmd.creator, ScatterInstancesCmd.syntax)
+
+
+def uninitializePlugin(plugin):
+    om2.MFnPlugin(plugin).deregisterCommand(COMMAND_NAME)
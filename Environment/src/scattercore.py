@@ -0,0 +1,615 @@
+import logging
+
+import numpy as np
+
+import meshsource
+import scattercache
+import scatterdensity
+import scatterprofile
+import scattersurface
+
+log = logging.getLogger(__name__)
+
+# below this many instances a process pool costs more than it saves. A
+# serial instance takes about 1us; a pool adds about 0.25us of copying
+# per instance plus its start, about 50ms forked and 0.4s spawned (macOS,
+# Windows and inside Maya). Both are estimates from one CPU, so
+# bench_parallel.py should confirm them on a multi-core machine.
+PARALLEL_MIN_COUNT = 200000
+SPAWN_MIN_COUNT = 2000000
+
+
+def index_dtype(count):
+    """returns the smallest unsigned dtype that can index count items"""
+    if count <= np.iinfo(np.uint32).max:
+        return np.uint32
+    return np.uint64
+
+
+def make_rng(seed=None):
+    """returns a numpy Generator, reusing seed if it already is one"""
+    if isinstance(seed, np.random.Generator):
+        return seed
+    return np.random.default_rng(seed)
+
+
+def stage_seeds(seed, count):
+    """Splits one seed into independent seeds for count pipeline stages,
+    so changing what one stage draws never shifts another's numbers."""
+    if seed is None:
+        return [None] * count
+    return np.random.SeedSequence(seed).spawn(count)
+
+
+def percentage_count(total, fraction):
+    """returns how many of total items a 0-1 fraction picks"""
+    if fraction <= 0:
+        return 0
+    return min(int(total * fraction), total)
+
+
+def sample_indices(count, k, seed=None):
+    """Picks k unique indices out of range(count) in O(k).
+
+    Returns a sorted index array. When k is at least half of count a
+    permutation is cheaper than rejecting duplicates, otherwise random
+    batches are drawn and deduplicated until k indices are collected."""
+    if k < 0 or k > count:
+        raise ValueError("cannot pick {} of {} items".format(k, count))
+    dtype = index_dtype(count)
+    rng = make_rng(seed)
+    if k == 0:
+        return np.empty(0, dtype=dtype)
+    if k == count:
+        return np.arange(count, dtype=dtype)
+    if 2 * k >= count:
+        picked = rng.permutation(count)[:k]
+        return np.sort(picked).astype(dtype)
+    picked = np.empty(0, dtype=np.int64)
+    while picked.size < k:
+        missing = k - picked.size
+        batch = rng.integers(0, count, size=missing + missing // 4 + 16)
+        picked = np.unique(np.concatenate((picked, batch)))
+    if picked.size > k:
+        picked = rng.choice(picked, size=k, replace=False)
+        picked.sort()
+    return picked.astype(dtype)
+
+
+def sample_percentage(count, fraction, seed=None):
+    """picks a 0-1 fraction of range(count) as a sorted index array"""
+    return sample_indices(count, percentage_count(count, fraction), seed)
+
+
+def assign_sources(count, weights, seed=None):
+    """Splits count instances between len(weights) sources in proportion
+    to weights, to the nearest instance, in random order. Returns an
+    (count,) array of each instance's source index."""
+    weights = np.asarray(weights, dtype=np.float64).ravel()
+    if(not len(weights) or (weights < 0).any() or weights.sum() <= 0):
+        raise ValueError("source weights must be positive, got {}".format(
+            weights.tolist()))
+    dtype = index_dtype(len(weights))
+    if len(weights) == 1:
+        return np.zeros(count, dtype=dtype)
+    share = weights / weights.sum() * count
+    counts = np.floor(share).astype(np.int64)
+    # largest remainders get the instances flooring left over
+    short = count - counts.sum()
+    counts[np.argsort(counts - share, kind="stable")[:short]] += 1
+    source_ids = np.repeat(np.arange(len(weights), dtype=dtype), counts)
+    make_rng(seed).shuffle(source_ids)
+    return source_ids
+
+
+def instance_radii(matrices, base_radius):
+    """Returns the (N,) bounding radius of each instance: base_radius, a
+    scalar or one per instance, times the largest scale in its
+    matrix."""
+    scales = np.sqrt(np.einsum("nij,nij->ni", matrices[:, :3, :3],
+                               matrices[:, :3, :3]))
+    return scales.max(axis=1) * base_radius
+
+
+def euler_matrices(angles):
+    """Returns (N,3,3) row-vector rotations for (N,3) xyz-order Euler
+    degrees, matching what cmds.rotate applies."""
+    angles = np.radians(np.asarray(angles, dtype=np.float64))
+    cos, sin = np.cos(angles), np.sin(angles)
+    cx, cy, cz = cos.T
+    sx, sy, sz = sin.T
+    matrices = np.empty((len(angles), 3, 3))
+    matrices[:, 0, 0] = cy * cz
+    matrices[:, 0, 1] = cy * sz
+    matrices[:, 0, 2] = -sy
+    matrices[:, 1, 0] = sx * sy * cz - cx * sz
+    matrices[:, 1, 1] = sx * sy * sz + cx * cz
+    matrices[:, 1, 2] = sx * cy
+    matrices[:, 2, 0] = cx * sy * cz + sx * sz
+    matrices[:, 2, 1] = cx * sy * sz - sx * cz
+    matrices[:, 2, 2] = cx * cy
+    return matrices
+
+
+def matrix_eulers(rotations):
+    """Returns (N,3) xyz-order Euler degrees of pure (N,3,3) rotations,
+    the inverse of euler_matrices."""
+    y = np.arcsin(np.clip(-rotations[:, 0, 2], -1.0, 1.0))
+    x = np.arctan2(rotations[:, 1, 2], rotations[:, 2, 2])
+    z = np.arctan2(rotations[:, 0, 1], rotations[:, 0, 0])
+    # gimbal lock: fold all of the rotation into x
+    locked = np.hypot(rotations[:, 0, 0], rotations[:, 0, 1]) < 1e-9
+    x[locked] = np.arctan2(-rotations[locked, 2, 1],
+                           rotations[locked, 1, 1])
+    z[locked] = 0.0
+    return np.degrees(np.stack((x, y, z), axis=1))
+
+
+def decompose_matrices(matrices):
+    """splits (N,4,4) row-vector matrices into (N,3) translations, xyz
+    Euler degrees and per-axis scales"""
+    scales = np.linalg.norm(matrices[:, :3, :3], axis=2)
+    rotations = matrices[:, :3, :3] / scales[:, :, np.newaxis]
+    return matrices[:, 3, :3].copy(), matrix_eulers(rotations), scales
+
+
+def aim_matrices(normals, up=(0.0, 1.0, 0.0)):
+    """Returns (N,3,3) rotations matching a default normalConstraint: local
+    X aimed along each normal and local Y as close to up as possible.
+    Normals parallel to up fall back to world Z as the up vector."""
+    aim = np.asarray(normals, dtype=np.float64)
+    aim = aim / np.linalg.norm(aim, axis=1)[:, np.newaxis]
+    up = np.tile(np.asarray(up, dtype=np.float64), (len(aim), 1))
+    parallel = np.abs(np.einsum("ij,ij->i", aim, up)) > 0.999999
+    up[parallel] = (0.0, 0.0, 1.0)
+    side = up - np.einsum("ij,ij->i", aim, up)[:, np.newaxis] * aim
+    side /= np.linalg.norm(side, axis=1)[:, np.newaxis]
+    return np.stack((aim, side, np.cross(aim, side)), axis=1)
+
+
+def random_ranges(rng, count, low, high):
+    """draws (count,3) values uniformly between per-axis low and high"""
+    low = np.asarray(low, dtype=np.float64)
+    high = np.asarray(high, dtype=np.float64)
+    return low + rng.random((count, 3)) * (high - low)
+
+
+def draw_random_channels(count, scale_range=None, rotate_range=None,
+                         seed=None):
+    """Draws the random (count,3) scales and rotation angles of a scatter.
+
+    Scales are always drawn before rotations so a seed gives the same
+    layout whichever channels are on. A channel whose range is None is
+    returned as None."""
+    rng = make_rng(seed)
+    scales = None
+    if scale_range is not None:
+        scales = random_ranges(rng, count, *scale_range)
+    angles = None
+    if rotate_range is not None:
+        angles = random_ranges(rng, count, *rotate_range)
+    return scales, angles
+
+
+def align_rotations(normals, align):
+    """returns the (N,3,3) base rotations, aimed along normals with align"""
+    if align:
+        return aim_matrices(normals)
+    return np.tile(np.identity(3), (len(normals), 1, 1))
+
+
+def random_rotations(aligned, scales=None, angles=None):
+    """adds the random object space rotation and per-axis scale on top of
+    the base rotations"""
+    rotations = aligned
+    if angles is not None:
+        rotations = np.matmul(euler_matrices(angles), rotations)
+    if scales is not None:
+        rotations = scales[:, :, np.newaxis] * rotations
+    return rotations
+
+
+def push_in_translations(positions, aligned, push_in=None):
+    """moves positions back along the local X of the base rotations"""
+    positions = np.asarray(positions, dtype=np.float64)
+    if push_in:
+        return positions - push_in * aligned[:, 0, :]
+    return positions
+
+
+def assemble_matrices(rotations, translations, out=None):
+    """packs (N,3,3) rotations and (N,3) translations into (N,4,4)
+    row-vector matrices, into out when given"""
+    matrices = np.zeros((len(translations), 4, 4)) if out is None else out
+    matrices[:, :3, :3] = rotations
+    matrices[:, :3, 3] = 0.0
+    matrices[:, 3, :3] = translations
+    matrices[:, 3, 3] = 1.0
+    return matrices
+
+
+def build_matrices(positions, normals, scales=None, angles=None,
+                   align=False, push_in=None, out=None):
+    """Builds (N,4,4) row-vector matrices from already drawn channels.
+
+    Everything here is per instance, so any slice of the inputs gives
+    the matching slice of the result. out may be a preallocated array."""
+    aligned = align_rotations(normals, align)
+    translations = push_in_translations(positions, aligned, push_in)
+    return assemble_matrices(random_rotations(aligned, scales, angles),
+                             translations, out)
+
+
+def generate_transforms(positions, normals, scale_range=None,
+                        rotate_range=None, align=False, push_in=None,
+                        seed=None):
+    """Builds every instance transform of a scatter in one pass.
+
+    positions and normals are (N,3) arrays. scale_range and rotate_range
+    are (min, max) pairs of per-axis values, or None to leave that
+    channel alone. With align the local X axis follows the normal, and
+    push_in moves each instance that far back along its aligned local X.
+    Random rotation is applied in object space on top of the alignment.
+    Returns an (N,4,4) array of row-vector matrices."""
+    scales, angles = draw_random_channels(len(positions), scale_range,
+                                          rotate_range, seed)
+    return build_matrices(positions, normals, scales, angles, align,
+                          push_in)
+
+
+class ScatterCore(object):
+    """Scatter parameters and math, free of Maya and Qt.
+
+    The setters take the same values ScatterUI collects, so a scatter can
+    be driven from the UI, a script or the command line alike."""
+
+    def __init__(self):
+        self.verts_to_scatter_on = meshsource.VertexSelection()
+        self.scale_max_x = 2
+        self.scale_max_y = 2
+        self.scale_max_z = 2
+        self.scale_min_x = 0.5
+        self.scale_min_y = 0.5
+        self.scale_min_z = 0.5
+        self.rot_max_x = 180
+        self.rot_max_y = 180
+        self.rot_max_z = 180
+        self.rot_min_x = 0
+        self.rot_min_y = 0
+        self.rot_min_z = 0
+        self.percentage_to_scatter_to = 100.00
+        self.picked_indices = list()
+        self.number_of_verts = 0
+        self.seed = None
+        self.sample_seed = None
+        self.transform_seed = None
+        self.spacing_seed = None
+        self.source_seed = None
+        self.source_weights = None
+        self.source_ids = None
+        self.overlap_seed = None
+        self.cull_overlapping = False
+        self.culled_count = 0
+        self.density_map = None
+        self.density_seed = None
+        self.surface_sampling = False
+        self.surface_count = None
+        self.min_distance = 0.0
+        self.align_to_normals_value = False
+        self.push_in_objs = False
+        self.push_in_length = 0
+        self.rotate_checked = False
+        self.scale_checked = True
+        self.workers = 1
+        self.parallel_min_count = None
+        self.cache = None
+        self.profiler = scatterprofile.NULL_PROFILER
+
+    def set_random_checks(self, rot_checked, scale_checked):
+        self.rotate_checked = rot_checked
+        self.scale_checked = scale_checked
+
+    def set_scale_and_rot_x(self, scalemax, scalemin, rotmax, rotmin):
+        self.scale_max_x = float(scalemax)
+        self.scale_min_x = float(scalemin)
+        self.rot_max_x = float(rotmax)
+        self.rot_min_x = float(rotmin)
+
+    def set_scale_and_rot_y(self, scalemax, scalemin, rotmax, rotmin):
+        self.scale_max_y = float(scalemax)
+        self.scale_min_y = float(scalemin)
+        self.rot_max_y = float(rotmax)
+        self.rot_min_y = float(rotmin)
+
+    def set_scale_and_rot_z(self, scalemax, scalemin, rotmax, rotmin):
+        self.scale_max_z = float(scalemax)
+        self.scale_min_z = float(scalemin)
+        self.rot_max_z = float(rotmax)
+        self.rot_min_z = float(rotmin)
+
+    def set_percentage(self, percentage_chosen):
+        self.percentage_to_scatter_to = float(percentage_chosen)
+        self.percentage_to_scatter_to = self.percentage_to_scatter_to/100
+
+    def set_seed(self, seed):
+        """sets the seed for reproducible layouts, None for random"""
+        self.seed = seed
+        (self.sample_seed, self.transform_seed, self.spacing_seed,
+         self.source_seed, self.overlap_seed,
+         self.density_seed) = stage_seeds(seed, 6)
+
+    def set_source_weights(self, weights):
+        """Sets how instances are shared between several objects to
+        scatter, one weight per object, or None for equal shares."""
+        self.source_weights = None if weights is None else list(weights)
+
+    def set_overlap_culling(self, checked):
+        """removes instances whose bounding spheres overlap, after the
+        random scale has sized them"""
+        self.cull_overlapping = checked
+
+    def set_density_map(self, density_map):
+        """Sets a scatterdensity.DensityMap that keeps each candidate
+        point with its probability, times the percentage, or None to
+        scatter uniformly."""
+        self.density_map = density_map
+
+    def set_cache(self, cache):
+        """Sets a scattercache.ScatterCache to reuse unchanged stages
+        between computes, or None. Only seeded layouts are cached, so an
+        unseeded scatter still comes out different every time."""
+        self.cache = cache
+
+    def set_profiler(self, profiler):
+        """Sets a scatterprofile.Profiler to time each stage of the next
+        scatters, or None to stop profiling."""
+        self.profiler = profiler or scatterprofile.NULL_PROFILER
+
+    def set_workers(self, workers, min_count=None):
+        """Sets how many processes build transforms, 1 for serial, and
+        the fewest instances they are started for. min_count defaults to
+        PARALLEL_MIN_COUNT, or SPAWN_MIN_COUNT where workers are spawned;
+        bench_parallel.py measures the break-even on a given machine."""
+        self.workers = max(int(workers), 1)
+        self.parallel_min_count = min_count
+
+    def set_surface_sampling(self, checked, count=None):
+        """Scatters across the selected faces by area instead of onto
+        vertices. count defaults to the percentage of selected vertices
+        so density stays comparable between the two modes."""
+        self.surface_sampling = checked
+        self.surface_count = count
+
+    def set_min_distance(self, distance):
+        """sets the Poisson-disk spacing between instances, 0 for none"""
+        self.min_distance = float(distance)
+
+    def set_checkbox_normals(self, checked):
+        self.align_to_normals_value = checked
+
+    def set_pushin(self, checked, length):
+        self.push_in_objs = checked
+        self.push_in_length = length
+
+    def choose_percentage_of_vertices(self):
+        with self.profiler.stage("select") as stage:
+            self.picked_indices = sample_percentage(
+                len(self.verts_to_scatter_on), self.percentage_to_scatter_to,
+                self.sample_seed)
+            self.number_of_verts = stage.items = len(self.picked_indices)
+
+    def choose_by_density(self, mesh_source):
+        """Keeps each selected vertex with the density map's probability
+        there times the percentage, from one bulk read of the map."""
+        count = len(self.verts_to_scatter_on)
+        with self.profiler.stage("density", count) as stage:
+            values = mesh_source.fetch_values(
+                self.verts_to_scatter_on,
+                self.density_map.reader(mesh_source))
+            # clamped like percentage_count, for the unscaled default
+            fraction = min(self.percentage_to_scatter_to, 1.0)
+            keep = scatterdensity.accept(
+                self.density_map.densities(values) * fraction,
+                self.density_seed)
+            self.picked_indices = np.flatnonzero(keep).astype(
+                index_dtype(count))
+            self.number_of_verts = stage.items = len(self.picked_indices)
+
+    def transform_options(self):
+        """Returns the generate_transforms keyword arguments for the
+        current settings.
+
+        Pushing in aligns to the normal first. Random rotation is skipped
+        when aligning to normals is checked, as it always has been."""
+        scale_range = None
+        if(self.scale_checked):
+            scale_range = ((self.scale_min_x, self.scale_min_y,
+                            self.scale_min_z),
+                           (self.scale_max_x, self.scale_max_y,
+                            self.scale_max_z))
+        rotate_range = None
+        if(self.rotate_checked and not self.align_to_normals_value):
+            rotate_range = ((self.rot_min_x, self.rot_min_y, self.rot_min_z),
+                            (self.rot_max_x, self.rot_max_y, self.rot_max_z))
+        push_in = None
+        if(self.push_in_objs):
+            push_in = self.push_in_length
+        return dict(scale_range=scale_range, rotate_range=rotate_range,
+                    align=self.align_to_normals_value or self.push_in_objs,
+                    push_in=push_in, seed=self.transform_seed)
+
+    def worker_context(self, count):
+        """returns the multiprocessing context to build count transforms
+        in, None when they are better built serially"""
+        minimum = self.parallel_min_count or PARALLEL_MIN_COUNT
+        if(self.workers < 2 or count < minimum):
+            return None
+        import scatterparallel
+        context = scatterparallel.worker_context()
+        if(context is None):
+            log.warning("no mayapy beside Maya, building transforms "
+                        "serially")
+            return None
+        if(count < (self.parallel_min_count or
+                    scatterparallel.min_count(context))):
+            return None
+        return context
+
+    def compute_transforms(self, positions, normals):
+        """Returns an (N,4,4) array with the transform of every instance,
+        sharded across processes when workers allows and N is large."""
+        with self.profiler.stage("transforms", len(positions)):
+            context = self.worker_context(len(positions))
+            if(context is not None):
+                import scatterparallel
+                return scatterparallel.parallel_transforms(
+                    positions, normals, workers=self.workers,
+                    context=context, **self.transform_options())
+            return generate_transforms(positions, normals,
+                                       **self.transform_options())
+
+    def sample_surface(self, mesh_source):
+        """Samples points on the selected faces weighted by area. With a
+        density map, faces are weighted by area times the most density
+        they hold and each point is kept at its density over that, so
+        sparse maps draw fewer candidates. The triangle each point
+        landed on is kept in picked_indices."""
+        values = None
+        with self.profiler.stage("fetch") as stage:
+            positions, normals, triangles = mesh_source.fetch_surface(
+                self.verts_to_scatter_on)
+            if self.density_map is not None:
+                values = mesh_source.fetch_surface_values(
+                    self.verts_to_scatter_on,
+                    self.density_map.reader(mesh_source))
+            stage.items = len(triangles)
+        count = self.surface_count
+        if count is None:
+            count = percentage_count(len(self.verts_to_scatter_on),
+                                     self.percentage_to_scatter_to)
+        table = None
+        with self.profiler.stage("select") as stage:
+            if(values is not None):
+                areas = scattersurface.triangle_areas(positions, triangles)
+                bounds = self.density_map.triangle_bounds(values, triangles)
+                table = np.cumsum(areas * bounds)
+                if len(table) and areas.sum() > 0:
+                    count = int(round(count * table[-1] / areas.sum()))
+            sampled = scattersurface.sample_surface(
+                positions, normals, triangles, count, self.sample_seed,
+                table=table, values=values)
+            positions, normals, self.picked_indices = sampled[:3]
+            stage.items = count
+        if(values is not None):
+            with self.profiler.stage("density", len(positions)) as stage:
+                keep = scatterdensity.accept(
+                    self.density_map.densities(sampled[3]) /
+                    bounds[self.picked_indices], self.density_seed)
+                positions, normals = positions[keep], normals[keep]
+                self.picked_indices = self.picked_indices[keep]
+                stage.items = len(positions)
+        self.number_of_verts = len(self.picked_indices)
+        return positions, normals
+
+    def sample_points(self, mesh_source):
+        """Runs the sampling stage: picks vertices from verts_to_scatter_on,
+        or points on its faces in surface mode, by the percentage and the
+        density map, and thins them to min_distance. Returns (positions,
+        normals, picked_indices)."""
+        if(self.surface_sampling):
+            positions, normals = self.sample_surface(mesh_source)
+        else:
+            if(self.density_map is not None):
+                self.choose_by_density(mesh_source)
+            else:
+                self.choose_percentage_of_vertices()
+            with self.profiler.stage("fetch", len(self.picked_indices)):
+                positions, normals = mesh_source.fetch(
+                    self.verts_to_scatter_on, self.picked_indices)
+        if(self.min_distance > 0):
+            with self.profiler.stage("spacing", len(positions)):
+                keep = scattersurface.poisson_disk_mask(
+                    positions, self.min_distance, self.spacing_seed)
+            positions, normals = positions[keep], normals[keep]
+            self.picked_indices = self.picked_indices[keep]
+            self.number_of_verts = len(self.picked_indices)
+        return positions, normals, self.picked_indices
+
+    def choose_sources(self, count, source_count):
+        """picks which of source_count objects each of count instances
+        is made from, by source_weights, into source_ids"""
+        weights = self.source_weights
+        if weights is None:
+            weights = [1.0] * source_count
+        if len(weights) != source_count:
+            raise ValueError("{} source weights for {} sources".format(
+                len(weights), source_count))
+        with self.profiler.stage("sources", count):
+            self.source_ids = assign_sources(count, weights,
+                                             self.source_seed)
+        return self.source_ids
+
+    def cull_overlaps(self, matrices, base_radius):
+        """Drops instances until no two bounding spheres overlap. A
+        sphere is base_radius, a scalar or one per instance, times the
+        instance's largest scale. picked_indices and source_ids are
+        thinned to match; culled_count says how many went. Returns the
+        kept matrices."""
+        with self.profiler.stage("cull", len(matrices)):
+            keep = scattersurface.overlap_mask(
+                matrices[:, 3, :3], instance_radii(matrices, base_radius),
+                self.overlap_seed)
+        self.culled_count = int(len(keep) - keep.sum())
+        if len(self.picked_indices) == len(keep):
+            self.picked_indices = np.asarray(self.picked_indices)[keep]
+            self.number_of_verts = len(self.picked_indices)
+        if self.source_ids is not None and len(self.source_ids) == len(keep):
+            self.source_ids = self.source_ids[keep]
+        log.info("culled %d of %d overlapping instances", self.culled_count,
+                 len(keep))
+        return matrices[keep]
+
+    def compute(self, mesh_source):
+        """Samples points and returns their (N,4,4) instance transforms,
+        reusing cached stages when a cache is set and the layout is
+        seeded."""
+        if(self.cache is not None and self.seed is not None):
+            return self.compute_cached(mesh_source)
+        positions, normals, picked = self.sample_points(mesh_source)
+        return self.compute_transforms(positions, normals)
+
+    def compute_cached(self, mesh_source):
+        """Same result as compute, with each stage looked up in the cache
+        under a key chained from the mesh content hash: sampling, then
+        base alignment, then random scale/rotation, then push-in."""
+        options = self.transform_options()
+        with self.profiler.stage("hash"):
+            density_parts = []
+            if self.density_map is not None:
+                density_parts = self.density_map.cache_parts(
+                    mesh_source, self.verts_to_scatter_on)
+            key = scattercache.digest(
+                "sample", scattercache.mesh_key(mesh_source,
+                                                self.verts_to_scatter_on),
+                self.surface_sampling, self.surface_count,
+                self.percentage_to_scatter_to, self.min_distance, self.seed,
+                *density_parts)
+        positions, normals, picked = self.cache.get_or_compute(
+            key, lambda: self.sample_points(mesh_source))
+        self.picked_indices = picked
+        self.number_of_verts = len(picked)
+        with self.profiler.stage("transforms", len(positions)):
+            key = scattercache.digest("align", key, options["align"])
+            aligned = self.cache.get_or_compute(
+                key, lambda: align_rotations(normals, options["align"]))
+            key = scattercache.digest("random", key, options["scale_range"],
+                                      options["rotate_range"], self.seed)
+            rotations = self.cache.get_or_compute(
+                key, lambda: random_rotations(aligned, *draw_random_channels(
+                    len(positions), options["scale_range"],
+                    options["rotate_range"], self.transform_seed)))
+            key = scattercache.digest("push", key, options["push_in"])
+            translations = self.cache.get_or_compute(
+                key, lambda: push_in_translations(positions, aligned,
+                                                  options["push_in"]))
+            return assemble_matrices(rotations, translations)
@@ -0,0 +1,178 @@
+"""Density maps: where a scatter is dense, as a 0-1 acceptance
+probability at every candidate point.
+
+The probability comes from a mesh's vertex colours, a named per-vertex
+value map, or a greyscale image looked up through the mesh's UVs.
+Candidates are drawn as usual and each is kept when a uniform draw falls
+below its probability, so the whole map is one bulk per-vertex read, one
+NumPy image lookup and one comparison, whatever the layout looks like.
+Free of Maya like scattercore."""
+import importlib.util
+import logging
+import os
+
+import numpy as np
+
+import lazyimport
+
+Image = lazyimport.LazyModule("PIL.Image")
+
+log = logging.getLogger(__name__)
+
+# Rec. 709 weights turning colours into the grey a painter sees
+LUMINANCE = np.array((0.2126, 0.7152, 0.0722))
+
+KINDS = ("color", "map", "image")
+
+
+def has_pillow():
+    """whether Pillow is installed, without importing it"""
+    return importlib.util.find_spec("PIL") is not None
+
+
+def luminance(values):
+    """Returns (N,) greys of (N,) values, (N,1) greys or (N,3+) colours,
+    whose alpha is ignored."""
+    values = np.asarray(values, dtype=np.float64)
+    if values.ndim == 1:
+        return values
+    if values.shape[1] < 3:
+        return values[:, 0]
+    return values[:, :3].dot(LUMINANCE)
+
+
+def image_greys(image):
+    """Returns an (H,W) float32 0-1 grey version of an (H,W) or (H,W,C)
+    image, scaling integer pixels by their type's maximum."""
+    image = np.asarray(image)
+    scale = 1.0
+    if image.dtype.kind in "iu":
+        scale = float(np.iinfo(image.dtype).max)
+    if image.ndim == 3:
+        if image.shape[2] < 3:
+            image = image[:, :, 0]
+        else:
+            image = image[:, :, :3].dot(LUMINANCE)
+    return np.ascontiguousarray(image / scale, dtype=np.float32)
+
+
+def read_image(path):
+    """Reads a density image as (H,W) greys: .npy arrays with NumPy,
+    anything else with Pillow when it is installed."""
+    if os.path.splitext(path)[1].lower() == ".npy":
+        return image_greys(np.load(path))
+    if not has_pillow():
+        raise RuntimeError("reading {} needs the Pillow package, or save "
+                           "the map as .npy".format(path))
+    return image_greys(np.asarray(Image.open(path)))
+
+
+def sample_image(image, uvs):
+    """Bilinearly samples an (H,W) image at (N,2) UVs, returning (N,).
+
+    UV (0,0) is the bottom left corner of the image, as in Maya, and UVs
+    outside 0-1 wrap around the way a repeating texture does. Pixels are
+    gathered with np.take on flat indices, which beats 2D fancy
+    indexing."""
+    height, width = image.shape
+    x = uvs[:, 0] * width - 0.5
+    y = (1.0 - uvs[:, 1]) * height - 0.5
+    x0 = np.floor(x)
+    y0 = np.floor(y)
+    fx = x - x0
+    fy = y - y0
+    x0 = x0.astype(np.int64) % width
+    y0 = y0.astype(np.int64) % height
+    x1 = x0 + 1
+    x1[x1 == width] = 0
+    row0 = y0 * width
+    row1 = row0 + width
+    row1[y0 == height - 1] = 0
+    pixels = image.ravel()
+    top = np.take(pixels, row0 + x0)
+    top += (np.take(pixels, row0 + x1) - top) * fx
+    bottom = np.take(pixels, row1 + x0)
+    bottom += (np.take(pixels, row1 + x1) - bottom) * fx
+    return top + (bottom - top) * fy
+
+
+def accept(probabilities, seed=None):
+    """returns a keep mask with each point kept at its probability"""
+    rng = np.random.default_rng(seed)
+    return rng.random(len(probabilities)) < probabilities
+
+
+class DensityMap(object):
+    """A per-point acceptance probability for a scatter.
+
+    kind "color" reads the luminance of the colour set name, or of the
+    current set; "map" reads the per-vertex value map name; "image"
+    samples the greys of image, an array or a path, through the UV set
+    name, or the current one. Values outside 0-1 are clipped.
+
+    vertex_values gives what is blended across a face for surface
+    samples: the density itself, or for an image the UVs, so the
+    texture keeps its detail inside large triangles."""
+
+    def __init__(self, kind, name=None, image=None):
+        if kind not in KINDS:
+            raise ValueError("density map kind must be one of {}, got "
+                             "{!r}".format(", ".join(KINDS), kind))
+        if kind == "map" and not name:
+            raise ValueError("a vertex map density needs the map's name")
+        if kind == "image" and image is None:
+            raise ValueError("an image density needs an image")
+        self.kind = kind
+        self.name = name or None
+        self.image = None
+        if kind == "image":
+            if isinstance(image, str):
+                image = read_image(image)
+            self.image = image_greys(image)
+
+    def vertex_values(self, mesh_source, mesh):
+        """returns mesh's (V,K) per-vertex values that densities turns
+        into probabilities"""
+        if self.kind == "color":
+            values = luminance(mesh_source.mesh_colors(mesh, self.name))
+        elif self.kind == "map":
+            values = np.asarray(mesh_source.mesh_vertex_map(mesh, self.name))
+            # one value per vertex, not flattened columns of several
+            if values.ndim != 1 and values.shape[1:] != (1,):
+                raise ValueError(
+                    "density map {!r} of {} has shape {}, not one value "
+                    "per vertex".format(self.name, mesh, values.shape))
+        else:
+            return np.asarray(mesh_source.mesh_uvs(mesh, self.name),
+                              dtype=np.float64)
+        return np.asarray(values, dtype=np.float64).reshape(-1, 1)
+
+    def reader(self, mesh_source):
+        """returns vertex_values bound to mesh_source, for
+        MeshSource.fetch_values"""
+        return lambda mesh: self.vertex_values(mesh_source, mesh)
+
+    def densities(self, values):
+        """returns (N,) 0-1 probabilities for (N,K) vertex_values, or
+        their blends"""
+        if self.kind == "image":
+            densities = sample_image(self.image, values)
+        else:
+            densities = values[:, 0]
+        return np.clip(densities, 0.0, 1.0)
+
+    def triangle_bounds(self, values, triangles):
+        """Returns the (T,) highest density anywhere on each triangle, for
+        drawing surface candidates by area times that bound. Blended
+        densities peak at a corner; an image could peak anywhere."""
+        if self.kind == "image":
+            return np.ones(len(triangles))
+        return np.clip(values[:, 0], 0.0, 1.0)[triangles].max(axis=1)
+
+    def cache_parts(self, mesh_source, selection):
+        """returns what a cached scatter's key must cover: the settings
+        and the values they read off every selected mesh"""
+        parts = [self.kind, self.name, self.image]
+        parts.extend(self.vertex_values(mesh_source, mesh)
+                     for mesh in selection.meshes)
+        return parts
@@ -0,0 +1,151 @@
+"""Writes a computed scatter into the scene a batch at a time.
+
+Computing the transforms is quick; creating thousands of nodes is not.
+A ScatterJob hands the matrices to the backend in batches sized so each
+takes about BatchSizer.target seconds, and yields between them, so the
+caller (the dialog's timer, or a plain loop) can show progress and stop
+early. Free of Maya and Qt like scattercore."""
+import collections
+import logging
+import time
+
+import numpy as np
+
+import scatterprofile
+
+log = logging.getLogger(__name__)
+
+
+class BatchSizer(object):
+    """Picks the next batch size from how long the last one took.
+
+    Aims every batch at target seconds, growing at most by growth times
+    per batch so one quick batch can't make the next one stall the UI."""
+
+    def __init__(self, size=50, target=0.05, minimum=1, maximum=20000,
+                 growth=2.0):
+        self.size = size
+        self.target = target
+        self.minimum = minimum
+        self.maximum = maximum
+        self.growth = growth
+
+    def update(self, count, seconds):
+        """records a batch of count items taking seconds, returns the new
+        size"""
+        if count and seconds > 0:
+            wanted = count * self.target / seconds
+            wanted = min(wanted, self.size * self.growth)
+            self.size = int(max(self.minimum, min(self.maximum, wanted)))
+        return self.size
+
+
+def group_by_source(sources, matrices, source_ids):
+    """Returns [(source, matrices)] with the matrices of each source
+    gathered into one block, in the order of sources, skipping sources
+    that got no instances."""
+    order = np.argsort(source_ids, kind="stable")
+    counts = np.bincount(source_ids, minlength=len(sources))
+    blocks = np.split(matrices[order], np.cumsum(counts)[:-1])
+    return [(source, block) for source, block in zip(sources, blocks)
+            if len(block)]
+
+
+class ScatterJob(object):
+    """One scatter being written through a backend in batches.
+
+    steps() is a generator yielding the job after each batch; done,
+    total, rate and eta describe where it is. Backends that write the
+    whole scatter as one node (BATCHED False) get it in a single batch.
+    instances holds the names of everything created so far. Each batch
+    is timed as the profiler's "write" stage.
+
+    With several sources, source is a list and source_ids gives each
+    matrix's index into it. Every source's instances are then written
+    as one run of batches that never mix sources, so a backend makes
+    them all from that source's shared shape; instances_by_source keeps
+    them apart."""
+
+    def __init__(self, source, matrices, backend, sizer=None,
+                 clock=time.perf_counter, profiler=None, source_ids=None):
+        self.source = source
+        self.matrices = matrices
+        if source_ids is None:
+            self.groups = [(source, matrices)]
+        else:
+            self.groups = group_by_source(source, matrices, source_ids)
+        self.instances_by_source = collections.OrderedDict(
+            (group_source, []) for group_source, _ in self.groups)
+        self.backend = backend
+        self.sizer = sizer or BatchSizer()
+        self.clock = clock
+        self.profiler = profiler or scatterprofile.NULL_PROFILER
+        self.instances = []
+        self.done = 0
+        self.total = len(matrices)
+        self.batches = 0
+        self.started = None
+        self.elapsed = 0.0
+        self._group = 0
+        self._group_done = 0
+
+    @property
+    def finished(self):
+        return self.done >= self.total
+
+    @property
+    def rate(self):
+        """instances written per second so far"""
+        if not self.elapsed:
+            return 0.0
+        return self.done / self.elapsed
+
+    @property
+    def eta(self):
+        """seconds left at the current rate, None before the first batch"""
+        if not self.rate:
+            return None
+        return (self.total - self.done) / self.rate
+
+    def next_batch_size(self):
+        if not getattr(self.backend, "BATCHED", True):
+            return len(self.groups[self._group][1]) - self._group_done
+        return self.sizer.size
+
+    def step(self):
+        """writes the next batch, returns the number of instances in it"""
+        if self.started is None:
+            self.started = self.clock()
+        start = self.clock()
+        source, matrices = self.groups[self._group]
+        stop = min(len(matrices), self._group_done + self.next_batch_size())
+        count = stop - self._group_done
+        with self.profiler.stage("write", count):
+            names = self.backend.scatter(source,
+                                         matrices[self._group_done:stop])
+        self.instances.extend(names)
+        self.instances_by_source[source].extend(names)
+        end = self.clock()
+        self.sizer.update(count, end - start)
+        self.done += count
+        self._group_done = stop
+        if stop == len(matrices):
+            self._group += 1
+            self._group_done = 0
+        self.batches += 1
+        self.elapsed = end - self.started
+        log.debug("scatter batch of %d in %.3fs, %d/%d", count,
+                  end - start, self.done, self.total)
+        return count
+
+    def steps(self):
+        """generator writing the scatter, yields self after each batch"""
+        while not self.finished:
+            self.step()
+            yield self
+
+    def run(self):
+        """writes the whole scatter and returns the instance names"""
+        for _ in self.steps():
+            pass
+        return self.instances
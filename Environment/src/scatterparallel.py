@@ -0,0 +1,178 @@
+"""Shards scatter transform generation across a process pool.
+
+Random channels are drawn once in the calling process so the result is
+identical to the serial path for the same seed. Positions, normals and
+the drawn channels are handed to the workers through shared memory, and
+every worker writes its slice straight into one shared output buffer.
+
+Maya can't be forked safely, and spawning sys.executable inside it would
+start whole copies of Maya, so there workers are spawned from the mayapy
+that ships with it."""
+import contextlib
+import logging
+import multiprocessing
+import multiprocessing.spawn
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+
+import numpy as np
+
+import scattercore
+
+log = logging.getLogger(__name__)
+
+
+class SharedArray(object):
+    """A NumPy array living in a named shared memory block.
+
+    Workers rebuild it from spec() without copying the data."""
+
+    def __init__(self, shape, dtype=np.float64, name=None):
+        self.shape = tuple(shape)
+        self.dtype = np.dtype(dtype)
+        size = max(int(np.prod(self.shape)) * self.dtype.itemsize, 1)
+        self.owner = name is None
+        if self.owner:
+            self.shm = shared_memory.SharedMemory(create=True, size=size)
+        else:
+            self.shm = shared_memory.SharedMemory(name=name)
+        self.array = np.ndarray(self.shape, self.dtype, buffer=self.shm.buf)
+
+    @classmethod
+    def copy_of(cls, array):
+        shared = cls(array.shape, array.dtype)
+        shared.array[...] = array
+        return shared
+
+    @classmethod
+    def attach(cls, spec):
+        if spec is None:
+            return None
+        return cls(spec[1], spec[2], name=spec[0])
+
+    def spec(self):
+        return self.shm.name, self.shape, self.dtype.str
+
+    def close(self):
+        self.array = None
+        self.shm.close()
+        if self.owner:
+            self.shm.unlink()
+
+
+def inside_maya():
+    """whether this process is Maya itself, not Python or mayapy"""
+    name = os.path.splitext(os.path.basename(sys.executable))[0]
+    return name.lower() == "maya"
+
+
+def find_mayapy():
+    """returns the mayapy of the running Maya, None when it is missing"""
+    folder = os.path.dirname(sys.executable)
+    name = "mayapy.exe" if os.name == "nt" else "mayapy"
+    # beside maya on Windows and Linux, in Contents/bin on macOS
+    for path in (os.path.join(folder, name),
+                 os.path.join(folder, os.pardir, "bin", name)):
+        if os.path.isfile(path):
+            return os.path.normpath(path)
+    return None
+
+
+def worker_context():
+    """Returns the multiprocessing context workers start from: the
+    platform's own outside Maya, spawning mayapy inside it, or None when
+    Maya has no mayapy beside it. worker_pool() points the spawn
+    context at mayapy while its pool runs."""
+    if not inside_maya():
+        return multiprocessing.get_context()
+    if find_mayapy() is None:
+        return None
+    return multiprocessing.get_context("spawn")
+
+
+@contextlib.contextmanager
+def worker_pool(workers, context):
+    """Yields a pool of workers processes started from context. Inside
+    Maya they are spawned from mayapy; the spawn executable is process
+    wide, so it is set only while the pool runs and restored after."""
+    mayapy = find_mayapy() if inside_maya() else None
+    previous = multiprocessing.spawn.get_executable()
+    if mayapy is not None:
+        context.set_executable(mayapy)
+    try:
+        with ProcessPoolExecutor(max_workers=workers,
+                                 mp_context=context) as pool:
+            yield pool
+    finally:
+        if mayapy is not None:
+            context.set_executable(previous)
+
+
+def min_count(context):
+    """returns the fewest instances worth a pool started from context;
+    spawned workers each start Python and import NumPy first"""
+    if context.get_start_method() == "spawn":
+        return scattercore.SPAWN_MIN_COUNT
+    return scattercore.PARALLEL_MIN_COUNT
+
+
+def shard_bounds(count, shards):
+    """splits range(count) into at most shards contiguous (start, stop)"""
+    edges = np.linspace(0, count, min(shards, max(count, 1)) + 1)
+    edges = edges.astype(np.int64)
+    return [(int(a), int(b)) for a, b in zip(edges[:-1], edges[1:]) if b > a]
+
+
+def _build_shard(specs, start, stop, align, push_in):
+    """worker: builds the matrices of one slice into the shared output"""
+    attached = [SharedArray.attach(spec) for spec in specs]
+    try:
+        positions, normals, scales, angles, out = [
+            None if shared is None else shared.array[start:stop]
+            for shared in attached]
+        scattercore.build_matrices(positions, normals, scales, angles,
+                                   align, push_in, out=out)
+    finally:
+        for shared in attached:
+            if shared is not None:
+                shared.close()
+    return stop - start
+
+
+def parallel_transforms(positions, normals, scale_range=None,
+                        rotate_range=None, align=False, push_in=None,
+                        seed=None, workers=2, shards=None, context=None):
+    """Same result as scattercore.generate_transforms, built by workers
+    processes started from the multiprocessing context, worker_context()
+    by default. shards defaults to one slice per worker."""
+    if context is None:
+        context = worker_context()
+    if context is None:
+        raise RuntimeError("no mayapy found beside {} to start scatter "
+                           "workers with".format(sys.executable))
+    count = len(positions)
+    scales, angles = scattercore.draw_random_channels(
+        count, scale_range, rotate_range, seed)
+    inputs = [np.ascontiguousarray(positions, dtype=np.float64),
+              np.ascontiguousarray(normals, dtype=np.float64),
+              scales, angles]
+    shared = [None if array is None else SharedArray.copy_of(array)
+              for array in inputs]
+    out = SharedArray((count, 4, 4))
+    shared.append(out)
+    try:
+        specs = [None if array is None else array.spec() for array in shared]
+        with worker_pool(workers, context) as pool:
+            jobs = [pool.submit(_build_shard, specs, start, stop, align,
+                                push_in)
+                    for start, stop in shard_bounds(count,
+                                                    shards or workers)]
+            for job in jobs:
+                job.result()
+        return out.array.copy()
+    finally:
+        for array in shared:
+            if array is not None:
+                array.close()
@@ -0,0 +1,356 @@
+"""Per-stage timing of the scatter pipeline.
+
+ScatterCore, ScatterJob and Scatter wrap each stage of a scatter in
+profiler.stage(name), which records wall time, calls and the items
+(points or instances) it handled. Stages don't nest, so their times add
+up to the scatter's. The default NULL_PROFILER hands out one shared
+do-nothing stage, so with profiling off a scatter pays a method call
+per stage, not per instance.
+
+    profiler = scatterprofile.Profiler(cprofile=True)
+    scat.set_profiler(profiler)
+    with profiler:
+        scat.scatter_func()
+    report = profiler.report()
+    print(report.format())
+    report.dump("scatter.json")
+    report.dump_stats("scatter.prof")
+
+Running inside "with profiler" adds the total time, how much resident
+memory grew and, when asked for, a cProfile capture of everything in
+between. Profiler(memory=True) also measures every stage: how much
+resident memory it grew by and its tracemalloc peak above what was
+allocated when it began."""
+import collections
+import json
+import logging
+import os
+import time
+
+log = logging.getLogger(__name__)
+
+# stages whose items are instances, most telling first
+INSTANCE_STAGES = ("write", "transforms")
+
+
+class StageStats(object):
+    """Time, calls and items of one stage. rss_mb is the resident memory
+    its calls grew by, peak_traced_mb the highest tracemalloc peak of
+    any one call; both are None unless the profiler measured memory."""
+
+    def __init__(self, name):
+        self.name = name
+        self.seconds = 0.0
+        self.calls = 0
+        self.items = 0
+        self.rss_mb = None
+        self.peak_traced_mb = None
+
+    @property
+    def rate(self):
+        """items per second, 0 when nothing was timed"""
+        if not self.seconds:
+            return 0.0
+        return self.items / self.seconds
+
+    def to_dict(self):
+        return {"seconds": self.seconds, "calls": self.calls,
+                "items": self.items, "rate": self.rate,
+                "rss_mb": self.rss_mb,
+                "peak_traced_mb": self.peak_traced_mb}
+
+
+class _NullStage(object):
+    """what NullProfiler.stage returns; records nothing"""
+
+    items = property(lambda self: 0, lambda self, value: None)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        return False
+
+
+_NULL_STAGE = _NullStage()
+
+
+class NullProfiler(object):
+    """Profiler stand-in used when profiling is off."""
+
+    enabled = False
+
+    def stage(self, name, items=0):
+        return _NULL_STAGE
+
+
+NULL_PROFILER = NullProfiler()
+
+
+class _Stage(object):
+    """One timed run of a stage. items can be set inside the with
+    block once the stage knows how much it handled."""
+
+    __slots__ = ("profiler", "name", "items", "start", "memory")
+
+    def __init__(self, profiler, name, items):
+        self.profiler = profiler
+        self.name = name
+        self.items = items
+        self.start = None
+        self.memory = None
+
+    def __enter__(self):
+        if self.profiler.memory:
+            self.memory = self.profiler.memory_mark()
+        self.start = self.profiler.clock()
+        return self
+
+    def __exit__(self, *exc_info):
+        seconds = self.profiler.clock() - self.start
+        rss = traced = None
+        if self.memory is not None:
+            rss, traced = self.profiler.memory_since(self.memory)
+        self.profiler.record(self.name, seconds, self.items, rss, traced)
+        return False
+
+
+def resident_mb():
+    """returns the process's current resident memory in MB, None where
+    neither /proc nor psutil can tell"""
+    try:
+        with open("/proc/self/statm") as statm:
+            pages = int(statm.read().split()[1])
+        return pages * os.sysconf("SC_PAGE_SIZE") / 1024.0 ** 2
+    except (OSError, ValueError, AttributeError):
+        pass
+    try:
+        import psutil
+    except ImportError:
+        return None
+    return psutil.Process().memory_info().rss / 1024.0 ** 2
+
+
+def _difference(after, before):
+    if after is None or before is None:
+        return None
+    return after - before
+
+
+def _mb(value):
+    return "-" if value is None else "{:.1f}".format(value)
+
+
+class Profiler(object):
+    """Collects StageStats for a scatter.
+
+    cprofile captures a cProfile run and memory traces Python and NumPy
+    allocations with tracemalloc between start and stop, and measures
+    each stage's memory. Both slow the scatter down and are off by
+    default; stage timing alone is cheap."""
+
+    enabled = True
+
+    def __init__(self, cprofile=False, memory=False, clock=time.perf_counter):
+        self.cprofile = cprofile
+        self.memory = memory
+        self.clock = clock
+        self.stages = collections.OrderedDict()
+        self.elapsed = None
+        self.peak_traced_mb = None
+        self.rss_mb = None
+        self._profile = None
+        self._started = None
+        self._resident = None
+        # the session's tracemalloc peak, kept across the stages
+        # resetting it
+        self._traced_peak = 0
+
+    def stage(self, name, items=0):
+        """returns a context manager timing one run of stage name"""
+        return _Stage(self, name, items)
+
+    def record(self, name, seconds, items=0, rss_mb=None,
+               peak_traced_mb=None):
+        stats = self.stages.get(name)
+        if stats is None:
+            stats = self.stages[name] = StageStats(name)
+        stats.seconds += seconds
+        stats.calls += 1
+        stats.items += items
+        if rss_mb is not None:
+            stats.rss_mb = (stats.rss_mb or 0.0) + rss_mb
+        if peak_traced_mb is not None:
+            stats.peak_traced_mb = max(stats.peak_traced_mb or 0.0,
+                                       peak_traced_mb)
+
+    def _traced_peak_mb(self):
+        """returns the tracemalloc peak since start in MB"""
+        import tracemalloc
+        peak = max(self._traced_peak, tracemalloc.get_traced_memory()[1])
+        return peak / 1e6
+
+    def memory_mark(self):
+        """Returns what memory_since measures a stage against: resident
+        memory now and, while tracemalloc runs, the bytes traced now,
+        with the tracemalloc peak reset to them. Pythons before 3.9
+        can't reset the peak and measure resident memory only."""
+        import tracemalloc
+        traced = None
+        if tracemalloc.is_tracing() and hasattr(tracemalloc, "reset_peak"):
+            traced, peak = tracemalloc.get_traced_memory()
+            self._traced_peak = max(self._traced_peak, peak)
+            tracemalloc.reset_peak()
+        return resident_mb(), traced
+
+    def memory_since(self, mark):
+        """returns the resident memory grown since mark and the
+        tracemalloc peak above it, in MB, either None when unmeasured"""
+        import tracemalloc
+        resident, traced = mark
+        peak = None
+        if traced is not None and tracemalloc.is_tracing():
+            peak = (tracemalloc.get_traced_memory()[1] - traced) / 1e6
+        return _difference(resident_mb(), resident), peak
+
+    def start(self):
+        if self.memory:
+            import tracemalloc
+            tracemalloc.start()
+            self._traced_peak = 0
+        if self.cprofile:
+            import cProfile
+            self._profile = cProfile.Profile()
+            self._profile.enable()
+        self._resident = resident_mb()
+        self._started = self.clock()
+
+    def stop(self):
+        if self._started is None:
+            raise RuntimeError("Profiler.stop() called before start()")
+        self.elapsed = self.clock() - self._started
+        self._started = None
+        if self._profile is not None:
+            self._profile.disable()
+        if self.memory:
+            import tracemalloc
+            self.peak_traced_mb = self._traced_peak_mb()
+            tracemalloc.stop()
+        self.rss_mb = _difference(resident_mb(), self._resident)
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.stop()
+        return False
+
+    def report(self):
+        """returns a ProfileReport of everything recorded so far"""
+        return ProfileReport(list(self.stages.values()), self.elapsed,
+                             self.rss_mb, self.peak_traced_mb,
+                             self._profile)
+
+
+class ProfileReport(object):
+    """The outcome of a profiled scatter.
+
+    stages lists StageStats in the order the stages first ran. elapsed,
+    rss_mb, the resident memory the session grew by, and the traced peak
+    are None unless the profiler ran as a session."""
+
+    def __init__(self, stages, elapsed=None, rss_mb=None,
+                 peak_traced_mb=None, profile=None):
+        self.stages = stages
+        self.elapsed = elapsed
+        self.rss_mb = rss_mb
+        self.peak_traced_mb = peak_traced_mb
+        self.profile = profile
+
+    def __getitem__(self, name):
+        for stats in self.stages:
+            if stats.name == name:
+                return stats
+        raise KeyError(name)
+
+    @property
+    def staged_seconds(self):
+        return sum(stats.seconds for stats in self.stages)
+
+    @property
+    def instances(self):
+        """instances made, or transformed when nothing was written"""
+        names = dict((stats.name, stats) for stats in self.stages)
+        for name in INSTANCE_STAGES:
+            if name in names:
+                return names[name].items
+        return 0
+
+    @property
+    def instances_per_second(self):
+        seconds = self.elapsed or self.staged_seconds
+        if not seconds:
+            return 0.0
+        return self.instances / seconds
+
+    def to_dict(self):
+        return {"elapsed": self.elapsed,
+                "staged_seconds": self.staged_seconds,
+                "instances": self.instances,
+                "instances_per_second": self.instances_per_second,
+                "rss_mb": self.rss_mb,
+                "peak_traced_mb": self.peak_traced_mb,
+                "stages": collections.OrderedDict(
+                    (stats.name, stats.to_dict()) for stats in self.stages)}
+
+    def dump(self, path):
+        """writes the report as JSON"""
+        with open(path, "w") as out_file:
+            json.dump(self.to_dict(), out_file, indent=2)
+
+    def dump_stats(self, path):
+        """writes the cProfile capture for pstats or snakeviz"""
+        if self.profile is None:
+            raise ValueError("the profiler ran without cprofile")
+        self.profile.dump_stats(path)
+
+    def top(self, count=20, sort="cumulative"):
+        """returns the cProfile capture's top functions as text"""
+        import io
+        import pstats
+        if self.profile is None:
+            raise ValueError("the profiler ran without cprofile")
+        text = io.StringIO()
+        pstats.Stats(self.profile, stream=text).sort_stats(sort).print_stats(
+            count)
+        return text.getvalue()
+
+    def format(self):
+        """returns the stage table as text"""
+        total = self.elapsed or self.staged_seconds
+        memory = any(stats.rss_mb is not None or
+                     stats.peak_traced_mb is not None
+                     for stats in self.stages)
+        header = "{:<12} {:>9} {:>6} {:>6} {:>10} {:>12}".format(
+            "stage", "seconds", "%", "calls", "items", "items/s")
+        if memory:
+            header += " {:>8} {:>8}".format("+rss MB", "peak MB")
+        lines = [header]
+        for stats in self.stages:
+            line = "{:<12} {:>9.4f} {:>6.1f} {:>6} {:>10} {:>12.0f}".format(
+                stats.name, stats.seconds,
+                100.0 * stats.seconds / total if total else 0,
+                stats.calls, stats.items, stats.rate)
+            if memory:
+                line += " {:>8} {:>8}".format(_mb(stats.rss_mb),
+                                              _mb(stats.peak_traced_mb))
+            lines.append(line)
+        lines.append("{} instances, {:.0f}/s".format(
+            self.instances, self.instances_per_second))
+        if self.rss_mb is not None:
+            lines.append("rss grew {:.1f} MB".format(self.rss_mb))
+        if self.peak_traced_mb is not None:
+            lines.append("peak traced {:.1f} MB".format(self.peak_traced_mb))
+        return "\n".join(lines)
+
@@ -0,0 +1,269 @@
+"""Area-weighted sampling on triangle surfaces, Poisson-disk thinning and
+overlap culling.
+
+Points are spread by surface area rather than by vertex, so density no
+longer follows how finely a mesh is subdivided. Everything is vectorized
+NumPy and free of Maya."""
+import logging
+
+import numpy as np
+
+log = logging.getLogger(__name__)
+
+# half of the 27 neighbouring grid cells; the other half is covered by
+# looking at each pair from its other end
+HALF_NEIGHBOURS = [(dx, dy, dz)
+                   for dx in (-1, 0, 1) for dy in (-1, 0, 1)
+                   for dz in (-1, 0, 1) if (dx, dy, dz) > (0, 0, 0)]
+NEIGHBOURS = ([(0, 0, 0)] + HALF_NEIGHBOURS +
+              [(-dx, -dy, -dz) for dx, dy, dz in HALF_NEIGHBOURS])
+
+# how much the radii inside one overlap_pairs level may differ; scatters
+# of one source scaled at random stay in a single level
+LEVEL_RATIO = 4.0
+
+
+def triangle_areas(positions, triangles):
+    """returns the (T,) areas of an indexed triangle mesh"""
+    corners = positions[triangles]
+    return 0.5 * np.linalg.norm(np.cross(corners[:, 1] - corners[:, 0],
+                                         corners[:, 2] - corners[:, 0]),
+                                axis=1)
+
+
+def area_table(positions, triangles):
+    """returns the cumulative area table that sample_surface searches"""
+    return np.cumsum(triangle_areas(positions, triangles))
+
+
+def sample_surface(positions, normals, triangles, count, seed=None,
+                   table=None, values=None):
+    """Picks count points uniformly by area on an indexed triangle mesh.
+
+    Triangles are chosen by binary search of uniform draws in the
+    cumulative area table, then a point is placed with uniform
+    barycentric coordinates. Normals are the barycentric blend of the
+    vertex normals. Returns (positions, normals, triangle indices), and
+    the same blend of (V,K) per-vertex values when they are given."""
+    if table is None:
+        table = area_table(positions, triangles)
+    if count == 0 or not len(table) or table[-1] <= 0:
+        empty = (np.empty((0, 3)), np.empty((0, 3)),
+                 np.empty(0, dtype=np.int64))
+        if values is not None:
+            empty += (np.empty((0,) + values.shape[1:]),)
+        return empty
+    rng = np.random.default_rng(seed)
+    picked = np.searchsorted(table, rng.random(count) * table[-1],
+                             side="right")
+    picked = np.minimum(picked, len(table) - 1)
+    u, v = rng.random((2, count))
+    flip = u + v > 1
+    u[flip] = 1 - u[flip]
+    v[flip] = 1 - v[flip]
+    weights = np.stack((1 - u - v, u, v), axis=1)[:, :, np.newaxis]
+    corners = triangles[picked]
+    points = (positions[corners] * weights).sum(axis=1)
+    blended = (normals[corners] * weights).sum(axis=1)
+    lengths = np.linalg.norm(blended, axis=1)
+    lengths[lengths == 0] = 1.0
+    if values is not None:
+        return (points, blended / lengths[:, np.newaxis], picked,
+                (values[corners] * weights).sum(axis=1))
+    return points, blended / lengths[:, np.newaxis], picked
+
+
+def _ranges(starts, counts):
+    """returns the indices of every range starts[k]:starts[k]+counts[k],
+    one after the other"""
+    return np.repeat(starts, counts) + (
+        np.arange(counts.sum()) -
+        np.repeat(np.cumsum(counts) - counts, counts))
+
+
+def _grid_dims(points, origin, cell):
+    """returns how many cells of a grid of cell wide cubes from origin
+    span points on each axis, with one empty cell of padding around"""
+    return np.floor((points.max(axis=0) - origin) / cell).astype(
+        np.int64) + 3
+
+
+def _cell_keys(points, origin, cell, dims):
+    """returns the int64 key of every point's cell, so neighbouring
+    cells are a fixed step apart"""
+    cells = np.floor((points - origin) / cell).astype(np.int64) + 1
+    return (cells[:, 0] * dims[1] + cells[:, 1]) * dims[2] + cells[:, 2]
+
+
+def close_pairs(points, min_distance, radii=None):
+    """Returns (i, j) index arrays of every pair of points closer than
+    min_distance, found through a uniform grid spatial hash whose cells
+    are min_distance wide, so only neighbouring cells are compared.
+
+    With (N,) radii a pair counts as close when it is nearer than the
+    sum of its two radii instead; min_distance must then be at least
+    twice the largest radius. Radii far apart in size are better left
+    to overlap_pairs."""
+    origin = points.min(axis=0)
+    dims = _grid_dims(points, origin, min_distance)
+    keys = _cell_keys(points, origin, min_distance, dims)
+    order = np.argsort(keys, kind="stable")
+    sorted_keys = keys[order]
+    # the keys are sorted already, so cells start where the key changes
+    starts = np.flatnonzero(np.concatenate(
+        ([True], sorted_keys[1:] != sorted_keys[:-1])))
+    cell_keys = sorted_keys[starts]
+    counts = np.diff(np.append(starts, len(sorted_keys)))
+    limit = min_distance * min_distance
+    pairs_i = []
+    pairs_j = []
+    for offset in [(0, 0, 0)] + HALF_NEIGHBOURS:
+        step = (offset[0] * dims[1] + offset[1]) * dims[2] + offset[2]
+        found = np.searchsorted(cell_keys, cell_keys + step)
+        found = np.minimum(found, len(cell_keys) - 1)
+        hit = cell_keys[found] == cell_keys + step
+        src_cells = np.flatnonzero(hit)
+        dst_cells = found[hit]
+        # every point of a source cell against every point of its
+        # neighbour cell
+        src_counts = counts[src_cells]
+        dst_counts = counts[dst_cells]
+        per_point = np.repeat(dst_counts, src_counts)
+        src_points = _ranges(starts[src_cells], src_counts)
+        i = np.repeat(src_points, per_point)
+        j = _ranges(np.repeat(starts[dst_cells], src_counts), per_point)
+        if step == 0:
+            keep = i < j
+            i, j = i[keep], j[keep]
+        i, j = order[i], order[j]
+        delta = points[i] - points[j]
+        if radii is not None:
+            limit = radii[i] + radii[j]
+            limit *= limit
+        close = np.einsum("ij,ij->i", delta, delta) < limit
+        pairs_i.append(i[close])
+        pairs_j.append(j[close])
+    return np.concatenate(pairs_i), np.concatenate(pairs_j)
+
+
+def pairs_between(points, radii, query, target):
+    """Returns (i, j) index arrays of every query point i overlapping a
+    target point j, each a sphere of its radius.
+
+    The targets are hashed on a grid as wide as the largest query and
+    target radii together, and every query point looks through the 27
+    cells around its own, so small queries among large targets only
+    ever meet the few targets near them."""
+    cell = radii[query].max() + radii[target].max()
+    origin = points.min(axis=0)
+    dims = _grid_dims(points, origin, cell)
+    keys = _cell_keys(points[target], origin, cell, dims)
+    order = np.argsort(keys, kind="stable")
+    sorted_keys = keys[order]
+    # queries sharing a cell share their lookups
+    query_cells, inverse = np.unique(
+        _cell_keys(points[query], origin, cell, dims), return_inverse=True)
+    inverse = inverse.ravel()
+    pairs_i = []
+    pairs_j = []
+    for offset in NEIGHBOURS:
+        step = (offset[0] * dims[1] + offset[1]) * dims[2] + offset[2]
+        low = np.searchsorted(sorted_keys, query_cells + step, "left")
+        high = np.searchsorted(sorted_keys, query_cells + step, "right")
+        counts = (high - low)[inverse]
+        i = np.repeat(query, counts)
+        j = target[order[_ranges(low[inverse], counts)]]
+        delta = points[i] - points[j]
+        limit = radii[i] + radii[j]
+        close = np.einsum("ij,ij->i", delta, delta) < limit * limit
+        pairs_i.append(i[close])
+        pairs_j.append(j[close])
+    return np.concatenate(pairs_i), np.concatenate(pairs_j)
+
+
+def radius_levels(radii, ratio=LEVEL_RATIO):
+    """Returns the (N,) size level of (N,) radii: level k holds radii
+    from ratio**k up to ratio**(k+1) times the smallest one above zero,
+    and zero radii sit in level 0."""
+    positive = radii[radii > 0]
+    if positive.size == 0:
+        return np.zeros(len(radii), dtype=np.int64)
+    scale = np.maximum(radii, positive.min()) / positive.min()
+    return np.floor(np.log(scale) / np.log(ratio)).astype(np.int64)
+
+
+def overlap_pairs(points, radii):
+    """Returns (i, j) index arrays of every pair of spheres of (N,) radii
+    at points that overlap.
+
+    A single grid sized for the largest sphere would put hundreds of
+    small ones in a cell together when sizes are mixed, so the spheres
+    are split into radius_levels instead. Each level is paired within
+    itself by close_pairs on a grid sized for that level, then against
+    every larger level with pairs_between."""
+    levels = radius_levels(radii)
+    members = [np.flatnonzero(levels == level)
+               for level in np.unique(levels)]
+    pairs_i = []
+    pairs_j = []
+    for number, level in enumerate(members):
+        level_radii = radii[level]
+        i, j = close_pairs(points[level], 2 * level_radii.max(),
+                           level_radii)
+        pairs_i.append(level[i])
+        pairs_j.append(level[j])
+        for larger in members[number + 1:]:
+            i, j = pairs_between(points, radii, level, larger)
+            pairs_i.append(i)
+            pairs_j.append(j)
+    return np.concatenate(pairs_i), np.concatenate(pairs_j)
+
+
+def greedy_mask(count, pair_i, pair_j, priority):
+    """Keeps points so no kept pair (pair_i, pair_j) remains.
+
+    The result is what greedily keeping points in priority order would
+    give, built in rounds: each round keeps every point that outranks
+    all its undecided neighbours and drops those neighbours. Returns a
+    boolean keep mask."""
+    undecided = np.ones(count, dtype=bool)
+    keep = np.zeros(count, dtype=bool)
+    while pair_i.size:
+        live = undecided[pair_i] & undecided[pair_j]
+        pair_i, pair_j = pair_i[live], pair_j[live]
+        outranked = np.zeros(count, dtype=bool)
+        i_wins = priority[pair_i] > priority[pair_j]
+        outranked[np.where(i_wins, pair_j, pair_i)] = True
+        chosen = undecided & ~outranked
+        keep |= chosen
+        undecided &= ~chosen
+        undecided[pair_j[chosen[pair_i]]] = False
+        undecided[pair_i[chosen[pair_j]]] = False
+    return keep | undecided
+
+
+def poisson_disk_mask(points, min_distance, seed=None):
+    """Thins points so no two kept ones are closer than min_distance,
+    keeping them greedily in random priority order. Returns a boolean
+    keep mask."""
+    count = len(points)
+    if count == 0 or min_distance <= 0:
+        return np.ones(count, dtype=bool)
+    pair_i, pair_j = close_pairs(points, min_distance)
+    priority = np.random.default_rng(seed).random(count)
+    return greedy_mask(count, pair_i, pair_j, priority)
+
+
+def overlap_mask(points, radii, seed=None):
+    """Thins spheres of (N,) radii at points so no two kept ones overlap.
+
+    Overlapping pairs come from overlap_pairs, which stays close to
+    linear however mixed the sizes are. Spheres are kept greedily in
+    random priority order. Returns a boolean keep mask."""
+    count = len(points)
+    radii = np.broadcast_to(np.asarray(radii, dtype=np.float64), (count,))
+    if count == 0 or radii.max() <= 0:
+        return np.ones(count, dtype=bool)
+    pair_i, pair_j = overlap_pairs(points, radii)
+    priority = np.random.default_rng(seed).random(count)
+    return greedy_mask(count, pair_i, pair_j, priority)
@@ -0,0 +1,487 @@
+"""Scatter Tool dialog. Kept apart from scatter so Qt and Maya load only
+when the dialog is opened."""
+import logging
+
+from PySide2 import QtWidgets, QtCore
+from shiboken2 import wrapInstance
+import maya.OpenMayaUI as omUI
+
+import scatterdensity
+from scatter import Scatter
+
+log = logging.getLogger(__name__)
+
+# density combo box entries: label, DensityMap kind and what the name
+# box beside it holds
+DENSITY_MODES = (("Uniform", None, ""),
+                 ("Vertex colours", "color", "colour set, or current"),
+                 ("Vertex map", "map", "colour set holding the map"),
+                 ("Image", "image", "image path, .npy or via Pillow"))
+
+
+def maya_main_window():
+    """return the maya main window widget"""
+    main_window = omUI.MQtUtil.mainWindow()
+    return wrapInstance(int(main_window), QtWidgets.QWidget)
+
+
+class ScatterUI(QtWidgets.QDialog):
+    """ScatterTool UI Class"""
+
+    def __init__(self):
+        super(ScatterUI, self).__init__(parent=maya_main_window())
+        self.scat = Scatter()
+        self._steps = None
+        self.scatter_timer = QtCore.QTimer(self)
+        self.scatter_timer.setInterval(0)
+        self.setWindowTitle("Scatter Tool")
+        self.setMinimumWidth(500)
+        self.setMaximumHeight(400)
+        self.setWindowFlags(self.windowFlags() ^
+                            QtCore.Qt.WindowContextHelpButtonHint)
+        self.create_ui()
+        # Note: Need to code connections
+        self.create_connections()
+
+    def create_ui(self):
+        self.title_lbl = QtWidgets.QLabel("Scatter Tool")
+        self.title_lbl.setStyleSheet("font: bold 28px")
+        self.select_note = self._create_select_note()
+        self.button_lay = self._create_button_ui()
+        self.objchoose = self._create_obj_choose()
+        self.weightslay = self._create_source_weights()
+        self.randomscalecheck = self._create_random_scale_check()
+        self.randomscalemax = self._create_random_scale_max()
+        self.randomscalemin = self._create_random_scale_min()
+        self.randomrotatecheck = self._create_random_rotate_check()
+        self.randomrotationmax = self._create_random_rotation_max()
+        self.randomrotationmin = self._create_random_rotation_min()
+        self.randompercentage = self._create_random_percentage()
+        self.densitylay = self._create_density_map()
+        self.surfacesampling = self._create_surface_sampling()
+        self.normalcheckbox = self._create_normal_checkbox()
+        self.pushin = self._create_pushin()
+        self.seedlay = self._create_seed()
+        self.culllay = self._create_cull_check()
+        self.instancerlay = self._create_instancer_check()
+        self.progresslay = self._create_progress()
+        self.main_lay = QtWidgets.QVBoxLayout()
+        self.main_lay.addWidget(self.title_lbl)
+        self.main_lay.addStretch()
+        self.main_lay.addLayout(self.select_note)
+        self.main_lay.addLayout(self.objchoose)
+        self.main_lay.addLayout(self.weightslay)
+        self.main_lay.addLayout(self.randomscalecheck)
+        self.main_lay.addLayout(self.randomscalemax)
+        self.main_lay.addLayout(self.randomscalemin)
+        self.main_lay.addLayout(self.randomrotatecheck)
+        self.main_lay.addLayout(self.randomrotationmax)
+        self.main_lay.addLayout(self.randomrotationmin)
+        self.main_lay.addStretch()
+        self.main_lay.addLayout(self.randompercentage)
+        self.main_lay.addLayout(self.densitylay)
+        self.main_lay.addLayout(self.surfacesampling)
+        self.main_lay.addLayout(self.normalcheckbox)
+        self.main_lay.addLayout(self.pushin)
+        self.main_lay.addLayout(self.seedlay)
+        self.main_lay.addLayout(self.culllay)
+        self.main_lay.addLayout(self.instancerlay)
+        self.main_lay.addLayout(self.progresslay)
+        self.main_lay.addLayout(self.button_lay)
+        self.setLayout(self.main_lay)
+
+    def _create_select_note(self):
+        self.note = QtWidgets.QLabel("")
+        layout = QtWidgets.QHBoxLayout()
+        layout.addWidget(self.note)
+        return layout
+
+    def _create_random_rotate_check(self):
+        self.random_rot_checkbox = QtWidgets.QCheckBox()
+        self.random_rot_checkbox.setFixedWidth(15)
+        self.random_rot_checkbox_label = QtWidgets.QLabel("Rotate objects "
+                                                          "randomly?")
+        layout = QtWidgets.QHBoxLayout()
+        layout.addWidget(self.random_rot_checkbox)
+        layout.addWidget(self.random_rot_checkbox_label)
+        return layout
+
+    def _create_random_scale_check(self):
+        self.random_scale_checkbox = QtWidgets.QCheckBox()
+        self.random_scale_checkbox.setFixedWidth(15)
+        self.random_scale_checkbox_label = QtWidgets.QLabel("Scale objects "
+                                                            "randomly?")
+        layout = QtWidgets.QHBoxLayout()
+        layout.addWidget(self.random_scale_checkbox)
+        layout.addWidget(self.random_scale_checkbox_label)
+        return layout
+
+    def _create_random_rotation_max(self):
+        """creates a random rotation editable text box"""
+        self.random_rot_max_label_x = QtWidgets.QLabel("Random Rotation Max X")
+        self.random_rot_max_label_y = QtWidgets.QLabel("Random Rotation Max Y")
+        self.random_rot_max_label_z = QtWidgets.QLabel("Random Rotation Max Z")
+        self.rand_rot_max_x = QtWidgets.QLineEdit("180")
+        self.rand_rot_max_y = QtWidgets.QLineEdit("180")
+        self.rand_rot_max_z = QtWidgets.QLineEdit("180")
+        layout = QtWidgets.QHBoxLayout()
+        layout.addWidget(self.random_rot_max_label_x)
+        layout.addWidget(self.rand_rot_max_x)
+        layout.addWidget(self.random_rot_max_label_y)
+        layout.addWidget(self.rand_rot_max_y)
+        layout.addWidget(self.random_rot_max_label_z)
+        layout.addWidget(self.rand_rot_max_z)
+        return layout
+
+    def _create_random_rotation_min(self):
+        self.random_rot_min_label_x = QtWidgets.QLabel("Random Rotation Min X")
+        self.random_rot_min_label_y = QtWidgets.QLabel("Random Rotation Min Y")
+        self.random_rot_min_label_z = QtWidgets.QLabel("Random Rotation Min Z")
+        self.rand_rot_min_x = QtWidgets.QLineEdit("0")
+        self.rand_rot_min_y = QtWidgets.QLineEdit("0")
+        self.rand_rot_min_z = QtWidgets.QLineEdit("0")
+        layout = QtWidgets.QHBoxLayout()
+        layout.addWidget(self.random_rot_min_label_x)
+        layout.addWidget(self.rand_rot_min_x)
+        layout.addWidget(self.random_rot_min_label_y)
+        layout.addWidget(self.rand_rot_min_y)
+        layout.addWidget(self.random_rot_min_label_z)
+        layout.addWidget(self.rand_rot_min_z)
+        return layout
+
+    def _create_random_scale_max(self):
+        """creates a random scale editable text box"""
+        self.random_scale_max_label_x = QtWidgets.QLabel("Random Scale Max X")
+        self.random_scale_max_label_y = QtWidgets.QLabel("Random Scale Max Y")
+        self.random_scale_max_label_z = QtWidgets.QLabel("Random Scale Max Z")
+        self.rand_scale_max_x = QtWidgets.QLineEdit("2")
+        self.rand_scale_max_y = QtWidgets.QLineEdit("2")
+        self.rand_scale_max_z = QtWidgets.QLineEdit("2")
+        layout = QtWidgets.QHBoxLayout()
+        layout.addWidget(self.random_scale_max_label_x)
+        layout.addWidget(self.rand_scale_max_x)
+        layout.addWidget(self.random_scale_max_label_y)
+        layout.addWidget(self.rand_scale_max_y)
+        layout.addWidget(self.random_scale_max_label_z)
+        layout.addWidget(self.rand_scale_max_z)
+        return layout
+
+    def _create_random_scale_min(self):
+        self.random_scale_min_Label_x = QtWidgets.QLabel("Random Scale Min X")
+        self.random_scale_min_Label_y = QtWidgets.QLabel("Random Scale Min Y")
+        self.random_scale_min_Label_z = QtWidgets.QLabel("Random Scale Min Z")
+        self.rand_scale_min_x = QtWidgets.QLineEdit(".5")
+        self.rand_scale_min_y = QtWidgets.QLineEdit(".5")
+        self.rand_scale_min_z = QtWidgets.QLineEdit(".5")
+        layout = QtWidgets.QHBoxLayout()
+        layout.addWidget(self.random_scale_min_Label_x)
+        layout.addWidget(self.rand_scale_min_x)
+        layout.addWidget(self.random_scale_min_Label_y)
+        layout.addWidget(self.rand_scale_min_y)
+        layout.addWidget(self.random_scale_min_Label_z)
+        layout.addWidget(self.rand_scale_min_z)
+        return layout
+
+    def _create_random_percentage(self):
+        self.random_percentage_label = QtWidgets.QLabel("Percentage of "
+                                                        "Vertices to scatter "
+                                                        "to:")
+        self.random_percentage_label.setFixedWidth(183)
+        self.random_percentage = QtWidgets.QDoubleSpinBox()
+        self.random_percentage.setMaximum(100.00)
+        self.random_percentage.setMinimum(0.00)
+        self.random_percentage.setFixedWidth(80)
+        self.random_percentage.setValue(100.00)
+        self.percentage_label = QtWidgets.QLabel("%")
+        layout = QtWidgets.QHBoxLayout()
+        layout.addWidget(self.random_percentage_label)
+        layout.addWidget(self.random_percentage)
+        layout.addWidget(self.percentage_label)
+        return layout
+
+    def _create_density_map(self):
+        """creates the density map choice, scaling the percentage per
+        point by vertex colours, a vertex map or a UV mapped image"""
+        self.density_label = QtWidgets.QLabel("Density map:")
+        self.density_label.setFixedWidth(183)
+        self.density_combo = QtWidgets.QComboBox()
+        for label, kind, hint in DENSITY_MODES:
+            self.density_combo.addItem(label)
+        self.density_le = QtWidgets.QLineEdit()
+        self.density_le.setEnabled(False)
+        layout = QtWidgets.QHBoxLayout()
+        layout.addWidget(self.density_label)
+        layout.addWidget(self.density_combo)
+        layout.addWidget(self.density_le)
+        return layout
+
+    def _create_surface_sampling(self):
+        self.surfacecheck = QtWidgets.QCheckBox()
+        self.surfacecheck.setFixedWidth(15)
+        self.surfacecheck_label = QtWidgets.QLabel("Scatter across faces "
+                                                   "by area instead of "
+                                                   "onto vertices?")
+        self.min_distance = QtWidgets.QDoubleSpinBox()
+        self.min_distance.setMinimum(0.00)
+        self.min_distance.setMaximum(1000.00)
+        self.min_distance.setFixedWidth(100)
+        self.min_distance_label = QtWidgets.QLabel("min distance between "
+                                                   "objs")
+        layout = QtWidgets.QHBoxLayout()
+        layout.addWidget(self.surfacecheck)
+        layout.addWidget(self.surfacecheck_label)
+        layout.addWidget(self.min_distance)
+        layout.addWidget(self.min_distance_label)
+        return layout
+
+    def _create_normal_checkbox(self):
+        self.normalcheck = QtWidgets.QCheckBox()
+        self.normalchecklabel = QtWidgets.QLabel("Scatter objects to align "
+                                                 "with normals of the vertices"
+                                                 " they're scattered to?")
+        self.normalcheck.setFixedWidth(15)
+        layout = QtWidgets.QHBoxLayout()
+        layout.addWidget(self.normalcheck)
+        layout.addWidget(self.normalchecklabel)
+        return layout
+
+    def _create_pushin(self):
+        self.pushincheck = QtWidgets.QCheckBox()
+        self.pushincheck_label = QtWidgets.QLabel("Push scattered objs into "
+                                                  "their destination?")
+        self.pushin_length = QtWidgets.QDoubleSpinBox()
+        self.pushin_length_label = QtWidgets.QLabel("units they'll be "
+                                                    "pushed in")
+        self.pushincheck.setFixedWidth(15)
+        self.pushincheck_label.setFixedWidth(500)
+        self.pushin_length.setMinimum(-10.00)
+        self.pushin_length.setMaximum(10.00)
+        self.pushin_length.setFixedWidth(100)
+        layout = QtWidgets.QHBoxLayout()
+        layout.addWidget(self.pushincheck)
+        layout.addWidget(self.pushincheck_label)
+        layout.addWidget(self.pushin_length)
+        layout.addWidget(self.pushin_length_label)
+        return layout
+
+    def _create_seed(self):
+        """creates the seed controls; a seeded layout is reproducible and
+        lets a re-scatter reuse everything that didn't change"""
+        self.seedcheck = QtWidgets.QCheckBox()
+        self.seedcheck.setFixedWidth(15)
+        self.seedcheck_label = QtWidgets.QLabel("Use a fixed seed so "
+                                                "tweaks keep the layout?")
+        self.seed_sbx = QtWidgets.QSpinBox()
+        self.seed_sbx.setMaximum(999999)
+        self.seed_sbx.setFixedWidth(100)
+        layout = QtWidgets.QHBoxLayout()
+        layout.addWidget(self.seedcheck)
+        layout.addWidget(self.seedcheck_label)
+        layout.addWidget(self.seed_sbx)
+        return layout
+
+    def _create_obj_choose(self):
+        """This creates two combobox select menus for selecting recipient
+        and obj to scatter"""
+        self.to_scatter_label = QtWidgets.QLabel("Obj to Scatter:")
+        self.scatter_on_label = QtWidgets.QLabel("Obj/Vertices to Scatter On:")
+        self.to_scatter_line_edit = QtWidgets.QLineEdit()
+        self.obj_to_scatter_btn = QtWidgets.QPushButton("Select Object")
+        self.scatter_on_line_edit = QtWidgets.QLineEdit()
+        self.scatter_on = QtWidgets.QPushButton("Select Entire Selection")
+        layout = QtWidgets.QHBoxLayout()
+        layout.addWidget(self.to_scatter_label)
+        layout.addWidget(self.to_scatter_line_edit)
+        layout.addWidget(self.obj_to_scatter_btn)
+        layout.addWidget(self.scatter_on_label)
+        layout.addWidget(self.scatter_on_line_edit)
+        layout.addWidget(self.scatter_on)
+        return layout
+
+    def _create_source_weights(self):
+        """creates the weights box for scattering several selected
+        objects at once, one number per object"""
+        self.source_weights_label = QtWidgets.QLabel("Source weights:")
+        self.source_weights_le = QtWidgets.QLineEdit()
+        self.source_weights_le.setPlaceholderText("equal, or e.g. 3, 1, 1")
+        layout = QtWidgets.QHBoxLayout()
+        layout.addWidget(self.source_weights_label)
+        layout.addWidget(self.source_weights_le)
+        return layout
+
+    def _create_cull_check(self):
+        self.cullcheck = QtWidgets.QCheckBox()
+        self.cullcheck.setFixedWidth(15)
+        self.cullcheck_label = QtWidgets.QLabel("Remove instances whose "
+                                                "bounds overlap?")
+        layout = QtWidgets.QHBoxLayout()
+        layout.addWidget(self.cullcheck)
+        layout.addWidget(self.cullcheck_label)
+        return layout
+
+    def _create_instancer_check(self):
+        self.instancercheck = QtWidgets.QCheckBox()
+        self.instancercheck.setFixedWidth(15)
+        self.instancercheck_label = QtWidgets.QLabel("Scatter into a single "
+                                                     "instancer node?")
+        layout = QtWidgets.QHBoxLayout()
+        layout.addWidget(self.instancercheck)
+        layout.addWidget(self.instancercheck_label)
+        return layout
+
+    def _create_progress(self):
+        self.progress_bar = QtWidgets.QProgressBar()
+        self.progress_bar.setTextVisible(False)
+        self.progress_label = QtWidgets.QLabel("")
+        self.progress_label.setFixedWidth(260)
+        layout = QtWidgets.QHBoxLayout()
+        layout.addWidget(self.progress_bar)
+        layout.addWidget(self.progress_label)
+        return layout
+
+    def _create_button_ui(self):
+        self.scatter_btn = QtWidgets.QPushButton("Scatter")
+        self.bake_btn = QtWidgets.QPushButton("Bake Instancer")
+        self.cancel_btn = QtWidgets.QPushButton("Cancel")
+        layout = QtWidgets.QHBoxLayout()
+        layout.addWidget(self.scatter_btn)
+        layout.addWidget(self.bake_btn)
+        layout.addWidget(self.cancel_btn)
+        return layout
+
+    def create_connections(self):
+        """TO DO: CONNECT THE BUTTONS"""
+        self.cancel_btn.clicked.connect(self.cancel)
+
+        self.obj_to_scatter_btn.clicked.connect(self.select_scatter)
+
+        self.scatter_on.clicked.connect(self.select_to_scatter_verts)
+
+        self.scatter_btn.clicked.connect(self.scatter)
+
+        self.bake_btn.clicked.connect(self.bake)
+
+        self.scatter_timer.timeout.connect(self.scatter_step)
+
+        self.density_combo.currentIndexChanged.connect(
+            self.update_density_hint)
+
+    @QtCore.Slot()
+    def scatter(self):
+        self.scat.set_scale_and_rot_x(self.rand_scale_max_x.text(),
+                                      self.rand_scale_min_x.text(),
+                                      self.rand_rot_max_x.text(),
+                                      self.rand_rot_min_x.text())
+        self.scat.set_scale_and_rot_y(self.rand_scale_max_y.text(),
+                                      self.rand_scale_min_y.text(),
+                                      self.rand_rot_max_y.text(),
+                                      self.rand_rot_min_y.text())
+        self.scat.set_scale_and_rot_z(self.rand_scale_max_z.text(),
+                                      self.rand_scale_min_z.text(),
+                                      self.rand_rot_max_z.text(),
+                                      self.rand_rot_min_z.text())
+        self.scat.set_percentage(self.random_percentage.value())
+        self.scat.set_surface_sampling(self.surfacecheck.isChecked())
+        self.scat.set_min_distance(self.min_distance.value())
+        self.scat.set_checkbox_normals(self.normalcheck.isChecked())
+        self.scat.set_pushin(self.pushincheck.isChecked(),
+                             self.pushin_length.value())
+        self.scat.set_random_checks(self.random_rot_checkbox.isChecked(),
+                                    self.random_scale_checkbox.isChecked())
+        if self.seedcheck.isChecked():
+            self.scat.set_seed(self.seed_sbx.value())
+        else:
+            self.scat.set_seed(None)
+        self.scat.set_instancer_output(self.instancercheck.isChecked())
+        self.scat.set_overlap_culling(self.cullcheck.isChecked())
+        self.scat.set_density_map(self.density_map())
+        weights = self.source_weights_le.text().replace(",", " ").split()
+        self.scat.set_source_weights([float(weight) for weight in weights]
+                                     or None)
+        if self.scat.percentage_to_scatter_to == 0.00:
+            return
+        self._steps = self.scat.scatter_steps()
+        self.scatter_btn.setEnabled(False)
+        self.bake_btn.setEnabled(False)
+        self.progress_bar.setValue(0)
+        self.progress_label.setText("computing transforms...")
+        self.scatter_timer.start()
+
+    def density_map(self):
+        """returns the DensityMap the density fields describe, or None"""
+        label, kind, hint = DENSITY_MODES[self.density_combo.currentIndex()]
+        if kind is None:
+            return None
+        name = self.density_le.text().strip()
+        if kind == "image":
+            return scatterdensity.DensityMap(kind, image=name)
+        return scatterdensity.DensityMap(kind, name or None)
+
+    @QtCore.Slot()
+    def update_density_hint(self):
+        label, kind, hint = DENSITY_MODES[self.density_combo.currentIndex()]
+        self.density_le.setEnabled(kind is not None)
+        self.density_le.setPlaceholderText(hint)
+
+    @QtCore.Slot()
+    def scatter_step(self):
+        """writes the next batch of the running scatter; the timer calls
+        this between Qt events so the dialog stays live"""
+        try:
+            job = next(self._steps)
+        except StopIteration:
+            message = "{} instances".format(len(self.scat.last_scatter))
+            if self.scat.culled_count:
+                message += ", {} culled".format(self.scat.culled_count)
+            self._finish_scatter(message)
+            return
+        except Exception:
+            self._finish_scatter("scatter failed")
+            raise
+        self.progress_bar.setMaximum(max(job.total, 1))
+        self.progress_bar.setValue(job.done)
+        eta = job.eta
+        self.progress_label.setText("{}/{}  {:.0f}/s  ETA {}".format(
+            job.done, job.total, job.rate,
+            "-" if eta is None else "{:.0f}s".format(eta)))
+
+    def _finish_scatter(self, message):
+        self.scatter_timer.stop()
+        self._steps = None
+        self.scatter_btn.setEnabled(True)
+        self.bake_btn.setEnabled(True)
+        self.progress_label.setText(message)
+
+    @QtCore.Slot()
+    def bake(self):
+        """bakes the last instancer scatter into real instances"""
+        if self.scat.last_instancers:
+            self.scat.bake_instancer()
+
+    @QtCore.Slot()
+    def select_to_scatter_obj(self):
+        self.scatter_on_line_edit.setText(
+            self.scat.select_an_object_to_scatter_to())
+
+    @QtCore.Slot()
+    def select_to_scatter_verts(self):
+        # TODO create error thingie if user selected objs and then pressed
+        # this button
+        self.scatter_on_line_edit.setText(
+            self.scat.select_verts_to_scatter_to())
+
+    @QtCore.Slot()
+    def select_scatter(self):
+        self.to_scatter_line_edit.setText(self.scat.select_obj_to_scatter())
+
+    @QtCore.Slot()
+    def cancel(self):
+        """cancels a running scatter, leaving the scene as it was, or
+        quits the dialogue"""
+        if self._steps is None:
+            self.close()
+            return
+        steps = self._steps
+        self._finish_scatter("cancelled")
+        self.progress_bar.setValue(0)
+        steps.close()
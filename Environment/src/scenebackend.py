@@ -0,0 +1,108 @@
+"""Scene operations SceneFile needs, behind a small interface.
+
+SceneFile does its path work with pathlib and os and only talks to the
+host application through a SceneBackend: asking for the open scene's
+name, saving, renaming and opening. CmdsBackend does that with
+maya.cmds.file; FakeSceneBackend keeps a pretend scene and writes small
+text files, so the whole save and versioning logic runs without Maya."""
+import logging
+import os
+
+import lazyimport
+
+cmds = lazyimport.LazyModule("maya.cmds")
+
+log = logging.getLogger(__name__)
+
+FILE_TYPES = {".ma": "mayaAscii", ".mb": "mayaBinary"}
+
+
+class SceneBackend(object):
+    """What SceneFile needs from the application holding the scene."""
+
+    def scene_name(self):
+        """returns the path of the open scene, "" for an unsaved one"""
+        raise NotImplementedError
+
+    def workspace_root(self):
+        """returns the root folder of the current project"""
+        raise NotImplementedError
+
+    def save_as(self, path):
+        """Saves the open scene to path and makes it the scene's name.
+        Raises RuntimeError when the folder does not exist."""
+        raise NotImplementedError
+
+    def rename(self, path):
+        """changes the open scene's name without saving"""
+        raise NotImplementedError
+
+    def open(self, path):
+        """opens path, discarding unsaved changes"""
+        raise NotImplementedError
+
+
+class CmdsBackend(SceneBackend):
+    """Maya backend on maya.cmds.file, without pymel's wrappers."""
+
+    def scene_name(self):
+        return cmds.file(query=True, sceneName=True)
+
+    def workspace_root(self):
+        return cmds.workspace(query=True, rootDirectory=True)
+
+    def save_as(self, path):
+        path = str(path)
+        cmds.file(rename=path)
+        file_type = FILE_TYPES.get(os.path.splitext(path)[1], "mayaAscii")
+        return cmds.file(save=True, type=file_type)
+
+    def rename(self, path):
+        cmds.file(rename=str(path))
+
+    def open(self, path):
+        return cmds.file(str(path), open=True, force=True)
+
+
+class FakeSceneBackend(SceneBackend):
+    """Pretend scene for running SceneFile without Maya.
+
+    A save writes a short text file, numbered by how often the scene
+    was saved, and fails like Maya does when the folder is missing.
+    Saved and opened paths are kept on the object for inspection."""
+
+    def __init__(self, scene="", workspace=None, payload=b""):
+        self.scene = str(scene)
+        self.workspace = workspace or os.getcwd()
+        self.payload = payload
+        self.saves = []
+        self.opened = []
+
+    def scene_name(self):
+        return self.scene
+
+    def workspace_root(self):
+        return self.workspace
+
+    def save_as(self, path):
+        path = str(path)
+        if not os.path.isdir(os.path.dirname(path) or "."):
+            raise RuntimeError("folder of {} does not exist".format(path))
+        with open(path, "wb") as out_file:
+            out_file.write("//Fake scene, save {}\n".format(
+                len(self.saves) + 1).encode("utf-8"))
+            out_file.write(self.payload)
+        self.saves.append(path)
+        self.scene = path
+        return path
+
+    def rename(self, path):
+        self.scene = str(path)
+
+    def open(self, path):
+        path = str(path)
+        if not os.path.isfile(path):
+            raise RuntimeError("{} does not exist".format(path))
+        self.opened.append(path)
+        self.scene = path
+        return path
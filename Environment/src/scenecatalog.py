@@ -0,0 +1,283 @@
+"""Project-wide catalog of scene files in a local SQLite database.
+
+crawl() walks a scenes root and records every file that matches
+naming.SCENE_TEMPLATE with its size and mtime. Folder mtimes are stored
+too, and a re-crawl only lists folders whose mtime moved; unchanged
+folders are descended through the subfolders remembered from the last
+crawl. Adding, removing or renaming a scene changes its folder's mtime,
+but rewriting one in place does not, so sizes and mtimes of overwritten
+scenes stay stale until crawl(full=True).
+
+Each root gets its own database, named after a hash of its path. The
+newest version of every descriptor/task/ext is kept in its own table,
+refreshed for just the keys a crawl touched, so "latest version of every
+task" is a plain table read.
+
+Example:
+    python scenecatalog.py /proj/scenes --latest --task anim"""
+import argparse
+import collections
+import hashlib
+import logging
+import os
+import sqlite3
+import sys
+import time
+
+import chunkstore
+import lazyimport
+import naming
+
+cmds = lazyimport.LazyModule("maya.cmds")
+
+log = logging.getLogger(__name__)
+
+CATALOG_DIR = os.path.join(os.path.expanduser("~"), ".sfa_scripts",
+                           "catalog")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS folders (
+    path TEXT PRIMARY KEY,
+    parent TEXT,
+    mtime INTEGER
+);
+CREATE INDEX IF NOT EXISTS folders_parent ON folders (parent);
+CREATE TABLE IF NOT EXISTS scenes (
+    folder TEXT NOT NULL,
+    name TEXT NOT NULL,
+    descriptor TEXT NOT NULL,
+    task TEXT NOT NULL,
+    ver INTEGER NOT NULL,
+    ext TEXT NOT NULL,
+    size INTEGER,
+    mtime INTEGER,
+    PRIMARY KEY (folder, name)
+);
+CREATE INDEX IF NOT EXISTS scenes_version
+    ON scenes (descriptor, task, ext, ver);
+CREATE TABLE IF NOT EXISTS latest (
+    descriptor TEXT NOT NULL,
+    task TEXT NOT NULL,
+    ext TEXT NOT NULL,
+    ver INTEGER NOT NULL,
+    folder TEXT NOT NULL,
+    name TEXT NOT NULL,
+    PRIMARY KEY (descriptor, task, ext)
+);
+"""
+
+SceneRecord = collections.namedtuple(
+    "SceneRecord", "folder name descriptor task ver ext size mtime")
+
+CrawlStats = collections.namedtuple(
+    "CrawlStats", "scanned skipped scenes seconds")
+
+RECORD_COLUMNS = ", ".join(SceneRecord._fields)
+
+
+class SceneCatalog(object):
+    """Scenes under one root, kept in an SQLite file."""
+
+    def __init__(self, root, db_path=None, template=naming.SCENE_TEMPLATE):
+        self.root = os.path.abspath(str(root))
+        self.template = template
+        if db_path is None:
+            db_path = catalog_path(self.root)
+        if db_path != ":memory:" and not os.path.isdir(
+                os.path.dirname(db_path)):
+            os.makedirs(os.path.dirname(db_path))
+        self.db = sqlite3.connect(db_path)
+        self.db.executescript(SCHEMA)
+
+    def close(self):
+        self.db.close()
+
+    def crawl(self, full=False):
+        """Brings the catalog up to date with the disk, listing only the
+        folders that changed unless full is set. Returns CrawlStats."""
+        start = time.perf_counter()
+        scanned = skipped = 0
+        known = dict(self.db.execute("SELECT path, mtime FROM folders"))
+        touched = set()
+        pending = [self.root]
+        with self.db:
+            while pending:
+                folder = pending.pop()
+                try:
+                    mtime = os.stat(folder).st_mtime_ns
+                except OSError:
+                    touched.update(self._forget(folder))
+                    continue
+                if not full and known.get(folder) == mtime:
+                    skipped += 1
+                    pending.extend(path for path, in self.db.execute(
+                        "SELECT path FROM folders WHERE parent = ?",
+                        (folder,)))
+                    continue
+                scanned += 1
+                try:
+                    pending.extend(self._scan(folder, mtime, touched))
+                except OSError as err:
+                    log.warning("could not list %s: %s", folder, err)
+            self._update_latest(touched)
+        scenes = self.db.execute("SELECT COUNT(*) FROM scenes").fetchone()[0]
+        stats = CrawlStats(scanned, skipped, scenes,
+                           time.perf_counter() - start)
+        log.debug("crawled %s: %s", self.root, stats)
+        return stats
+
+    @staticmethod
+    def _subtree(folder):
+        """LIKE pattern, escaped with "!", for everything below folder"""
+        for char in "!%_":
+            folder = folder.replace(char, "!" + char)
+        return folder + os.sep + "%"
+
+    def _keys(self, where, params):
+        return self.db.execute(
+            "SELECT DISTINCT descriptor, task, ext FROM scenes WHERE "
+            "{}".format(where), params).fetchall()
+
+    def _scan(self, folder, mtime, touched):
+        """re-lists one folder, adding the descriptor/task/ext keys it had
+        or has to touched. Returns its subfolders."""
+        rows = []
+        subfolders = []
+        for entry in os.scandir(folder):
+            if entry.is_dir(follow_symlinks=False):
+                if entry.name != chunkstore.STORE_DIRNAME:
+                    subfolders.append(entry.path)
+                continue
+            # scenes kept in a chunk store are listed under their manifest
+            fields = self.template.parse(
+                entry.name[:-len(chunkstore.MANIFEST_EXT)]
+                if entry.name.endswith(chunkstore.MANIFEST_EXT)
+                else entry.name)
+            if fields is None:
+                continue
+            stat = entry.stat()
+            rows.append((folder, entry.name, fields["descriptor"],
+                         fields["task"], fields["ver"], fields["ext"],
+                         stat.st_size, stat.st_mtime_ns))
+        touched.update(self._keys("folder = ?", (folder,)))
+        touched.update((row[2], row[3], row[5]) for row in rows)
+        self.db.execute("DELETE FROM scenes WHERE folder = ?", (folder,))
+        self.db.executemany(
+            "INSERT INTO scenes ({}) VALUES (?, ?, ?, ?, ?, ?, ?, ?)".format(
+                RECORD_COLUMNS), rows)
+        gone = set(path for path, in self.db.execute(
+            "SELECT path FROM folders WHERE parent = ?", (folder,)))
+        for path in gone.difference(subfolders):
+            touched.update(self._forget(path))
+        parent = os.path.dirname(folder) if folder != self.root else None
+        self.db.execute(
+            "INSERT OR REPLACE INTO folders (path, parent, mtime) "
+            "VALUES (?, ?, ?)", (folder, parent, mtime))
+        return subfolders
+
+    def _forget(self, folder):
+        """drops a folder and everything below it, returning the keys of
+        the scenes that went with it"""
+        subtree = self._subtree(folder)
+        keys = self._keys("folder = ? OR folder LIKE ? ESCAPE '!'",
+                          (folder, subtree))
+        self.db.execute("DELETE FROM scenes WHERE folder = ? OR folder "
+                        "LIKE ? ESCAPE '!'", (folder, subtree))
+        self.db.execute("DELETE FROM folders WHERE path = ? OR path "
+                        "LIKE ? ESCAPE '!'", (folder, subtree))
+        return keys
+
+    def _update_latest(self, keys):
+        """recomputes the latest table rows of the given keys"""
+        for key in keys:
+            self.db.execute("DELETE FROM latest WHERE descriptor = ? AND "
+                            "task = ? AND ext = ?", key)
+            self.db.execute(
+                "INSERT INTO latest (descriptor, task, ext, ver, folder, "
+                "name) SELECT descriptor, task, ext, ver, folder, name "
+                "FROM scenes WHERE descriptor = ? AND task = ? AND ext = ? "
+                "ORDER BY ver DESC LIMIT 1", key)
+
+    def _query(self, sql, params):
+        return [SceneRecord(*row) for row in self.db.execute(sql, params)]
+
+    @staticmethod
+    def _where(descriptor=None, task=None, ext=None, table="scenes"):
+        clauses = ["1"]
+        params = []
+        for column, value in (("descriptor", descriptor), ("task", task),
+                              ("ext", ext)):
+            if value is not None:
+                clauses.append("{}.{} = ?".format(table, column))
+                params.append(value)
+        return " AND ".join(clauses), params
+
+    def find(self, descriptor=None, task=None, ext=None):
+        """returns every matching scene, oldest version first"""
+        where, params = self._where(descriptor, task, ext)
+        return self._query(
+            "SELECT {} FROM scenes WHERE {} ORDER BY descriptor, task, ext, "
+            "ver".format(RECORD_COLUMNS, where), params)
+
+    def latest_versions(self, descriptor=None, task=None, ext=None):
+        """returns the newest scene of every descriptor/task/ext"""
+        where, params = self._where(descriptor, task, ext, table="latest")
+        return self._query(
+            "SELECT {} FROM latest JOIN scenes USING (folder, name) WHERE "
+            "{} ORDER BY latest.descriptor, latest.task, latest.ext".format(
+                ", ".join("scenes." + column
+                          for column in SceneRecord._fields), where), params)
+
+    def latest_version(self, descriptor, task, ext):
+        """returns the highest version number, 0 when there is none"""
+        row = self.db.execute(
+            "SELECT ver FROM latest WHERE descriptor = ? AND task = ? AND "
+            "ext = ?", (descriptor, task, ext)).fetchone()
+        return row[0] if row else 0
+
+
+def catalog_path(root, catalog_dir=CATALOG_DIR):
+    """returns the database file of the catalog of root"""
+    name = hashlib.sha1(os.path.abspath(str(root)).encode("utf-8"))
+    return os.path.join(catalog_dir, name.hexdigest() + ".sqlite")
+
+
+def workspace_catalog(db_path=None):
+    """returns the catalog of the current Maya workspace's scenes folder,
+    the folder SmartSaveUI saves to by default"""
+    root = cmds.workspace(rootDirectory=True, query=True)
+    return SceneCatalog(os.path.join(root, "scenes"), db_path)
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(
+        description="Crawl a scenes root and query its scene catalog.")
+    parser.add_argument("root", help="scenes folder to crawl")
+    parser.add_argument("--db", default=None,
+                        help="database file, one per root in {} by "
+                             "default".format(CATALOG_DIR))
+    parser.add_argument("--full", action="store_true",
+                        help="re-list every folder")
+    parser.add_argument("--latest", action="store_true",
+                        help="print the latest version of every task")
+    parser.add_argument("--descriptor", default=None)
+    parser.add_argument("--task", default=None)
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    logging.basicConfig(level=logging.INFO)
+    catalog = SceneCatalog(args.root, args.db)
+    stats = catalog.crawl(full=args.full)
+    log.info("%d scenes, %d folders listed, %d unchanged, %.3f s",
+             stats.scenes, stats.scanned, stats.skipped, stats.seconds)
+    if args.latest:
+        for record in catalog.latest_versions(args.descriptor, args.task):
+            print(os.path.join(record.folder, record.name))
+    catalog.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
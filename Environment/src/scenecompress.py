@@ -0,0 +1,108 @@
+"""Streaming compression of Maya ascii scenes.
+
+Scenes are compressed to "<name>.ma.gz" with gzip or "<name>.ma.zst" with
+zstd, when the zstandard package is installed. Both directions stream in
+BLOCK_SIZE pieces, so memory stays bounded however large the scene is,
+and write through a temporary file that is renamed into place."""
+import gzip
+import importlib.util
+import logging
+import os
+import uuid
+
+import lazyimport
+import naming
+
+zstandard = lazyimport.LazyModule("zstandard")
+
+log = logging.getLogger(__name__)
+
+BLOCK_SIZE = 4 * 1024 * 1024
+
+DEFAULT_LEVELS = {".gz": 1, ".zst": 3}
+LEVEL_RANGES = {".gz": (1, 9), ".zst": (1, 19)}
+
+
+def has_zstandard():
+    """whether the zstandard package is installed, without importing it"""
+    return importlib.util.find_spec("zstandard") is not None
+
+
+def available_compressions():
+    """returns the compression extensions that can be used here"""
+    return tuple(ext for ext in naming.COMPRESSION_EXTS
+                 if ext != ".zst" or has_zstandard())
+
+
+def _check(compression):
+    if compression not in naming.COMPRESSION_EXTS:
+        raise ValueError("unknown compression {!r}".format(compression))
+    if compression == ".zst" and not has_zstandard():
+        raise RuntimeError("zstd compression needs the zstandard package")
+
+
+def open_writer(raw_file, compression, level=None):
+    """wraps a binary file object in a compressing writer"""
+    _check(compression)
+    if level is None:
+        level = DEFAULT_LEVELS[compression]
+    if compression == ".gz":
+        # mtime 0 keeps the output identical for identical scenes
+        return gzip.GzipFile(fileobj=raw_file, mode="wb",
+                             compresslevel=level, mtime=0)
+    return zstandard.ZstdCompressor(level=level).stream_writer(
+        raw_file, closefd=False)
+
+
+def open_reader(raw_file, compression):
+    """wraps a binary file object in a decompressing reader"""
+    _check(compression)
+    if compression == ".gz":
+        return gzip.GzipFile(fileobj=raw_file, mode="rb")
+    return zstandard.ZstdDecompressor().stream_reader(raw_file,
+                                                      closefd=False)
+
+
+def _copy(in_file, out_file, block_size):
+    copied = 0
+    for block in iter(lambda: in_file.read(block_size), b""):
+        out_file.write(block)
+        copied += len(block)
+    return copied
+
+
+def compress_file(src_path, dest_path, compression, level=None,
+                  block_size=BLOCK_SIZE):
+    """streams src_path into a compressed dest_path, returns the bytes
+    read"""
+    tmp_path = "{}.{}.tmp".format(dest_path, uuid.uuid4().hex)
+    try:
+        with open(src_path, "rb", buffering=block_size) as in_file, \
+                open(tmp_path, "wb", buffering=block_size) as raw_file:
+            with open_writer(raw_file, compression, level) as out_file:
+                copied = _copy(in_file, out_file, block_size)
+        os.replace(tmp_path, dest_path)
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+    log.debug("compressed %d bytes to %s", copied, dest_path)
+    return copied
+
+
+def decompress_file(src_path, dest_path, compression=None,
+                    block_size=BLOCK_SIZE):
+    """streams a compressed src_path back out to dest_path; compression
+    defaults to src_path's extension"""
+    if compression is None:
+        compression = os.path.splitext(str(src_path))[1]
+    tmp_path = "{}.{}.tmp".format(dest_path, uuid.uuid4().hex)
+    try:
+        with open(src_path, "rb", buffering=block_size) as raw_file, \
+                open(tmp_path, "wb", buffering=block_size) as out_file:
+            with open_reader(raw_file, compression) as in_file:
+                copied = _copy(in_file, out_file, block_size)
+        os.replace(tmp_path, dest_path)
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+    return copied
@@ -1,20 +1,33 @@
 import logging
+import os
+import tempfile
+from pathlib import Path
 
-import pymel.core as pnc
-from pymel.core.system import Path
+import chunkstore
+import naming
+import scenebackend
+import scenecompress
+import versionindex
 
 log = logging.getLogger(__name__)
 
 
 class SceneFile(object):
-    """An abstract representation of a Scene file."""
-    def __init__(self, path=None):
-        self.folder_path = Path()
+    """An abstract representation of a Scene file. The scene itself is
+    saved and opened through backend, maya.cmds by default."""
+    # the task of a new scene
+    DEFAULT_TASK = None
+
+    def __init__(self, path=None, backend=None):
+        self.backend = backend or scenebackend.CmdsBackend()
+        self.folder_path = self.default_folder()
         self.descriptor = 'main'
-        self.task = None
+        self.task = self.DEFAULT_TASK
         self.ver = 1
         self.ext = '.ma'
-        scene = pnc.system.sceneName()
+        self.compression = ''
+        self.compression_level = None
+        scene = self.backend.scene_name()
         if not path:
             path = scene
         if not path and not scene:
@@ -23,62 +36,198 @@ class SceneFile(object):
             return
         self._init_from_path(path)
 
+    def default_folder(self):
+        """returns the folder of a new scene"""
+        return Path()
+
+    @property
+    def folder_path(self):
+        return self._folder_path
+
+    @folder_path.setter
+    def folder_path(self, val):
+        self._folder_path = Path(val)
+
     @property
     def filename(self):
         """returns properly formatted filename"""
-        pattern = "{descriptor}_{task}_v{ver:03d}{ext}"
-        return pattern.format(descriptor=self.descriptor,
-                              task=self.task,
-                              ver=self.ver,
-                              ext=self.ext)
+        return naming.SCENE_TEMPLATE.format(descriptor=self.descriptor,
+                                            task=self.task,
+                                            ver=self.ver,
+                                            ext=self.ext,
+                                            compression=self.compression)
 
     @property
     def path(self):
         """returns path of file"""
         return self.folder_path / self.filename
 
+    @property
+    def plain_path(self):
+        """returns path without the compression extension, the name Maya
+        keeps for the open scene so a plain save never writes ascii into
+        a compressed file"""
+        return self.folder_path / naming.SCENE_TEMPLATE.format(
+            descriptor=self.descriptor, task=self.task, ver=self.ver,
+            ext=self.ext)
+
     def _init_from_path(self, path):
         """creates the necessary variables from a path"""
         path = Path(path)
+        fields = naming.SCENE_TEMPLATE.parse(path.name)
+        if fields is None:
+            raise ValueError("{} does not match {}".format(
+                path.name, naming.SCENE_TEMPLATE.pattern))
         self.folder_path = path.parent
-        self.ext = path.ext
-        self.descriptor, self.task, ver = path.name.stripext().split("_")
-        self.ver = int(ver.split("v")[-1])
+        self.ext = fields["ext"]
+        self.descriptor = fields["descriptor"]
+        self.task = fields["task"]
+        self.ver = fields["ver"]
+        self.compression = fields["compression"]
 
-    def save(self):
-        """saves current scene file"""
+    def save(self, pipeline=None, store=None):
+        """Saves current scene file. With a savepipeline.SavePipeline the
+        scene is written to local scratch and published to path in the
+        background; returns the publishing future in that case. With a
+        chunkstore.ChunkStore only the chunks the store lacks are written,
+        plus a manifest next to path; returns the manifest path."""
+        if store is not None:
+            return self._save_chunked(store)
+        if pipeline is not None:
+            return self._save_staged(pipeline)
+        if self.compression:
+            return self._save_compressed()
         try:
-            return pnc.system.saveAs(self.path)
+            result = self.backend.save_as(self.path)
         except RuntimeError as err:
             log.warning("missing directories in path. Creating folders...")
-            self.folder_path.makedirs_p()
-            return pnc.system.saveAs(self.path)
+            self.folder_path.mkdir(parents=True, exist_ok=True)
+            result = self.backend.save_as(self.path)
+        self._record_version()
+        self._index().release(self.descriptor, self.task, self.ext,
+                              self.ver)
+        return result
+
+    def _save_staged(self, pipeline):
+        """writes the scene to scratch and queues it for publishing"""
+        dest_path = self.path
+        scratch_path = pipeline.scratch_path_for(self.plain_path)
+        self.backend.save_as(scratch_path)
+        self.backend.rename(self.plain_path)
+        if self.compression:
+            # publish the compressed scene, it is the smaller transfer
+            plain_scratch = scratch_path
+            scratch_path = plain_scratch + self.compression
+            scenecompress.compress_file(plain_scratch, scratch_path,
+                                        self.compression,
+                                        self.compression_level)
+            os.remove(plain_scratch)
+        # claim the version now so an increment save made while this one
+        # is still copying doesn't pick the same number
+        self._record_version()
+        index = self._index()
+        version = (self.descriptor, self.task, self.ext, self.ver)
+        return pipeline.submit(
+            scratch_path, dest_path,
+            on_done=lambda staged: index.release(
+                *version, saved=staged.state == staged.DONE))
+
+    def _save_compressed(self):
+        """writes the scene to scratch and streams it through the
+        compressor into path"""
+        handle, scratch_path = tempfile.mkstemp(suffix=self.ext)
+        os.close(handle)
+        try:
+            self.backend.save_as(scratch_path)
+            self.backend.rename(self.plain_path)
+            self.folder_path.mkdir(parents=True, exist_ok=True)
+            scenecompress.compress_file(scratch_path, self.path,
+                                        self.compression,
+                                        self.compression_level)
+        finally:
+            os.remove(scratch_path)
+        self._record_version()
+        self._index().release(self.descriptor, self.task, self.ext,
+                              self.ver)
+        return self.path
+
+    def _save_chunked(self, store):
+        """writes the scene to scratch and stores it as chunks. The chunks
+        are compressed by the store, so the scene is stored as plain
+        ascii whatever its compression."""
+        handle, scratch_path = tempfile.mkstemp(suffix=self.ext)
+        os.close(handle)
+        try:
+            self.backend.save_as(scratch_path)
+            self.backend.rename(self.plain_path)
+            self.folder_path.mkdir(parents=True, exist_ok=True)
+            manifest = chunkstore.manifest_path(self.plain_path)
+            store.save(scratch_path, manifest)
+        finally:
+            os.remove(scratch_path)
+        self._record_version()
+        self._index().release(self.descriptor, self.task, self.ext,
+                              self.ver)
+        return manifest
+
+    def open(self, store=None):
+        """Opens the scene, streaming a compressed one out to a temporary
+        file first. A scene saved only as a chunk store manifest is
+        rebuilt from store, the one kept in its folder by default, into
+        a temporary file first."""
+        manifest = chunkstore.manifest_path(self.plain_path)
+        if not self.path.exists() and os.path.exists(manifest):
+            return self._open_chunked(
+                store or chunkstore.store_for(self.folder_path), manifest)
+        if not self.compression:
+            return self.backend.open(self.path)
+        handle, scratch_path = tempfile.mkstemp(suffix=self.ext)
+        os.close(handle)
+        try:
+            scenecompress.decompress_file(self.path, scratch_path,
+                                          self.compression)
+            result = self.backend.open(scratch_path)
+            self.backend.rename(self.plain_path)
+        finally:
+            os.remove(scratch_path)
+        return result
+
+    def _open_chunked(self, store, manifest):
+        """rebuilds the scene from its manifest in scratch and opens it"""
+        handle, scratch_path = tempfile.mkstemp(suffix=self.ext)
+        os.close(handle)
+        try:
+            store.restore(manifest, scratch_path)
+            result = self.backend.open(scratch_path)
+            self.backend.rename(self.plain_path)
+        finally:
+            os.remove(scratch_path)
+        return result
+
+    def _index(self):
+        return versionindex.get_index(self.folder_path)
+
+    def _record_version(self):
+        """tells the version index about a version this session saved"""
+        self._index().record(self.descriptor, self.task, self.ext, self.ver)
 
     def next_avail_ver(self):
         """return next available version num in folder"""
-        pattern = "{descriptor}_{task}_v*{ext}".format(
-            descriptor=self.descriptor,
-            task=self.task,
-            ext=self.ext)
-        matching_scenefiles = []
-        for file_ in self.folder_path.files():
-            if file_.name.fnmatch(pattern):
-                matching_scenefiles.append(file_)
-        if not matching_scenefiles:
-            return 1
-        matching_scenefiles.sort(reverse=True)
-        latest_scenefile = matching_scenefiles[0]
-        latest_scenefile = latest_scenefile.name.stripext()
-        latest_version_num = int(latest_scenefile.split("_v")[-1])
-        return latest_version_num + 1
-
-    def increment_save(self):
+        return self._index().latest(self.descriptor, self.task,
+                                    self.ext) + 1
+
+    def increment_save(self, pipeline=None, store=None):
         """Increments version and saves scene file
         should increment from largest version number in folder.
+        The version is reserved before saving so concurrent savers
+        never get the same one, and released again if the save fails.
         Returns path of scene file if successful"""
-        self.ver = self.next_avail_ver()
-        self.save()
-
+        index = self._index()
+        self.ver = index.reserve(self.descriptor, self.task, self.ext)
+        try:
+            return self.save(pipeline, store)
+        except Exception:
+            index.release(self.descriptor, self.task, self.ext, self.ver,
+                          saved=False)
+            raise
 
-scene_file = SceneFile("C/noname_notask_v000.ma")
-#print(scene_file.path())
\ No newline at end of file
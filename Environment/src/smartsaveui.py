@@ -0,0 +1,229 @@
+"""SmartSave dialog. Kept apart from smartsave so Qt and Maya load only
+when the dialog is opened."""
+import logging
+import os
+
+from PySide2 import QtWidgets, QtCore
+from shiboken2 import wrapInstance
+import maya.OpenMayaUI as omui
+import maya.cmds as cmds
+
+import chunkstore
+import savepipeline
+import scenecompress
+from smartsave import SceneFile
+
+
+log = logging.getLogger(__name__)
+
+
+def maya_main_window():
+    """return the maya main window widget"""
+    main_window = omui.MQtUtil.mainWindow()
+    return wrapInstance(int(main_window), QtWidgets.QWidget)
+
+
+class SmartSaveUI(QtWidgets.QDialog):
+    """SmartSave UI Class"""
+    def __init__(self):
+        super(SmartSaveUI, self).__init__(parent=maya_main_window())
+        self.setWindowTitle("Smart Save")
+        self.setMinimumWidth(500)
+        self.setMaximumHeight(200)
+        self.setWindowFlags(self.windowFlags() ^
+                            QtCore.Qt.WindowContextHelpButtonHint)
+        self.scenefile = SceneFile()
+        self.pipeline = savepipeline.SavePipeline()
+        self.create_ui()
+        self.create_connections()
+        self.publish_timer = QtCore.QTimer(self)
+        self.publish_timer.setInterval(100)
+        self.publish_timer.timeout.connect(self.update_publish_progress)
+
+    def create_ui(self):
+        self.title_lbl = QtWidgets.QLabel("Smart Save")
+        self.title_lbl.setStyleSheet("font: bold 28px")
+        self.folder_lay = self._create_folder_ui()
+        self.filename_lay = self._create_filename_ui()
+        self.storage_lay = self._create_storage_ui()
+        self.progress_lay = self._create_progress_ui()
+        self.button_lay = self._create_button_ui()
+        self.main_lay = QtWidgets.QVBoxLayout()
+        self.main_lay.addWidget(self.title_lbl)
+        self.main_lay.addLayout(self.folder_lay)
+        self.main_lay.addLayout(self.filename_lay)
+        self.main_lay.addLayout(self.storage_lay)
+        self.main_lay.addStretch()
+        self.main_lay.addLayout(self.progress_lay)
+        self.main_lay.addLayout(self.button_lay)
+        self.setLayout(self.main_lay)
+
+    def _create_button_ui(self):
+        self.save_btn = QtWidgets.QPushButton("Save")
+        self.save_increment_btn = QtWidgets.QPushButton("Save Increment")
+        self.cancel_btn = QtWidgets.QPushButton("Cancel")
+        layout = QtWidgets.QHBoxLayout()
+        layout.addWidget(self.save_btn)
+        layout.addWidget(self.save_increment_btn)
+        layout.addWidget(self.cancel_btn)
+        return layout
+
+    def _create_storage_ui(self):
+        self.chunked_cbx = QtWidgets.QCheckBox("Deduplicated storage")
+        self.chunked_cbx.setToolTip(
+            "Store versions as shared chunks plus a manifest instead of "
+            "full copies")
+        layout = QtWidgets.QHBoxLayout()
+        layout.addWidget(self.chunked_cbx)
+        layout.addStretch()
+        return layout
+
+    def _create_progress_ui(self):
+        self.publish_lbl = QtWidgets.QLabel("")
+        self.publish_bar = QtWidgets.QProgressBar()
+        self.publish_bar.setRange(0, 100)
+        self.publish_bar.setValue(0)
+        self.publish_bar.setVisible(False)
+        layout = QtWidgets.QHBoxLayout()
+        layout.addWidget(self.publish_lbl)
+        layout.addWidget(self.publish_bar)
+        return layout
+
+    def _create_filename_ui(self):
+        layout = self._create_filename_headers()
+        self.descriptor_le = QtWidgets.QLineEdit(self.scenefile.descriptor)
+        self.descriptor_le.setMinimumWidth(100)
+        self.task_le = QtWidgets.QLineEdit(self.scenefile.task)
+        self.task_le.setFixedWidth(50)
+        self.ver_sbx = QtWidgets.QSpinBox()
+        self.ver_sbx.setButtonSymbols(QtWidgets.QAbstractSpinBox.PlusMinus)
+        self.ver_sbx.setFixedWidth(50)
+        self.ver_sbx.setValue(self.scenefile.ver)
+        self.ext_cmb = QtWidgets.QComboBox()
+        for compression in ("",) + scenecompress.available_compressions():
+            self.ext_cmb.addItem(".ma" + compression, compression)
+        index = self.ext_cmb.findData(self.scenefile.compression)
+        self.ext_cmb.setCurrentIndex(max(index, 0))
+        self.level_sbx = QtWidgets.QSpinBox()
+        self.level_sbx.setToolTip("Compression level")
+        self.level_sbx.setFixedWidth(50)
+        self._update_level_range()
+        layout.addWidget(self.descriptor_le, 1, 0)
+        layout.addWidget(QtWidgets.QLabel("_"), 1, 1)
+        layout.addWidget(self.task_le, 1, 2)
+        layout.addWidget(QtWidgets.QLabel("_V"), 1, 3)
+        layout.addWidget(self.ver_sbx, 1, 4)
+        layout.addWidget(self.ext_cmb, 1, 5)
+        layout.addWidget(self.level_sbx, 1, 6)
+        return layout
+
+    @QtCore.Slot()
+    def _update_level_range(self):
+        """fits the level spinbox to the chosen compression"""
+        compression = self.ext_cmb.currentData()
+        self.level_sbx.setEnabled(bool(compression))
+        if compression:
+            self.level_sbx.setRange(*scenecompress.LEVEL_RANGES[compression])
+            self.level_sbx.setValue(
+                scenecompress.DEFAULT_LEVELS[compression])
+
+    def _create_filename_headers(self):
+        self.descriptor_header_lbl = QtWidgets.QLabel("Descriptor")
+        self.descriptor_header_lbl.setStyleSheet("font: bold")
+        self.task_header_lbl = QtWidgets.QLabel("Task")
+        self.task_header_lbl.setStyleSheet("font: bold")
+        self.ver_header_lbl = QtWidgets.QLabel("Version")
+        self.ver_header_lbl.setStyleSheet("font: bold")
+        layout = QtWidgets.QGridLayout()
+        layout.addWidget(self.descriptor_header_lbl, 0, 0)
+        layout.addWidget(self.task_header_lbl, 0, 2)
+        layout.addWidget(self.ver_header_lbl, 0, 4)
+        return layout
+
+    def _create_folder_ui(self):
+        default_folder = os.path.join(
+            self.scenefile.backend.workspace_root(), "scenes")
+        self.folder_le = QtWidgets.QLineEdit(default_folder)
+        self.folder_browse_btn = QtWidgets.QPushButton("...")
+        layout = QtWidgets.QHBoxLayout()
+        layout.addWidget(self.folder_le)
+        layout.addWidget(self.folder_browse_btn)
+        return layout
+
+    def create_connections(self):
+        """connect our widget signals to slots"""
+        self.cancel_btn.clicked.connect(self.cancel)
+        self.folder_browse_btn.clicked.connect(self.browse_folder)
+        self.save_btn.clicked.connect(self._save)
+        self.save_increment_btn.clicked.connect(self._save_increment)
+        self.ext_cmb.currentIndexChanged.connect(self._update_level_range)
+
+    @QtCore.Slot()
+    def _save_increment(self):
+        """Save an increment of the scene"""
+        self._set_scenefile_properties_from_ui()
+        self.scenefile.increment_save(self.pipeline, self._store())
+        self.ver_sbx.setValue(self.scenefile.ver)
+        self._start_publish_progress()
+
+    @QtCore.Slot()
+    def _save(self):
+        """Save the scene"""
+        self._set_scenefile_properties_from_ui()
+        self.scenefile.save(self.pipeline, self._store())
+        self._start_publish_progress()
+
+    def _store(self):
+        """returns the folder's chunk store if deduplication is on"""
+        if not self.chunked_cbx.isChecked():
+            return None
+        return chunkstore.store_for(self.scenefile.folder_path)
+
+    def _start_publish_progress(self):
+        self.publish_bar.setVisible(True)
+        self.publish_timer.start()
+        self.update_publish_progress()
+
+    @QtCore.Slot()
+    def update_publish_progress(self):
+        """shows how far the background publishing has got"""
+        for staged in self.pipeline.forget_finished():
+            cmds.warning("Could not publish {}, the scene is still in "
+                         "{}".format(staged.dest_path, staged.scratch_path))
+        pending = self.pipeline.pending()
+        if not pending:
+            self.publish_timer.stop()
+            self.publish_bar.setVisible(False)
+            self.publish_lbl.setText("")
+            return
+        copied, total = self.pipeline.progress()
+        self.publish_lbl.setText("Publishing {} scene(s)...".format(
+            len(pending)))
+        self.publish_bar.setValue(int(100.0 * copied / total) if total
+                                  else 0)
+
+    def _set_scenefile_properties_from_ui(self):
+        self.scenefile.folder_path = self.folder_le.text()
+        self.scenefile.descriptor = self.descriptor_le.text()
+        self.scenefile.task = self.task_le.text()
+        self.scenefile.ver = self.ver_sbx.value()
+        self.scenefile.ext = ".ma"
+        self.scenefile.compression = self.ext_cmb.currentData()
+        self.scenefile.compression_level = (self.level_sbx.value()
+                                            if self.level_sbx.isEnabled()
+                                            else None)
+
+    def browse_folder(self):
+        """Open a dialogue box to browse the folder"""
+        folder = QtWidgets.QFileDialog.getExistingDirectory(
+            parent=self,
+            caption="Select Directory",
+            dir=self.folder_le.text(),
+            options=QtWidgets.QFileDialog.ShowDirsOnly |
+                    QtWidgets.QFileDialog.DontResolveSymlinks)
+        self.folder_le.setText(folder)
+
+    @QtCore.Slot()
+    def cancel(self):
+        """quits the dialogue"""
+        self.close()
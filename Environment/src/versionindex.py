@@ -0,0 +1,354 @@
+"""Highest saved version per descriptor/task/extension of a scenes folder.
+
+next_avail_ver used to list, fnmatch and sort the whole folder on every
+increment save. The index keeps the highest version number of every
+descriptor/task/ext and only rescans, in one os.scandir pass, when the
+folder's mtime moves. It is kept on disk in the user's home so a new
+Maya session starts warm.
+
+Other artists saving into the same folder change its mtime, which
+triggers a rescan. Network filesystems can have coarse mtimes, so before
+a version is handed out the index also checks that the file does not
+exist yet. A compressed scene counts towards its uncompressed extension,
+so "a_b_v003.ma.gz" and "a_b_v003.ma" are the same version.
+
+Increment saves claim their version with reserve(), which creates a
+hidden ".<scene name>.reserved" marker next to the scene with O_EXCL.
+Only one process can create a given marker, so two savers racing for
+the same version can never both get it; the loser moves on to the next
+number. No lock is held, so hundreds of savers only cost each other a
+retry per collision. Markers count as saved versions when scanning and
+are released once the scene is in place, or when the save fails.
+
+A marker holds the host and pid of the session that made it, and a
+nonce. One left behind by a crashed session is stale once that process
+is gone, or, for other hosts and on Windows where the pid can't be
+probed, once it is older than STALE_SECONDS. Stale markers are taken
+over by the next saver wanting their version. Several savers can judge
+the same marker stale at once, so a marker is only ever taken over
+under a claim on its stale owner, see claim_stale_marker."""
+import errno
+import hashlib
+import json
+import logging
+import os
+import re
+import socket
+import time
+import uuid
+
+import chunkstore
+import naming
+
+log = logging.getLogger(__name__)
+
+SCENE_RE = naming.SCENE_TEMPLATE.regex
+
+RESERVED_RE = re.compile(r"^\.(?P<name>.+)\.reserved$")
+
+# a marker this old is abandoned, whoever made it
+STALE_SECONDS = 12 * 60 * 60
+
+INDEX_DIR = os.path.join(os.path.expanduser("~"), ".sfa_scripts",
+                         "versionindex")
+
+_indexes = {}
+
+
+def get_index(folder):
+    """returns the shared VersionIndex for folder"""
+    folder = os.path.abspath(str(folder))
+    if folder not in _indexes:
+        _indexes[folder] = VersionIndex(folder)
+    return _indexes[folder]
+
+
+def scene_name(descriptor, task, ver, ext):
+    """returns the file name of a scene version"""
+    return naming.SCENE_TEMPLATE.format(descriptor=descriptor, task=task,
+                                        ver=ver, ext=ext)
+
+
+def reservation_path(folder, name):
+    """returns the marker path that claims scene name in folder"""
+    return os.path.join(folder, ".{}.reserved".format(name))
+
+
+def marker_owner():
+    """returns what a new marker made by this process holds; the nonce
+    tells apart the markers of a reused pid"""
+    return "{} {} {}".format(socket.gethostname(), os.getpid(),
+                             uuid.uuid4().hex[:12])
+
+
+def pid_alive(pid):
+    """whether process pid runs on this host. Windows has no harmless
+    probe, os.kill would terminate it, so it is assumed alive there."""
+    if os.name == "nt":
+        return True
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+def read_marker(path):
+    """returns the owner text and mtime of the marker at path, None when
+    it is gone"""
+    try:
+        with open(path) as marker_file:
+            owner = marker_file.read()
+        return owner, os.path.getmtime(path)
+    except (IOError, OSError):
+        return None
+
+
+def owner_is_stale(owner, mtime, max_age=STALE_SECONDS, now=None):
+    """Whether a marker holding owner, last written at mtime, was left
+    behind: its process on this host is gone, or it is older than
+    max_age."""
+    if (time.time() if now is None else now) - mtime > max_age:
+        return True
+    fields = owner.split()
+    # markers written before the host was recorded hold just the pid
+    if len(fields) == 1:
+        fields.insert(0, socket.gethostname())
+    if (len(fields) >= 2 and fields[0] == socket.gethostname() and
+            fields[1].isdigit()):
+        return not pid_alive(int(fields[1]))
+    return False
+
+
+def marker_is_stale(path, max_age=STALE_SECONDS, now=None):
+    """whether the reservation marker at path was left behind"""
+    marker = read_marker(path)
+    return marker is not None and owner_is_stale(*marker, max_age=max_age,
+                                                 now=now)
+
+
+def claim_stale_marker(path, replacement=None):
+    """Takes over the marker at path if it is stale: writes replacement
+    into it, or removes it when replacement is None. Returns whether it
+    did."""
+    marker = read_marker(path)
+    if marker is None or not owner_is_stale(*marker):
+        return False
+    return take_over_marker(path, marker[0], replacement)
+
+
+def claim_path(path, stale_owner):
+    """returns the file that claims the marker at path while it holds
+    stale_owner"""
+    digest = hashlib.sha1(stale_owner.encode("utf-8")).hexdigest()[:12]
+    return "{}.{}.claim".format(path, digest)
+
+
+def take_over_marker(path, stale_owner, replacement=None):
+    """Replaces the marker at path, judged stale while it held
+    stale_owner, as claim_stale_marker does.
+
+    Two savers may both judge a marker stale. The first to take it over
+    would hand its version to itself, and the second, acting on what it
+    read earlier, must not then throw that fresh marker away. So the
+    marker is only touched by whoever creates the claim file named after
+    stale_owner with O_EXCL, and only while it still holds stale_owner.
+    It is replaced in place with os.replace, never removed and created
+    again, so no saver can create it in between. Returns whether the
+    marker was taken over."""
+    claim = claim_path(path, stale_owner)
+    try:
+        os.close(os.open(claim, os.O_CREAT | os.O_EXCL | os.O_WRONLY,
+                         0o644))
+    except OSError as err:
+        if err.errno != errno.EEXIST:
+            raise
+        # someone else is taking it over
+        return False
+    try:
+        marker = read_marker(path)
+        if marker is None or marker[0] != stale_owner:
+            return False
+        if replacement is None:
+            os.remove(path)
+        else:
+            tmp_path = "{}.{}.tmp".format(path, uuid.uuid4().hex)
+            with open(tmp_path, "w") as tmp_file:
+                tmp_file.write(replacement)
+            os.replace(tmp_path, path)
+        log.warning("took over stale reservation %s", path)
+        return True
+    finally:
+        os.remove(claim)
+
+
+def folder_mtime(folder):
+    """returns the folder's mtime in ns, or None if it does not exist"""
+    try:
+        return os.stat(folder).st_mtime_ns
+    except OSError:
+        return None
+
+
+class VersionIndex(object):
+    """Highest version of every descriptor/task/ext in one folder."""
+
+    def __init__(self, folder, index_dir=INDEX_DIR):
+        self.folder = os.path.abspath(str(folder))
+        self.mtime = None
+        self.latest_versions = {}
+        self.recorded = {}
+        self.cache_path = None
+        if index_dir:
+            name = hashlib.sha1(self.folder.encode("utf-8")).hexdigest()
+            self.cache_path = os.path.join(index_dir, name + ".json")
+            self._load()
+
+    @staticmethod
+    def _key(descriptor, task, ext):
+        return "{}_{}{}".format(descriptor, task, ext)
+
+    def _load(self):
+        try:
+            with open(self.cache_path) as cache_file:
+                data = json.load(cache_file)
+        except (IOError, OSError, ValueError):
+            return
+        if data.get("folder") == self.folder:
+            self.mtime = data.get("mtime")
+            self.latest_versions = data.get("latest", {})
+
+    def _store(self):
+        if not self.cache_path:
+            return
+        tmp_path = "{}.{}.tmp".format(self.cache_path, os.getpid())
+        try:
+            if not os.path.isdir(os.path.dirname(self.cache_path)):
+                os.makedirs(os.path.dirname(self.cache_path))
+            with open(tmp_path, "w") as cache_file:
+                json.dump({"folder": self.folder, "mtime": self.mtime,
+                           "latest": self.latest_versions}, cache_file)
+            os.replace(tmp_path, self.cache_path)
+        except (IOError, OSError) as err:
+            log.debug("could not store version index: %s", err)
+
+    def rescan(self):
+        """rebuilds the index from one os.scandir pass over the folder"""
+        mtime = folder_mtime(self.folder)
+        latest = {}
+        if mtime is not None:
+            for entry in os.scandir(self.folder):
+                name = entry.name
+                reserved = RESERVED_RE.match(name)
+                if reserved and marker_is_stale(entry.path):
+                    claim_stale_marker(entry.path)
+                    continue
+                if reserved:
+                    name = reserved.group("name")
+                elif name.endswith(chunkstore.MANIFEST_EXT):
+                    name = name[:-len(chunkstore.MANIFEST_EXT)]
+                match = SCENE_RE.match(name)
+                if not match:
+                    continue
+                key = self._key(match.group("descriptor"),
+                                match.group("task"), match.group("ext"))
+                ver = int(match.group("ver"))
+                if ver > latest.get(key, 0):
+                    latest[key] = ver
+        # versions saved by this session may still be on their way to the
+        # folder through a background save
+        for key, ver in self.recorded.items():
+            if ver > latest.get(key, 0):
+                latest[key] = ver
+        self.latest_versions = latest
+        self.mtime = mtime
+        self._store()
+
+    def refresh(self):
+        """rescans only if the folder changed since the last scan"""
+        if self.mtime is None or folder_mtime(self.folder) != self.mtime:
+            self.rescan()
+
+    def latest(self, descriptor, task, ext):
+        """returns the highest saved version, 0 when there is none"""
+        self.refresh()
+        ver = self.latest_versions.get(self._key(descriptor, task, ext), 0)
+        next_name = scene_name(descriptor, task, ver + 1, ext)
+        if (self._scene_exists(next_name) or
+                os.path.exists(reservation_path(self.folder, next_name))):
+            self.rescan()
+            ver = self.latest_versions.get(self._key(descriptor, task, ext),
+                                           0)
+        return ver
+
+    def _scene_exists(self, name):
+        """whether a scene is in the folder, as a plain or compressed file
+        or as a chunk store manifest of either"""
+        path = os.path.join(self.folder, name)
+        for suffix in ("",) + naming.COMPRESSION_EXTS:
+            if (os.path.exists(path + suffix) or
+                    os.path.exists(chunkstore.manifest_path(path + suffix))):
+                return True
+        return False
+
+    def record(self, descriptor, task, ext, ver):
+        """Notes a version this process just saved, so the folder mtime
+        change it caused does not force a rescan."""
+        key = self._key(descriptor, task, ext)
+        self.recorded[key] = max(ver, self.recorded.get(key, 0))
+        if ver > self.latest_versions.get(key, 0):
+            self.latest_versions[key] = ver
+        self.mtime = folder_mtime(self.folder)
+        self._store()
+
+    def reserve(self, descriptor, task, ext):
+        """Claims the next free version by creating its marker with O_EXCL,
+        or taking over a stale one, and returns it. Call release() once
+        the scene is saved."""
+        if not os.path.isdir(self.folder):
+            os.makedirs(self.folder)
+        ver = self.latest(descriptor, task, ext) + 1
+        while True:
+            name = scene_name(descriptor, task, ver, ext)
+            if not self._scene_exists(name):
+                marker = reservation_path(self.folder, name)
+                owner = marker_owner()
+                try:
+                    fd = os.open(marker, os.O_CREAT | os.O_EXCL | os.O_WRONLY,
+                                 0o644)
+                except OSError as err:
+                    if err.errno != errno.EEXIST:
+                        raise
+                    claimed = claim_stale_marker(marker, owner)
+                else:
+                    os.write(fd, owner.encode("utf-8"))
+                    os.close(fd)
+                    claimed = True
+                # a saver that doesn't reserve may have written the
+                # scene between the check and the marker
+                if claimed and not self._scene_exists(name):
+                    self.record(descriptor, task, ext, ver)
+                    return ver
+                if claimed:
+                    os.remove(marker)
+            ver += 1
+
+    def release(self, descriptor, task, ext, ver, saved=True):
+        """Removes the marker of a reserved version. With saved False the
+        scene never made it into the folder, so the version is forgotten
+        and handed out again by the next reserve."""
+        marker = reservation_path(self.folder,
+                                  scene_name(descriptor, task, ver, ext))
+        try:
+            os.remove(marker)
+        except OSError as err:
+            if err.errno != errno.ENOENT:
+                raise
+        if not saved:
+            key = self._key(descriptor, task, ext)
+            if self.recorded.get(key) == ver:
+                self.recorded[key] = ver - 1
+            # the next lookup rescans rather than trusting ver
+            self.mtime = None
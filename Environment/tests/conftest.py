@@ -0,0 +1,8 @@
+"""Puts the flat tool modules of src, and the fake Maya modules of bench,
+on the path, the way the bench scripts do."""
+import os
+import sys
+
+here = os.path.dirname(__file__)
+sys.path.insert(0, os.path.join(here, os.pardir, "bench"))
+sys.path.insert(0, os.path.join(here, os.pardir, "src"))
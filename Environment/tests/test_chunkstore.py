@@ -0,0 +1,62 @@
+import os
+
+import pytest
+
+import chunkstore
+
+
+def write(path, data):
+    with open(str(path), "wb") as out_file:
+        out_file.write(data)
+
+
+def read(path):
+    with open(str(path), "rb") as in_file:
+        return in_file.read()
+
+
+@pytest.fixture
+def data():
+    return os.urandom(200 * 1024)
+
+
+def test_save_restore_round_trip(tmp_path, data):
+    store = chunkstore.ChunkStore(str(tmp_path / "store"))
+    write(tmp_path / "scene.ma", data)
+    manifest = store.save(str(tmp_path / "scene.ma"),
+                          str(tmp_path / "scene.ma.chunks"))
+    assert manifest["size"] == len(data)
+    assert sum(size for _, size in manifest["chunks"]) == len(data)
+    store.restore(str(tmp_path / "scene.ma.chunks"),
+                  str(tmp_path / "restored.ma"))
+    assert read(tmp_path / "restored.ma") == data
+
+
+def test_small_edit_stores_few_new_chunks(tmp_path, data):
+    store = chunkstore.ChunkStore(str(tmp_path / "store"), compress=False)
+    write(tmp_path / "v1.ma", data)
+    store.save(str(tmp_path / "v1.ma"), str(tmp_path / "v1.ma.chunks"))
+    first = store.bytes_written
+    edited = data[:100000] + b"edit" + data[100000:]
+    write(tmp_path / "v2.ma", edited)
+    store.save(str(tmp_path / "v2.ma"), str(tmp_path / "v2.ma.chunks"))
+    assert store.bytes_written - first < len(data) // 4
+    store.restore(str(tmp_path / "v2.ma.chunks"), str(tmp_path / "out.ma"))
+    assert read(tmp_path / "out.ma") == edited
+
+
+def test_restore_with_missing_chunk_fails(tmp_path, data):
+    store = chunkstore.ChunkStore(str(tmp_path / "store"))
+    write(tmp_path / "scene.ma", data)
+    manifest = store.save(str(tmp_path / "scene.ma"),
+                          str(tmp_path / "scene.ma.chunks"))
+    os.remove(store.chunk_path(manifest["chunks"][0][0]))
+    with pytest.raises(chunkstore.ChunkStoreError):
+        store.restore(str(tmp_path / "scene.ma.chunks"),
+                      str(tmp_path / "restored.ma"))
+    assert not os.path.exists(str(tmp_path / "restored.ma"))
+
+
+def test_manifest_path():
+    assert chunkstore.manifest_path("a/b_c_v001.ma") == \
+        "a/b_c_v001.ma" + chunkstore.MANIFEST_EXT
@@ -0,0 +1,68 @@
+import pytest
+
+import naming
+
+
+def test_parse_many_mixed_single_digit_versions():
+    table = naming.SCENE_TEMPLATE.parse_many(["x/a_b_v1.ma", "junk",
+                                              "c_d_v2.mb"])
+    assert table.columns["ver"].tolist() == [1, -1, 2]
+    assert table.valid.tolist() == [True, False, True]
+    assert table.row(0) == {"folder": "x", "descriptor": "a", "task": "b",
+                            "ver": 1, "ext": ".ma", "compression": ""}
+    assert table.row(1) is None
+
+
+def test_parse_many_valid_mask_from_text():
+    # NumPy 1.x parses str to bool casts as numbers, so "main" raised
+    table = naming.SCENE_TEMPLATE.parse_many(["main_anim_v010.mb", "",
+                                              "notes.txt"])
+    assert table.valid.dtype == bool
+    assert table.valid.tolist() == [True, False, False]
+    assert table.columns["ver"].tolist() == [10, -1, -1]
+
+
+def test_parse_many_nothing_matches():
+    table = naming.SCENE_TEMPLATE.parse_many(["foo", "bar"])
+    assert table.columns["ver"].tolist() == [-1, -1]
+    assert not table.valid.any()
+
+
+def test_parse_many_empty():
+    table = naming.SCENE_TEMPLATE.parse_many([])
+    assert len(table) == 0
+    assert table.columns["ver"].tolist() == []
+
+
+@pytest.mark.parametrize("fields", [
+    {"descriptor": "main", "task": "anim", "ver": 7, "ext": ".ma",
+     "compression": ""},
+    {"descriptor": "big_set_piece", "task": "layout", "ver": 123,
+     "ext": ".mb", "compression": ".gz"},
+    {"descriptor": "a", "task": "b", "ver": 1000, "ext": ".ma",
+     "compression": ".zst"},
+])
+def test_format_parse_round_trip(fields):
+    name = naming.SCENE_TEMPLATE.format(**fields)
+    assert naming.SCENE_TEMPLATE.parse("some/folder/" + name) == fields
+    table = naming.SCENE_TEMPLATE.parse_many([name])
+    assert table.row(0) == dict(fields, folder="")
+
+
+def test_format_pads_version():
+    assert naming.SCENE_TEMPLATE.format(
+        descriptor="main", task="anim", ver=3,
+        ext=".ma") == "main_anim_v003.ma"
+
+
+def test_parse_rejects_other_names():
+    assert naming.SCENE_TEMPLATE.parse("main_anim.ma") is None
+    assert naming.SCENE_TEMPLATE.parse("main_anim_vx01.ma") is None
+
+
+def test_custom_template_round_trip():
+    template = naming.NamingTemplate("{shot}-{take:02d}{ext}")
+    name = template.format(shot="sh010", take=4, ext=".mb")
+    assert name == "sh010-04.mb"
+    assert template.parse(name) == {"shot": "sh010", "take": 4,
+                                    "ext": ".mb"}
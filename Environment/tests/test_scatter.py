@@ -0,0 +1,101 @@
+import pytest
+
+import fakemaya
+
+scene = fakemaya.install()
+
+import scatter
+import scatterbackend
+import scatterjob
+
+
+def fixed_sizer():
+    return scatterjob.BatchSizer(100, minimum=100, maximum=100)
+
+
+class FailingBackend(scatterbackend.CommandBackend):
+    """fails on its second batch"""
+
+    def __init__(self):
+        self.calls = 0
+
+    def scatter(self, source, matrices):
+        self.calls += 1
+        if self.calls == 2:
+            raise RuntimeError("backend failed")
+        return super(FailingBackend, self).scatter(source, matrices)
+
+
+@pytest.fixture
+def scat():
+    fakemaya.install()
+    import maya.cmds as cmds
+    cmds.select(scene.add_grid("pPlane1", 40))
+    scat = scatter.Scatter()
+    scat.select_verts_to_scatter_to()
+    cmds.select(scene.add_node("pCube"))
+    scat.select_obj_to_scatter()
+    scat.set_seed(1)
+    scat.set_percentage(50)
+    cmds.flushUndo()
+    return scat
+
+
+def user_edit():
+    """a node the user makes and moves while a scatter runs, one undo
+    step"""
+    import maya.cmds as cmds
+    node = scene.add_node("userNode")
+    cmds.move(1, 2, 3, node)
+    return node
+
+
+def test_scatter_func_is_one_undo_step(scat):
+    names = scat.scatter_func()
+    assert len(names) == 800
+    assert scene.undo_steps == 1
+    assert scene.chunk_depth == 0
+
+
+def test_failed_scatter_func_deletes_the_scatter(scat):
+    with pytest.raises(RuntimeError):
+        scat.scatter_func(backend=FailingBackend())
+    assert list(scene.nodes) == ["pCube1"]
+    assert scene.chunk_depth == 0
+
+
+def test_scatter_steps_is_one_undo_step_after_user_edits(scat):
+    steps = scat.scatter_steps(sizer=fixed_sizer())
+    next(steps)
+    assert scene.undo_steps == 0
+    user_edit()
+    for job in steps:
+        assert scene.chunk_depth == 0
+        assert scene.recording
+    assert len(scat.last_scatter) == job.total == 800
+    # the user's move, then the whole scatter
+    assert scene.undo_steps == 2
+
+
+def test_cancel_deletes_only_the_scatter(scat):
+    steps = scat.scatter_steps(sizer=fixed_sizer())
+    next(steps)
+    user_node = user_edit()
+    next(steps)
+    steps.close()
+    assert sorted(scene.nodes) == sorted(["pCube1", user_node])
+    assert scat.last_scatter == []
+    assert scene.chunk_depth == 0
+    assert scene.undo_steps == 1
+    assert scene.recording
+
+
+def test_failed_batch_deletes_the_scatter(scat):
+    steps = scat.scatter_steps(backend=FailingBackend(),
+                               sizer=fixed_sizer())
+    next(steps)
+    with pytest.raises(RuntimeError):
+        next(steps)
+    assert list(scene.nodes) == ["pCube1"]
+    assert scene.chunk_depth == 0
+    assert scene.undo_steps == 0
@@ -0,0 +1,70 @@
+import numpy as np
+import pytest
+
+import scattercore
+
+
+@pytest.mark.parametrize("count,k", [(1000, 10), (1000, 600), (50, 50),
+                                     (50, 0)])
+def test_sample_indices_unique_sorted(count, k):
+    picked = scattercore.sample_indices(count, k, seed=4)
+    assert len(picked) == k
+    assert len(np.unique(picked)) == k
+    assert (np.diff(picked.astype(np.int64)) > 0).all()
+    assert picked.min(initial=0) >= 0 and picked.max(initial=0) < count
+
+
+def test_sample_indices_repeat_with_seed():
+    first = scattercore.sample_indices(10 ** 6, 1000, seed=7)
+    assert np.array_equal(first,
+                          scattercore.sample_indices(10 ** 6, 1000, seed=7))
+    assert first.dtype == np.uint32
+
+
+def test_sample_indices_rejects_too_many():
+    with pytest.raises(ValueError):
+        scattercore.sample_indices(5, 6)
+
+
+def rotation(axis, degrees):
+    """row-vector rotation about one axis"""
+    cos, sin = np.cos(np.radians(degrees)), np.sin(np.radians(degrees))
+    i, j = [(1, 2), (2, 0), (0, 1)][axis]
+    matrix = np.eye(3)
+    matrix[i, i] = matrix[j, j] = cos
+    matrix[i, j] = sin
+    matrix[j, i] = -sin
+    return matrix
+
+
+def test_euler_matrices_apply_x_then_y_then_z():
+    angles = np.array([[30.0, -45.0, 110.0], [0.0, 90.0, 0.0]])
+    matrices = scattercore.euler_matrices(angles)
+    for matrix, (x, y, z) in zip(matrices, angles):
+        expected = rotation(0, x).dot(rotation(1, y)).dot(rotation(2, z))
+        assert np.allclose(matrix, expected)
+
+
+def test_matrix_eulers_round_trip():
+    angles = np.random.default_rng(2).uniform(-80, 80, (100, 3))
+    matrices = scattercore.euler_matrices(angles)
+    assert np.allclose(scattercore.matrix_eulers(matrices), angles)
+
+
+def test_matrix_eulers_gimbal_lock_keeps_rotation():
+    matrices = scattercore.euler_matrices([[20.0, 90.0, 35.0]])
+    again = scattercore.euler_matrices(scattercore.matrix_eulers(matrices))
+    assert np.allclose(again, matrices)
+
+
+def test_aim_matrices_aim_x_along_normals():
+    normals = np.array([[0.0, 0.0, 3.0], [1.0, 1.0, 0.0], [0.0, -2.0, 0.0]])
+    matrices = scattercore.aim_matrices(normals)
+    unit = normals / np.linalg.norm(normals, axis=1)[:, np.newaxis]
+    assert np.allclose(matrices[:, 0], unit)
+    assert np.allclose(np.einsum("nij,nkj->nik", matrices, matrices),
+                       np.eye(3))
+    assert np.allclose(np.linalg.det(matrices), 1.0)
+    # Y leans toward world up, and normals along up fall back to Z
+    assert matrices[0, 1, 1] == pytest.approx(1.0)
+    assert matrices[2, 1, 2] == pytest.approx(1.0)
@@ -0,0 +1,49 @@
+import numpy as np
+import pytest
+
+import meshsource
+import scatterdensity
+
+
+def test_accept_keeps_points_at_their_probability():
+    probabilities = np.repeat([0.0, 0.25, 1.0], 40000)
+    keep = scatterdensity.accept(probabilities, seed=3)
+    assert not keep[:40000].any()
+    assert abs(keep[40000:80000].mean() - 0.25) < 0.01
+    assert keep[80000:].all()
+
+
+def test_accept_repeats_with_seed():
+    probabilities = np.linspace(0, 1, 1000)
+    assert np.array_equal(scatterdensity.accept(probabilities, 5),
+                          scatterdensity.accept(probabilities, 5))
+
+
+def test_density_map_clips_values():
+    density_map = scatterdensity.DensityMap("map", "density")
+    values = np.array([[-1.0], [0.5], [2.0]])
+    assert density_map.densities(values).tolist() == [0.0, 0.5, 1.0]
+
+
+def test_vertex_map_needs_one_value_per_vertex():
+    points = np.zeros((3, 3))
+    source = meshsource.ArrayMeshSource(
+        {"ground": (points, points)},
+        vertex_data={"ground": {"column": [[0.1], [0.2], [0.3]],
+                                "flat": [0.1, 0.2, 0.3],
+                                "pairs": [[0.1, 1], [0.2, 1], [0.3, 1]]}})
+    for name in ("column", "flat"):
+        density_map = scatterdensity.DensityMap("map", name)
+        values = density_map.vertex_values(source, "ground")
+        assert values.tolist() == [[0.1], [0.2], [0.3]]
+    density_map = scatterdensity.DensityMap("map", "pairs")
+    with pytest.raises(ValueError):
+        density_map.vertex_values(source, "ground")
+
+
+def test_image_density_samples_through_uvs():
+    # top row white, bottom row black; UV v runs bottom to top
+    image = np.array([[255, 255], [0, 0]], dtype=np.uint8)
+    density_map = scatterdensity.DensityMap("image", image=image)
+    uvs = np.array([[0.25, 0.75], [0.75, 0.25], [0.5, 0.5]])
+    assert np.allclose(density_map.densities(uvs), [1.0, 0.0, 0.5])
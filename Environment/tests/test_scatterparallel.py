@@ -0,0 +1,76 @@
+import multiprocessing.spawn
+from multiprocessing import resource_tracker
+import os
+import sys
+
+import numpy as np
+
+import scattercli
+import scattercore
+import scatterparallel
+
+
+def fake_maya(tmp_path, monkeypatch, mayapy=True):
+    """points sys.executable at a Maya install in tmp_path"""
+    folder = tmp_path / "bin"
+    folder.mkdir()
+    name = "mayapy.exe" if os.name == "nt" else "mayapy"
+    if mayapy:
+        (folder / name).write_text("")
+    monkeypatch.setattr(sys, "executable", str(folder / "maya.bin"))
+    return str(folder / name)
+
+
+def test_workers_are_spawned_from_mayapy_inside_maya(tmp_path,
+                                                     monkeypatch):
+    mayapy = fake_maya(tmp_path, monkeypatch)
+    assert scatterparallel.inside_maya()
+    context = scatterparallel.worker_context()
+    assert context.get_start_method() == "spawn"
+    assert scatterparallel.find_mayapy() == mayapy
+    assert (scatterparallel.min_count(context) ==
+            scattercore.SPAWN_MIN_COUNT)
+    # the pool would start the resource tracker from the fake mayapy
+    resource_tracker.ensure_running()
+    # mayapy is the spawn executable only while the pool runs
+    executable = multiprocessing.spawn.get_executable()
+    with scatterparallel.worker_pool(2, context):
+        assert os.fsdecode(multiprocessing.spawn.get_executable()) == mayapy
+    assert multiprocessing.spawn.get_executable() == executable
+
+
+def test_maya_without_mayapy_stays_serial(tmp_path, monkeypatch):
+    fake_maya(tmp_path, monkeypatch, mayapy=False)
+    assert scatterparallel.worker_context() is None
+    core = scattercore.ScatterCore()
+    core.set_workers(4)
+    assert core.worker_context(10 ** 7) is None
+
+
+def test_pool_only_above_min_count():
+    core = scattercore.ScatterCore()
+    assert core.worker_context(10 ** 7) is None
+    core.set_workers(2, min_count=10)
+    assert core.worker_context(9) is None
+    assert core.worker_context(10) is not None
+
+
+def test_cli_sets_workers():
+    core = scattercore.ScatterCore()
+    args = scattercli.build_parser().parse_args(["in.obj", "out.npy",
+                                                 "--workers", "3"])
+    scattercli.configure(core, args)
+    assert core.workers == 3
+
+
+def test_parallel_matches_serial():
+    rng = np.random.default_rng(0)
+    positions = rng.random((500, 3))
+    normals = rng.normal(size=(500, 3))
+    options = dict(scale_range=((.5, .5, .5), (2, 2, 2)),
+                   rotate_range=((0, 0, 0), (90, 90, 90)), align=True,
+                   seed=3)
+    serial = scattercore.generate_transforms(positions, normals, **options)
+    parallel = scatterparallel.parallel_transforms(
+        positions, normals, workers=2, **options)
+    assert np.array_equal(parallel, serial)
@@ -0,0 +1,34 @@
+import numpy as np
+import pytest
+
+import scatterprofile
+
+
+def test_stop_before_start_raises():
+    with pytest.raises(RuntimeError):
+        scatterprofile.Profiler().stop()
+
+
+def test_stages_measure_their_own_memory():
+    profiler = scatterprofile.Profiler(memory=True)
+    with profiler:
+        with profiler.stage("large"):
+            array = np.ones(2000000)
+            del array
+        with profiler.stage("small"):
+            array = np.ones(1000)
+    report = profiler.report()
+    assert report["large"].peak_traced_mb >= 16
+    assert report["small"].peak_traced_mb < 1
+    assert report["small"].rss_mb is not None
+    assert "peak MB" in report.format()
+
+
+def test_timing_alone_leaves_memory_out():
+    profiler = scatterprofile.Profiler()
+    with profiler:
+        with profiler.stage("write", 3):
+            pass
+    stats = profiler.report()["write"]
+    assert stats.rss_mb is None and stats.peak_traced_mb is None
+    assert "peak MB" not in profiler.report().format()
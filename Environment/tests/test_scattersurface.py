@@ -0,0 +1,55 @@
+import numpy as np
+
+import scattersurface
+
+
+def overlapping(points, radii, keep):
+    """brute force count of kept pairs that still overlap"""
+    points, radii = points[keep], radii[keep]
+    distance = np.linalg.norm(points[:, None] - points[None], axis=2)
+    close = distance < radii[:, None] + radii[None]
+    return int(np.triu(close, 1).sum())
+
+
+def test_overlap_mask_leaves_no_overlaps():
+    rng = np.random.default_rng(1)
+    points = rng.uniform(0, 20, (800, 3))
+    radii = rng.uniform(0.5, 1.5, 800)
+    keep = scattersurface.overlap_mask(points, radii, seed=2)
+    assert 0 < keep.sum() < len(points)
+    assert overlapping(points, radii, keep) == 0
+
+
+def test_overlap_mask_mixed_sizes():
+    rng = np.random.default_rng(3)
+    points = rng.uniform(0, 30, (600, 3))
+    radii = rng.uniform(0.2, 0.4, 600)
+    radii[::100] = 6.0
+    keep = scattersurface.overlap_mask(points, radii, seed=4)
+    assert overlapping(points, radii, keep) == 0
+
+
+def test_overlap_mask_keeps_spheres_far_apart():
+    points = np.arange(30.0).reshape(10, 3) * 10
+    keep = scattersurface.overlap_mask(points, 1.0)
+    assert keep.all()
+
+
+def test_overlap_pairs_matches_brute_force():
+    rng = np.random.default_rng(5)
+    points = rng.uniform(0, 10, (300, 3))
+    radii = rng.choice([0.0, 0.05, 0.3, 2.5], 300)
+    i, j = scattersurface.overlap_pairs(points, radii)
+    found = set(zip(np.minimum(i, j).tolist(), np.maximum(i, j).tolist()))
+    distance = np.linalg.norm(points[:, None] - points[None], axis=2)
+    a, b = np.nonzero(np.triu(distance < radii[:, None] + radii[None], 1))
+    assert len(found) == len(i)
+    assert found == set(zip(a.tolist(), b.tolist()))
+
+
+def test_poisson_disk_mask_spacing():
+    points = np.random.default_rng(6).uniform(0, 10, (1000, 3))
+    keep = scattersurface.poisson_disk_mask(points, 1.0, seed=1)
+    kept = points[keep]
+    distance = np.linalg.norm(kept[:, None] - kept[None], axis=2)
+    assert distance[np.triu_indices(len(kept), 1)].min() >= 1.0
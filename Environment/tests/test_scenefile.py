@@ -0,0 +1,65 @@
+import os
+
+import pytest
+
+import chunkstore
+import scenebackend
+import scenefile
+import smartsave
+import versionindex
+
+
+@pytest.fixture
+def folder(tmp_path, monkeypatch):
+    folder = str(tmp_path)
+    monkeypatch.setitem(versionindex._indexes, folder,
+                        versionindex.VersionIndex(folder, index_dir=None))
+    return folder
+
+
+class ReadingBackend(scenebackend.FakeSceneBackend):
+    """keeps what each opened scene held"""
+    def open(self, path):
+        with open(str(path), "rb") as scene_file:
+            self.contents = scene_file.read()
+        return super(ReadingBackend, self).open(path)
+
+
+def test_new_scene_defaults(tmp_path):
+    backend = scenebackend.FakeSceneBackend(workspace=str(tmp_path))
+    scene = scenefile.SceneFile(backend=backend)
+    assert scene.task is None
+    assert str(scene.folder_path) == "."
+
+
+def test_smartsave_new_scene_goes_to_workspace_scenes(tmp_path):
+    backend = scenebackend.FakeSceneBackend(workspace=str(tmp_path))
+    scene = smartsave.SceneFile(backend=backend)
+    assert scene.task == "model"
+    assert scene.folder_path == tmp_path / "scenes"
+    scene.folder_path = str(tmp_path)
+    assert scene.path == tmp_path / "main_model_v001.ma"
+
+
+def test_smartsave_scene_from_path(tmp_path):
+    path = os.path.join(str(tmp_path), "shot_anim_v003.ma")
+    scene = smartsave.SceneFile(path, scenebackend.FakeSceneBackend(path))
+    assert (scene.descriptor, scene.task, scene.ver) == ("shot", "anim", 3)
+    assert scene.folder_path == tmp_path
+
+
+def test_chunked_save_opens_again(folder):
+    path = os.path.join(folder, "shot_anim_v001.ma")
+    payload = os.urandom(1 << 16)
+    scene = scenefile.SceneFile(
+        path, scenebackend.FakeSceneBackend(path, payload=payload))
+    store = chunkstore.store_for(folder)
+    manifest = scene.save(store=store)
+    assert os.path.exists(manifest) and not os.path.exists(path)
+
+    reopened = scenefile.SceneFile(path, ReadingBackend(path))
+    reopened.open()
+    assert reopened.backend.contents == (b"//Fake scene, save 1\n" +
+                                         payload)
+    assert reopened.backend.scene == path
+    assert not os.path.exists(reopened.backend.opened[0])
@@ -0,0 +1,148 @@
+import multiprocessing
+import os
+import socket
+import subprocess
+import sys
+import time
+
+import pytest
+
+import scenebackend
+import scenefile
+import versionindex
+
+
+@pytest.fixture
+def index(tmp_path):
+    return versionindex.VersionIndex(str(tmp_path), index_dir=None)
+
+
+def marker(index, ver):
+    return versionindex.reservation_path(
+        index.folder, versionindex.scene_name("shot", "anim", ver, ".ma"))
+
+
+def dead_pid():
+    process = subprocess.Popen([sys.executable, "-c", "pass"])
+    process.wait()
+    return process.pid
+
+
+def test_reserve_claims_successive_versions(index):
+    assert index.reserve("shot", "anim", ".ma") == 1
+    assert index.reserve("shot", "anim", ".ma") == 2
+    assert os.path.exists(marker(index, 1))
+    with open(marker(index, 2)) as marker_file:
+        owner = marker_file.read()
+    assert owner.startswith("{} {} ".format(socket.gethostname(), os.getpid()))
+
+
+def test_rescan_counts_saved_scenes(index, tmp_path):
+    (tmp_path / "shot_anim_v004.ma").write_text("")
+    (tmp_path / "shot_anim_v002.ma.gz").write_text("")
+    (tmp_path / "shot_light_v009.ma").write_text("")
+    assert index.latest("shot", "anim", ".ma") == 4
+    assert index.latest("shot", "light", ".ma") == 9
+    assert index.latest("shot", "fx", ".ma") == 0
+
+
+def test_release_after_save_keeps_version(index, tmp_path):
+    ver = index.reserve("shot", "anim", ".ma")
+    (tmp_path / "shot_anim_v001.ma").write_text("")
+    index.release("shot", "anim", ".ma", ver)
+    assert not os.path.exists(marker(index, ver))
+    assert index.reserve("shot", "anim", ".ma") == 2
+
+
+def test_release_of_failed_save_reissues_version(index):
+    ver = index.reserve("shot", "anim", ".ma")
+    index.release("shot", "anim", ".ma", ver, saved=False)
+    assert index.reserve("shot", "anim", ".ma") == ver
+
+
+def test_marker_of_dead_process_is_reclaimed(index):
+    with open(marker(index, 1), "w") as marker_file:
+        marker_file.write("{} {}".format(socket.gethostname(), dead_pid()))
+    assert index.reserve("shot", "anim", ".ma") == 1
+
+
+@pytest.mark.skipif(os.name == "nt", reason="pids are not probed there")
+def test_marker_of_live_process_is_kept(index):
+    with open(marker(index, 1), "w") as marker_file:
+        marker_file.write(versionindex.marker_owner())
+    assert index.reserve("shot", "anim", ".ma") == 2
+
+
+def test_old_marker_is_stale(index):
+    path = marker(index, 1)
+    with open(path, "w") as marker_file:
+        marker_file.write("otherhost 1")
+    assert not versionindex.marker_is_stale(path)
+    later = time.time() + versionindex.STALE_SECONDS + 1
+    assert versionindex.marker_is_stale(path, now=later)
+
+
+def plant_stale_marker(index, ver):
+    path = marker(index, ver)
+    with open(path, "w") as marker_file:
+        marker_file.write("{} {} crashed".format(socket.gethostname(),
+                                                 dead_pid()))
+    return path
+
+
+def test_stale_marker_is_taken_over_once(index):
+    path = plant_stale_marker(index, 1)
+    with open(path) as marker_file:
+        stale_owner = marker_file.read()
+    # both savers judged the marker stale, the first one takes it over
+    assert versionindex.take_over_marker(path, stale_owner, "saver a")
+    assert not versionindex.take_over_marker(path, stale_owner, "saver b")
+    assert not versionindex.take_over_marker(path, stale_owner)
+    with open(path) as marker_file:
+        assert marker_file.read() == "saver a"
+
+
+def test_stale_marker_under_claim_is_skipped(index):
+    path = plant_stale_marker(index, 1)
+    with open(path) as marker_file:
+        stale_owner = marker_file.read()
+    # another saver is taking the marker over right now
+    claim = versionindex.claim_path(path, stale_owner)
+    open(claim, "w").close()
+    assert index.reserve("shot", "anim", ".ma") == 2
+    os.remove(claim)
+    with open(path) as marker_file:
+        assert marker_file.read() == stale_owner
+
+
+def reserve_in(folder):
+    index = versionindex.VersionIndex(folder, index_dir=None)
+    return index.reserve("shot", "anim", ".ma")
+
+
+def test_contending_savers_get_distinct_versions(index):
+    for ver in range(1, 5):
+        plant_stale_marker(index, ver)
+    with multiprocessing.Pool(8) as pool:
+        versions = pool.map(reserve_in, [index.folder] * 16)
+    assert len(set(versions)) == len(versions)
+
+
+class FailingBackend(scenebackend.FakeSceneBackend):
+    def save_as(self, path):
+        raise RuntimeError("disk full")
+
+
+def test_failed_increment_save_releases_version(tmp_path, monkeypatch):
+    folder = str(tmp_path)
+    monkeypatch.setitem(versionindex._indexes, folder,
+                        versionindex.VersionIndex(folder, index_dir=None))
+    path = os.path.join(folder, "shot_anim_v001.ma")
+    scene = scenefile.SceneFile(path, FailingBackend(path))
+    with pytest.raises(RuntimeError):
+        scene.increment_save()
+    assert os.listdir(folder) == []
+    scene.backend = scenebackend.FakeSceneBackend(path)
+    scene.increment_save()
+    assert scene.backend.saves == [os.path.join(folder,
+                                                "shot_anim_v001.ma")]